@@ -10,9 +10,9 @@ Mediante una matriz excel nos activara el parametro de COBie y COBieType.
 ¿Cómo hacerlo?
 -> Click en el boton
 -> Elegir entre 'SI' y 'NO' segun cada usuario
+-> Elegimos matriz Excel COBie (o reutilizamos la última)
 -> Seleccionamos los elementos de la vista
 -> Click en finalizar en la parte superior
--> Elegimos matriz Excel COBie
 ------------------------------------------------------------------
 Última actualización:
 - [22.09.2025] - 1.1 UPDATE - New Feature
@@ -21,12 +21,17 @@ Autor: Paolo Perez
 """
 
 from pyrevit import forms, revit, script
-from Autodesk.Revit.DB import StorageType, FamilyInstance
+from Autodesk.Revit.DB import StorageType
 from Autodesk.Revit.UI import TaskDialog, TaskDialogResult, TaskDialogCommonButtons
 from Autodesk.Revit.UI.Selection import ObjectType
 from Autodesk.Revit.Exceptions import OperationCanceledException
 from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
-from Extensions._Ignore import leer_excel_filtrado
+from Extensions._Ignore import leer_excel_filtrado, cargar_hoja_elementos
+from Extensions._RevitAPI import cache_elementos, subcomponentes
+from Extensions._Transacciones import ChunkedTransaction
+from Extensions._Worksharing import reservar_elementos
+from Helper._Excel import Excel, liberar_archivos
+from Helper._Prefetch import MatrixPrefetch
 from Helper._HSpecialties import get_current_specialty
 
 def set_param(param, val):
@@ -96,6 +101,15 @@ elif result == TaskDialogResult.No:
 else:
     script.exit()
 
+# Solo leer Excel si se va a ACTIVAR COBie: se elige la matriz antes de seleccionar
+# y se carga en segundo plano mientras el usuario selecciona elementos
+excel_instance = None
+prefetch = None
+if modo_activar:
+    excel_instance = Excel()
+    excel_instance.select_file()
+    prefetch = MatrixPrefetch(cargar_hoja_elementos, excel_instance)
+
 # Selección de elementos y configuración inicial
 try:
     ui_doc = revit.uidoc
@@ -104,10 +118,10 @@ try:
     refs = ui_doc.Selection.PickObjects(ObjectType.Element)
     print("Elementos seleccionados: {}".format(len(refs)))
     
-    # Solo leer Excel si se va a ACTIVAR COBie
     if modo_activar:
         print("Cargando datos del archivo Excel...")
-        sin_cobie, con_cobie = leer_excel_filtrado()
+        prefetch.result()
+        sin_cobie, con_cobie = leer_excel_filtrado(excel_instance)
         print("Codigos sin COBie: {}".format(len(sin_cobie)))
         print("Codigos con COBie: {}".format(len(con_cobie)))
     else:
@@ -144,97 +158,103 @@ instancias_valor_0 = 0
 tipos_valor_1 = 0
 tipos_valor_0 = 0
 
-# Calcular total de elementos a procesar para la barra de progreso
-total_elementos = 0
+# Elementos a procesar: selección y sus subcomponentes
+elementos_a_procesar = []
 elementos_con_subcomponentes = 0
 
+vistos = set()
+
 for ref in refs:
     elem = doc.GetElement(ref)
-    if elem and elem.Category:
-        total_elementos += 1
-        if isinstance(elem, FamilyInstance):
-            try:
-                sub_ids = elem.GetSubComponentIds()
-                if sub_ids:
-                    subcomponentes_validos = [sid for sid in sub_ids if doc.GetElement(sid)]
-                    if subcomponentes_validos:
-                        elementos_con_subcomponentes += 1
-                        total_elementos += len(subcomponentes_validos)
-            except:
-                pass
+    if not elem or not elem.Category or elem.Id.IntegerValue in vistos:
+        continue
+    elementos_a_procesar.append(elem)
+
+    # Familias anidadas compartidas en todos los niveles, sin repetir
+    subcomponentes_validos = [sub for sub in subcomponentes(doc, elem, vistos) if sub.Category]
+    if subcomponentes_validos:
+        elementos_con_subcomponentes += 1
+        elementos_a_procesar.extend(subcomponentes_validos)
+
+# Worksharing: se reservan en bloque las instancias y sus tipos; los elementos de otros
+# usuarios se descartan antes de procesar
+cache = cache_elementos(doc)
+tipos_alcance = [cache.tipo(el) for el in elementos_a_procesar]
+reserva = reservar_elementos(doc, elementos_a_procesar + tipos_alcance)
+reserva.informe()
+elementos_a_procesar = [el for el in elementos_a_procesar if reserva.editable(el.Id)]
 
+total_elementos = len(elementos_a_procesar)
 print("Total elementos a procesar: {}".format(total_elementos))
 print("Elementos principales con subcomponentes: {}".format(elementos_con_subcomponentes))
+
+def procesar_elemento(el):
+    """Calcula y escribe COBie en la instancia y COBie.Type en su tipo (una vez por código)."""
+    global elementos_procesados, instancias_valor_1, instancias_valor_0, tipos_valor_1, tipos_valor_0
+
+    # Actualizar barra de progreso
+    pb.update_progress(elementos_procesados + 1, total_elementos)
+    
+    # Obtener código de partida del elemento de instancia
+    # Pasamos specialty_name que ya obtuvimos antes
+    code = get_codigo_partida(el, specialty_name)
+    
+    # Calcular valor según lógica COBie
+    v = compute_value(code, sin_cobie_set, con_cobie_set, modo_activar)
+
+    # Procesar tipo (COBie.Type) - solo una vez por código de partida único
+    t_id = el.GetTypeId()
+    if code and code not in processed_codes_types:
+        tipo = cache.elemento(t_id)
+        if tipo and reserva.editable(t_id):
+            p_type = tipo.LookupParameter("COBie.Type")
+            set_param(p_type, v)
+            processed_codes_types[code] = t_id
+            # Contar tipos según valor
+            if v == 1:
+                tipos_valor_1 += 1
+            else:
+                tipos_valor_0 += 1
+
+    # Procesar instancia (COBie)
+    p_inst = el.LookupParameter("COBie")
+    set_param(p_inst, v)
+    
+    # Contar instancias según valor
+    if v == 1:
+        instancias_valor_1 += 1
+    else:
+        instancias_valor_0 += 1
+    
+    elementos_procesados += 1
+
 print("\n=== INICIANDO PROCESAMIENTO ===")
 
-# Ejecutar transacción general con barra de progreso
-with revit.Transaction("Toggle COBieType & COBie Component"):
-    with forms.ProgressBar(title='Procesando elementos COBie...', 
-                          step=1, 
-                          cancellable=True) as pb:
-        
-        for ref in refs:
-            if pb.cancelled:
-                script.exit()
-                
-            elem = doc.GetElement(ref)
-            if not elem or not elem.Category:
-                continue
-
-            elementos_a_procesar = [elem]
-
-            # Solo verificar subcomponentes si es instancia de familia
-            if isinstance(elem, FamilyInstance):
-                try:
-                    sub_ids = elem.GetSubComponentIds()
-                    if sub_ids:
-                        for sid in sub_ids:
-                            sub_elem = doc.GetElement(sid)
-                            if sub_elem:
-                                elementos_a_procesar.append(sub_elem)
-                except:
-                    pass
-
-            # Procesar el elemento y sus subcomponentes si los hay
-            for el in elementos_a_procesar:
-                if not el.Category:
-                    continue
-
-                # Actualizar barra de progreso
-                pb.update_progress(elementos_procesados + 1, total_elementos)
-                
-                # Obtener código de partida del elemento de instancia
-                # Pasamos specialty_name que ya obtuvimos antes
-                code = get_codigo_partida(el, specialty_name)
-                
-                # Calcular valor según lógica COBie
-                v = compute_value(code, sin_cobie_set, con_cobie_set, modo_activar)
-
-                # Procesar tipo (COBie.Type) - solo una vez por código de partida único
-                t_id = el.GetTypeId()
-                if code and code not in processed_codes_types:
-                    tipo = doc.GetElement(t_id)
-                    if tipo:
-                        p_type = tipo.LookupParameter("COBie.Type")
-                        set_param(p_type, v)
-                        processed_codes_types[code] = t_id
-                        # Contar tipos según valor
-                        if v == 1:
-                            tipos_valor_1 += 1
-                        else:
-                            tipos_valor_0 += 1
-
-                # Procesar instancia (COBie)
-                p_inst = el.LookupParameter("COBie")
-                set_param(p_inst, v)
-                
-                # Contar instancias según valor
-                if v == 1:
-                    instancias_valor_1 += 1
-                else:
-                    instancias_valor_0 += 1
-                
-                elementos_procesados += 1
+# Transacciones por bloques dentro de un grupo: al cancelar se conservan los bloques ya
+# confirmados y la siguiente ejecución puede reanudar desde ahí
+with forms.ProgressBar(title='Procesando elementos COBie...', 
+                      step=1, 
+                      cancellable=True) as pb:
+    transaccion = ChunkedTransaction(doc, "Toggle COBieType & COBie Component",
+                                     cancelado=lambda: pb.cancelled,
+                                     reanudar="activate|{}".format(1 if modo_activar else 0),
+                                     matriz=excel_instance.ruta_archivo if excel_instance else None)
+    ya_procesados = transaccion.progreso_anterior(elementos_a_procesar)
+    if ya_procesados:
+        reanudar = forms.alert("Una ejecución anterior sobre estos mismos elementos y con la misma matriz se "
+                               "interrumpió con {} elementos ya procesados.\n"
+                               "Si deshiciste esa ejecución, elige No.\n"
+                               "¿Reanudar desde donde quedó?".format(ya_procesados),
+                               yes=True, no=True)
+        if not reanudar:
+            transaccion.descartar_progreso()
+    transaccion.procesar(elementos_a_procesar, procesar_elemento)
+
+print(transaccion.resumen())
+if transaccion.cancelado:
+    forms.alert("Proceso cancelado: se conservan {} elementos ya procesados.\n"
+                "Vuelva a ejecutar el botón para reanudar.".format(transaccion.procesados + transaccion.omitidos),
+                exitscript=True)
 
 # TaskDialog de finalización exitosa
 TaskDialog.Show(
@@ -249,6 +269,8 @@ TaskDialog.Show(
 print("\n=== RESUMEN FINAL ===")
 print("Elementos procesados: {}".format(elementos_procesados))
 print("Codigos unicos de partida: {}".format(len(processed_codes_types)))
+print("Excluidos por worksharing: {}".format(reserva.excluidos()))
+print(cache.resumen())
 print("Modo aplicado: {}".format("ACTIVAR" if modo_activar else "DESACTIVAR"))
 print("Especialidad: {}".format(specialty_name))
 
@@ -265,4 +287,7 @@ if modo_activar:
     print("Codigos definidos con COBie (Y): {}".format(len(con_cobie)))
     print("Codigos definidos sin COBie (N): {}".format(len(sin_cobie)))
     
+# La matriz ya no se consulta: se cierran los archivos abiertos de la sesión
+liberar_archivos()
+
 print("¡Proceso completado exitosamente!")
\ No newline at end of file
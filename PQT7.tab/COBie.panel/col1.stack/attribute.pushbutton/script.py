@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 __title__ = "COBie Attribute"
 
-from Autodesk.Revit.DB import FilteredElementCollector, BuiltInCategory, FamilyInstance
+from Autodesk.Revit.DB import FilteredElementCollector, BuiltInCategory
 from Autodesk.Revit.UI import TaskDialog
 from pyrevit import revit, script
 from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
-from Extensions._RevitAPI import getParameter, SetParameter
+from Extensions._RevitAPI import getParameter, SetParameter, expandir_subcomponentes
+from Extensions._Worksharing import reservar_elementos
 from DBRepositories.SchoolRepository import ColegiosRepository
 import re
 
@@ -105,36 +106,35 @@ parametros_estaticos = {
 Selections_elements = uidoc.Selection.PickElementsByRectangle()
 errores = []
 
+# Elementos seleccionados y sus subcomponentes (todos los niveles), sin repetir
+elementos_a_procesar = list(expandir_subcomponentes(doc, Selections_elements))
+
+# Worksharing: se reservan en bloque y se descartan los elementos de otros usuarios
+reserva = reservar_elementos(doc, elementos_a_procesar + [project_info])
+reserva.informe(script.get_output())
+
 with revit.Transaction("Asignar COBie Attribute"):
-    for element in Selections_elements:
-        elementos_a_procesar = [element]
-
-        # Si es un FamilyInstance, añadir también sus subcomponentes
-        if isinstance(element, FamilyInstance):
-            try:
-                sub_elems = [doc.GetElement(sid) for sid in element.GetSubComponentIds()]
-                elementos_a_procesar.extend([se for se in sub_elems if se])
-            except Exception:
-                pass  # Seguridad adicional
-
-        # Procesar elemento principal y subcomponentes
-        for elem in elementos_a_procesar:
-            param_nivel = getParameter(elem, "S&P_NIVEL DE ELEMENTO")
-            nivel = param_nivel.AsString() if param_nivel else ""
-            parametros = build_parametros(nivel)
-
-            for param, value in parametros.items():
-                if value is None:
-                    value = NO_APLICA
-                p = getParameter(elem, param)
-                if not SetParameter(p, value):
-                    errores.append((elem.Id, param))
+    # Procesar elementos principales y subcomponentes
+    for elem in reserva.disponibles:
+        if elem.Id == project_info.Id:
+            continue
+        param_nivel = getParameter(elem, "S&P_NIVEL DE ELEMENTO")
+        nivel = param_nivel.AsString() if param_nivel else ""
+        parametros = build_parametros(nivel)
+
+        for param, value in parametros.items():
+            if value is None:
+                value = NO_APLICA
+            p = getParameter(elem, param)
+            if not SetParameter(p, value):
+                errores.append((elem.Id, param))
 
     # Aplicar solo parámetros estáticos al Project Information
-    for project_param, value in parametros_estaticos.items():
-        parameter = getParameter(project_info, project_param)
-        if not SetParameter(parameter, value):
-            errores.append((project_info.Id, project_param))
+    if reserva.editable(project_info.Id):
+        for project_param, value in parametros_estaticos.items():
+            parameter = getParameter(project_info, project_param)
+            if not SetParameter(parameter, value):
+                errores.append((project_info.Id, project_param))
 
 
 # ---------------------- Reporte final ----------------------
@@ -2,32 +2,35 @@
 __title__ = "COBie\nComponent"
 
 # ==== Obtenemos la librerias necesarias ====
-from Autodesk.Revit.DB import Transaction, ElementId, StorageType, FamilyInstance, ElementType, BuiltInParameter
+from Autodesk.Revit.DB import Transaction, StorageType
 from Autodesk.Revit.UI import TaskDialog
 from Autodesk.Revit.Exceptions import OperationCanceledException
 from Autodesk.Revit.UI.Selection import ObjectType
 from pyrevit import script, revit, forms
 from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
 from Extensions._RevitAPI import *
+from Extensions._COBie import (COLUMNAS_MATRIZ_COMPONENT, COLUMNAS_SPACE, TIPOS_MATRIZ_COMPONENT,
+                               PARAMETROS_CONTROL_COMPONENT, COBieComponentTransfer)
+from Extensions._Transacciones import ChunkedTransaction
+from Extensions._Worksharing import reservar_elementos
 from DBRepositories.SchoolRepository import ColegiosRepository
 from DBRepositories.SpecialtiesRepository import SpecialtiesRepository
-from Helper._Excel import Excel
+from Helper._Excel import Excel, liberar_archivos
+from Helper._Prefetch import MatrixPrefetch
+from Helper._MatrixDiff import (instantanea, comparar, leer_aplicada, guardar_aplicada,
+                                 carpeta_aplicadas, AVISO_APLICADA_LOCAL)
 from Helper._Dictionary import find_mapped_number
-from datetime import datetime, timedelta
 
 nombre_archivo = obtener_nombre_archivo()
 if not validar_nombre(nombre_archivo):
     script.exit()
 
-# ==== Variable global para controlar modo sobrescritura ====
-SOBRESCRIBIR_GLOBAL = True
-
 # ==== Metodo para validar valor de parametro vacío o n/a ====
 def get_first_valid_parameter(elem, names):
     """Devuelve el primer valor válido encontrado en la lista de parámetros."""
     invalid_values = {None, ""}
     for name in names:
-        param = getParameter(elem, name)
+        param = resolver.editable(elem, name)
         if param:
             value = get_param_value(param)
             if isinstance(value, str):
@@ -38,132 +41,104 @@ def get_first_valid_parameter(elem, names):
     return None
 
 
-def esta_vacio(param):
-    """
-    Verifica si un parámetro está vacío o tiene valores no válidos.
-    """
-    if not param:
-        return True
-    
-    value = get_param_value(param)
-    
-    if value is None:
-        return True
-    
-    if isinstance(value, str):
-        value_clean = value.strip().lower()
-        if value_clean in ("", "n/a", "none"):
-            return True
-    
-    return False
-
-
-def asignar_parametro_seguro(param, value):
-    """
-    Asigna un valor a un parámetro de forma segura (recibe el parámetro ya obtenido).
-    Retorna True si se asignó correctamente, False si no.
-    """
-    if value is None or (isinstance(value, str) and value.strip() in ("", "n/a")):
-        return False
-    
-    if not param or param.IsReadOnly:
-        return False
-    
-    # Verificar si debe sobrescribir o solo llenar vacíos
-    if not SOBRESCRIBIR_GLOBAL:
-        # Solo asignar si está vacío
-        if not esta_vacio(param):
-            return False
-    
-    try:
-        SetParameter(param, value)
-        return True
-    except Exception:
-        return False
-
-
-# ==== Metodo para dividir una cadena ====
-def divide_string(text, idx, character_divider=None, compare=None, value_default=None):
-    """
-    Divide un string en partes usando un separador y devuelve el elemento en la posición idx.
-    Si el texto completo coincide con 'compare', devuelve 'value_default'.
-    """
-    if not text:
-        return ""
-    
-    # Verificar coincidencia antes de dividir
-    if compare and text.strip().lower() == compare.lower():
-        return value_default
-    
-    parts = text.split(character_divider) if character_divider else text.split()
-    if idx < 0 or idx >= len(parts):
-        return ""
-    
-    return parts[idx]
-
-columns_headers = [
-    "COBie.Component.InstallationDate",
-    "COBie.Component.Description",
-    "CODIGO"
-]
-
-columns_space = [
-    "COBie.Space.Name",
-    "COBie.Space.RoomTag",
-]
-
-def get_roomtag_from_cobie_space(cobie_space_value, space_data_dict):
-    """
-    Obtiene el RoomTag desde los datos de SPACE ya cargados.
-    Recibe el valor directamente en lugar del elemento.
-    """
-    if not cobie_space_value:
-        return "0"
-    
-    # Normalizar el valor
-    cobie_space_value_clean = str(cobie_space_value).strip()
-    
-    if not cobie_space_value_clean or cobie_space_value_clean == "0":
-        return "0"
-    
-    # Si hay múltiples espacios separados por coma, tomar solo el primero
-    if "," in cobie_space_value_clean:
-        cobie_space_value_clean = cobie_space_value_clean.split(",")[0].strip()
-    
-    # Buscar en el diccionario
-    if cobie_space_value_clean in space_data_dict:
-        room_tag = space_data_dict[cobie_space_value_clean].get("COBie.Space.RoomTag", "0")
-        return room_tag if room_tag else "0"
-    
-    return "0"
-
 # ==== Obtener el documento activo ====
 doc = revit.doc
 ui_doc = revit.uidoc
 
-# ==== Seleccionar elementos y obtenemos tipo Reference de los elementos ====
-try:
-    references = ui_doc.Selection.PickObjects(ObjectType.Element)
-except OperationCanceledException:
-    forms.alert("Operación cancelada: no se seleccionaron elementos para procesar COBie.Component",
-                title="Cancelación")
-    script.exit()
+# ==== Instanciamos la especialidad correspondiente al modelo ====
+specialty_repo = SpecialtiesRepository()
+specialty_object = specialty_repo.get_specialty_by_document(doc)
+specialty = None
 
-# ==== PREGUNTA: SOBRESCRIBIR ====================
-sobrescribir = forms.alert(
-    "¿Deseas SOBRESCRIBIR los parámetros que ya tienen valores?\n\n"
-    "SI: Sobrescribir todos (actualizar valores existentes)\n"
-    "NO: Solo llenar parámetros vacíos (cada parámetro se evalúa individualmente)",
-    title="Modo de sobrescritura COBie Component",
-    yes=True,
-    no=True
-)
+if specialty_object:
+    specialty = specialty_object.name
 
-# Configurar variable global
-SOBRESCRIBIR_GLOBAL = sobrescribir
+# Determinar nombre de hoja según especialidad
+specialty_to_sheet = {
+    "Arquitectura": "ESTANDAR COBIE  -AR",
+    "Instalaciones Sanitarias": "ESTANDAR COBIE  - PL",
+    "Instalaciones Electricas": "ESTANDAR COBIE  -EE",
+    "Instalaciones de Comunicacion": "ESTANDAR COBIE  - IICC",
+    "Instalaciones Mecanicas": "ESTANDAR COBIE  - ME"
+}
 
-# ==== Datos fijos ====
-CREATED_ON = "2025-08-04T11:59:30"
+sheet_name = specialty_to_sheet.get(specialty)
+if not sheet_name:
+    forms.alert("Especialidad '{}' no reconocida para cargar datos Excel.".format(specialty), exitscript=True)
+
+# ==== ELEGIR LA MATRIZ ANTES DE SELECCIONAR Y CARGARLA EN SEGUNDO PLANO ====
+excel_instance = Excel()
+excel_instance.select_file()
+
+def cargar_matriz():
+    """Lee e indexa en paralelo las hojas COMPONENT y SPACE (sin API de Revit ni ventanas)."""
+    tablas = excel_instance.read_tables({
+        "component": {"hoja": sheet_name, "columns_name": COLUMNAS_MATRIZ_COMPONENT, "start_row": 2, "start_data": 3,
+                      "indices": ["CODIGO"], "tipos": TIPOS_MATRIZ_COMPONENT},
+        "space": {"hoja": 'ESTANDAR COBie SPACE ', "columns_name": COLUMNAS_SPACE, "start_row": 2, "start_data": 3,
+                  "indices": ["COBie.Space.Name"]},
+    })
+    return tablas["component"], tablas["space"]
+
+prefetch = MatrixPrefetch(cargar_matriz)
+
+# ==== Modo diferencias: solo si ya se aplicó una matriz a esta hoja ====
+OPCION_SELECCION = "Seleccionar elementos"
+OPCION_MODELO = "Todo el modelo (sobrescribir)"
+OPCION_DIFERENCIAS = "Solo códigos modificados en la matriz"
+
+# El modo diferencias solo se ofrece si ya se aplicó la matriz de esta hoja a todo el modelo
+diferencias = None
+matriz_aplicada = leer_aplicada(doc, "component", sheet_name)
+opciones_alcance = [OPCION_SELECCION, OPCION_MODELO] + ([OPCION_DIFERENCIAS] if matriz_aplicada else [])
+mensaje_alcance = "¿Qué elementos deseas procesar?"
+if matriz_aplicada and carpeta_aplicadas(doc) is None:
+    mensaje_alcance += AVISO_APLICADA_LOCAL
+opcion = forms.CommandSwitchWindow.show(opciones_alcance, message=mensaje_alcance)
+if not opcion:
+    script.exit()
+modo_diferencias = (opcion == OPCION_DIFERENCIAS)
+modo_modelo = (opcion == OPCION_MODELO)
+
+if modo_diferencias:
+    # Se reescriben solo las columnas cambiadas de los elementos del modelo
+    # cuyo código tiene filas nuevas o modificadas en la matriz
+    component_table, _ = prefetch.result()
+    diferencias = comparar(matriz_aplicada, instantanea(component_table, "CODIGO", COLUMNAS_MATRIZ_COMPONENT))
+    print("Diferencias con la última matriz aplicada:")
+    print(diferencias.resumen())
+    if not diferencias.codigos():
+        forms.alert("La matriz no tiene cambios respecto a la última aplicada.", exitscript=True)
+    references = [e.Id for e in elementos_por_codigo(doc, diferencias.codigos())]
+    if not references:
+        forms.alert("Ningún elemento del modelo usa los códigos modificados.", exitscript=True)
+    sobrescribir = True
+elif modo_modelo:
+    # Todos los elementos del modelo con un código de la matriz
+    component_table, _ = prefetch.result()
+    codigos_matriz = set(instantanea(component_table, "CODIGO", COLUMNAS_MATRIZ_COMPONENT)["filas"])
+    references = [e.Id for e in elementos_por_codigo(doc, codigos_matriz)]
+    if not references:
+        forms.alert("Ningún elemento del modelo usa los códigos de la matriz.", exitscript=True)
+    sobrescribir = True
+else:
+    # ==== Seleccionar elementos y obtenemos tipo Reference de los elementos ====
+    try:
+        references = ui_doc.Selection.PickObjects(ObjectType.Element)
+    except OperationCanceledException:
+        forms.alert("Operación cancelada: no se seleccionaron elementos para procesar COBie.Component",
+                    title="Cancelación")
+        script.exit()
+
+    # ==== PREGUNTA: SOBRESCRIBIR ====================
+    sobrescribir = forms.alert(
+        "¿Deseas SOBRESCRIBIR los parámetros que ya tienen valores?\n\n"
+        "SI: Sobrescribir todos (actualizar valores existentes)\n"
+        "NO: Solo llenar parámetros vacíos (cada parámetro se evalúa individualmente)",
+        title="Modo de sobrescritura COBie Component",
+        yes=True,
+        no=True
+    )
 
 # ==== Instanciamos el colegio correspondiente del modelo activo ====
 school_repo_object = ColegiosRepository()
@@ -178,83 +153,34 @@ if school_object:
     created_by = school_object.created_by
     warranty_start_date = school_object.warranty_start_date.component_warranty
 
-# ==== Instanciamos la especialidad correspondiente al modelo ====
-specialty_repo = SpecialtiesRepository()
-specialty_object = specialty_repo.get_specialty_by_document(doc)
-specialty = None
-
-if specialty_object:
-    specialty = specialty_object.name
-
 print("\n" + "="*70)
 print("PROCESAMIENTO COBie COMPONENT - {}".format(specialty))
 print("="*70)
-if sobrescribir:
+if modo_diferencias:
+    print("MODO: Solo códigos modificados en la matriz")
+elif modo_modelo:
+    print("MODO: Todo el modelo, sobrescribiendo valores existentes")
+elif sobrescribir:
     print("MODO: Sobrescribir valores existentes")
 else:
     print("MODO: Solo llenar parametros vacios (individualmente)")
 print("="*70)
 
-# ==== CARGAR EXCEL UNA SOLA VEZ ====
-print("\n[INFO] Preparando carga de datos...")
-
-# Determinar nombre de hoja según especialidad
-specialty_to_sheet = {
-    "Arquitectura": "ESTANDAR COBIE  -AR",
-    "Instalaciones Sanitarias": "ESTANDAR COBIE  - PL",
-    "Instalaciones Electricas": "ESTANDAR COBIE  -EE",
-    "Instalaciones de Comunicacion": "ESTANDAR COBIE  - IICC",
-    "Instalaciones Mecanicas": "ESTANDAR COBIE  - ME"
-}
-
-sheet_name = specialty_to_sheet.get(specialty)
-if not sheet_name:
-    forms.alert("Especialidad '{}' no reconocida para cargar datos Excel.".format(specialty), exitscript=True)
-
-# Crear instancia de Excel (esto pedirá el archivo UNA SOLA VEZ)
-excel_instance = Excel()
-
-# Cargar datos de COMPONENT
-print("[INFO] Seleccione el archivo Excel...")
-print("[INFO] Cargando hoja '{}'...".format(sheet_name))
-excel_rows = excel_instance.read_excel(sheet_name)
-headers = excel_instance.get_headers(excel_rows, 2)
-headers_required = excel_instance.headers_required(headers, columns_headers)
-data_list = excel_instance.get_data_by_headers_required(excel_rows, headers_required, 3)
+# ==== ESPERAR LA CARGA DEL EXCEL (normalmente ya terminó durante la selección) ====
+print("\n[INFO] Esperando datos de la matriz '{}'...".format(sheet_name))
+data_list, space_data = prefetch.result()
+print("[INFO] Matriz leída en segundo plano en {:.2f} s".format(prefetch.segundos))
+print(excel_instance.resumen_tiempos())
 
 if not data_list:
     forms.alert("No se pudieron cargar los datos del Excel.", exitscript=True)
 
 print("[OK] Excel cargado: {} registros de COMPONENT disponibles".format(len(data_list)))
 
-# Crear diccionario de códigos para COMPONENT
-dict_codigos = {}
-for row in data_list:
-    code = row["CODIGO"]
-    dict_codigos[code] = row
-
-# Cargar datos de SPACE (del mismo archivo Excel ya abierto - NO PEDIRÁ EL ARCHIVO DE NUEVO)
-print("[INFO] Cargando hoja 'ESTANDAR COBie SPACE' del mismo archivo...")
-space_rows = excel_instance.read_excel('ESTANDAR COBie SPACE ')
-if not space_rows:
-    forms.alert("No se encontró hoja de Excel 'ESTANDAR COBie SPACE'.", exitscript=True)
-
-space_headers = excel_instance.get_headers(space_rows, 2)
-space_headers_required = excel_instance.headers_required(space_headers, columns_space)
-space_data = excel_instance.get_data_by_headers_required(space_rows, space_headers_required, 3)
-
 if not space_data:
-    forms.alert("No se pudieron cargar los datos de SPACE del Excel.", exitscript=True)
-
-# Crear diccionario de SPACE
-dict_space = {}
-for row in space_data:
-    code = row.get("COBie.Space.Name")
-    if code:
-        code_clean = str(code).strip()
-        dict_space[code_clean] = row
+    forms.alert("No se pudieron cargar los datos de la hoja 'ESTANDAR COBie SPACE' del Excel.", exitscript=True)
 
-print("[OK] Datos de SPACE cargados: {} registros disponibles".format(len(dict_space)))
+print("[OK] Datos de SPACE cargados: {} registros disponibles".format(len(space_data.claves("COBie.Space.Name"))))
 
 # ==== PRE-COMPUTAR valores que se necesitarán (OPTIMIZACIÓN) ====
 SPECIALTY_USES_PARTIDA2 = specialty in ["INSTALACIONES SANITARIAS", "COMUNICACIONES"]
@@ -265,193 +191,117 @@ if SPECIALTY_USES_PARTIDA2:
 else:
     DESCRIPCION_PARAMS = ["S&P_DESCRIPCION PARTIDA N°1"]
 
-# Set de niveles de techo
-NIVELES_TECHO = {"TECHO", "Techo", "techo", "Cubierta", "CUBIERTA", "cubierta"}
-
-# ==== Contadores para estadísticas ====
-count = 0
-stats = {
-    "InstallationDate": 0,
-    "Description": 0,
-    "SerialNumber": 0,
-    "Name": 0,
-    "CreatedOn": 0,
-    "CreatedBy": 0,
-    "WarrantyStartDate": 0,
-    "TagNumber": 0,
-    "BarCode": 0,
-    "AssetIdentifier": 0
-}
-elementos_sin_codigo = 0
-elementos_ignorados = 0
-errores = []
+# ==== Parámetros por GUID: se resuelven una vez por documento (OPTIMIZACIÓN) ====
+PARAMETROS_ELEMENTO = PARAMETROS_CONTROL_COMPONENT + [
+    "COBie.Component.InstallationDate",
+    "COBie.Component.Description",
+    "COBie.Component.SerialNumber",
+    "COBie.Component.Name",
+    "COBie.CreatedOn",
+    "COBie.CreatedBy",
+    "COBie.Component.WarrantyStartDate",
+    "COBie.Component.TagNumber",
+    "COBie.Component.BarCode",
+    "COBie.Component.AssetIdentifier",
+    "Classification.Uniclass.Pr.Number",
+] + DESCRIPCION_PARAMS
+
+resolver = resolver_parametros(doc)
+parametros_faltantes, parametros_duplicados = resolver.verificar(PARAMETROS_ELEMENTO)
+for nombre in parametros_faltantes:
+    print("[WARN] '{}' no es un parámetro compartido del modelo; se buscará por nombre".format(nombre))
+for nombre in parametros_duplicados:
+    print("[WARN] '{}' tiene más de un parámetro compartido con ese nombre; se buscará por nombre".format(nombre))
 
 print("\nIniciando procesamiento de elementos...")
 print("-"*70)
 
-# ==== CACHE DE TIPOS (OPTIMIZACIÓN) ====
-type_cache = {}
-
-def get_type_cached(type_id):
-    """Obtiene tipo desde cache para evitar llamadas repetidas a GetElement"""
-    if type_id not in type_cache:
-        type_cache[type_id] = doc.GetElement(type_id)
-    return type_cache[type_id]
-
-with revit.Transaction("Transfiere datos a Parametros COBieComponent"):
-
-    for reference in references:
-        element_object = doc.GetElement(reference)
-        elementos_a_procesar = [element_object]
-
-        if isinstance(element_object, FamilyInstance):
-            try:
-                sub_ids = element_object.GetSubComponentIds()
-                if sub_ids:
-                    for sid in sub_ids:
-                        sub_elem = doc.GetElement(sid)
-                        if sub_elem:
-                            elementos_a_procesar.append(sub_elem)
-            except:
-                pass
-
-        for elem in elementos_a_procesar:
-            # Verificar COBie primero (rápido)
-            cobie = elem.LookupParameter("COBie")
-            if not (cobie and not cobie.IsReadOnly and cobie.StorageType == StorageType.Integer and cobie.AsInteger() == 1):
-                elementos_ignorados += 1
-                continue
-            
-            # ==== OBTENER PARÁMETROS UNA SOLA VEZ (OPTIMIZACIÓN) ====
-            param_nivel = getParameter(elem, "S&P_NIVEL DE ELEMENTO")
-            param_zonificacion = getParameter(elem, "S&P_ZONIFICACION")
-            param_codigo = getParameter(elem, "S&P_CODIGO DE ELEMENTO")
-            param_cobie_space = getParameter(elem, "COBie.Component.Space")
-            
-            # Parámetros COBie (obtener referencias, no valores)
-            param_installation_date = elem.LookupParameter("COBie.Component.InstallationDate")
-            param_description = elem.LookupParameter("COBie.Component.Description")
-            param_serial = elem.LookupParameter("COBie.Component.SerialNumber")
-            param_name = elem.LookupParameter("COBie.Component.Name")
-            param_created_on = elem.LookupParameter("COBie.CreatedOn")
-            param_created_by = elem.LookupParameter("COBie.CreatedBy")
-            param_warranty = elem.LookupParameter("COBie.Component.WarrantyStartDate")
-            param_tag = elem.LookupParameter("COBie.Component.TagNumber")
-            param_barcode = elem.LookupParameter("COBie.Component.BarCode")
-            param_asset = elem.LookupParameter("COBie.Component.AssetIdentifier")
-            
-            # ==== OBTENER VALORES ====
-            level_param_value = get_param_value(param_nivel)
-            level = "RF" if level_param_value in NIVELES_TECHO else divide_string(level_param_value, 1)
-            
-            elem_category_object = elem.Category
-            name_category = elem_category_object.Name if elem_category_object else "Sin categoria"
-            
-            id_elem = elem.Id.IntegerValue
-            
-            # Obtener tipo (usando cache)
-            element_type_object_id = elem.GetTypeId()
-            if element_type_object_id == ElementId.InvalidElementId:
-                errores.append("Elemento ID {} sin tipo asociado".format(id_elem))
-                continue
-            
-            el_type_object = get_type_cached(element_type_object_id)
-            param_object_type = GetParameterAPI(el_type_object, BuiltInParameter.SYMBOL_NAME_PARAM)
-            name_type = get_param_value(param_object_type)
-            pr_number = get_param_value(getParameter(el_type_object, "Classification.Uniclass.Pr.Number"))
-
-            family_name = el_type_object.FamilyName if isinstance(el_type_object, ElementType) else "Sin familia"
-
-            zonification_value = get_param_value(param_zonificacion)
-            mbr_value = divide_string(zonification_value, 1, compare="sitio", value_default="000")
-            
-            # ==== Obtenemos el ambiente (optimizado - pasa valor directamente) ====
-            cobie_space_value = get_param_value(param_cobie_space)
-            tag_number = get_roomtag_from_cobie_space(cobie_space_value, dict_space)
-            
-            code_elem = get_param_value(param_codigo)
-            if code_elem in (None, "", "n/a"):
-                elementos_sin_codigo += 1
-                code_elem = ""
-            
-            # ==== CONVERSION DE FECHA DEL EXCEL ====
-            if code_elem and code_elem in dict_codigos:
-                data_row = dict_codigos[code_elem]
-                
-                if "COBie.Component.InstallationDate" in data_row:
-                    fecha_excel = data_row["COBie.Component.InstallationDate"]
-                    
-                    if fecha_excel and fecha_excel not in ("", "n/a", None):
-                        try:
-                            if isinstance(fecha_excel, (int, float)):
-                                fecha_base = datetime(1899, 12, 30)
-                                fecha_convertida = fecha_base + timedelta(days=float(fecha_excel))
-                                fecha_formateada = fecha_convertida.strftime("%Y-%m-%d")
-                            elif hasattr(fecha_excel, 'strftime'):
-                                fecha_formateada = fecha_excel.strftime("%Y-%m-%d")
-                            else:
-                                fecha_formateada = str(fecha_excel)
-                            
-                            if asignar_parametro_seguro(param_installation_date, fecha_formateada):
-                                stats["InstallationDate"] += 1
-                        except Exception as e:
-                            errores.append("Elemento {}: Error en fecha - {}".format(id_elem, str(e)))
-                
-                # Description desde Excel
-                if "COBie.Component.Description" in data_row:
-                    desc_excel = data_row["COBie.Component.Description"]
-                    if desc_excel and str(desc_excel).strip().lower() not in ("", "n/a"):
-                        if asignar_parametro_seguro(param_description, str(desc_excel)):
-                            stats["Description"] += 1
-
-            # ==== SerialNumber ====
-            serial_number_value = "{} {}".format(code_elem, id_elem)
-            if asignar_parametro_seguro(param_serial, serial_number_value):
-                stats["SerialNumber"] += 1
-
-            # ==== Asignar parámetros restantes (usando referencias ya obtenidas) ====
-            name_value = "{} : {} : {} : {}".format(name_category, family_name, name_type, id_elem)
-            if asignar_parametro_seguro(param_name, name_value):
-                stats["Name"] += 1
-            
-            if asignar_parametro_seguro(param_created_on, CREATED_ON):
-                stats["CreatedOn"] += 1
-            
-            if asignar_parametro_seguro(param_created_by, created_by):
-                stats["CreatedBy"] += 1
-            
-            if asignar_parametro_seguro(param_warranty, warranty_start_date):
-                stats["WarrantyStartDate"] += 1
-            
-            if asignar_parametro_seguro(param_tag, tag_number):
-                stats["TagNumber"] += 1
-            
-            barcode_value = "{}{}".format(mbr_value, id_elem)
-            if asignar_parametro_seguro(param_barcode, barcode_value):
-                stats["BarCode"] += 1
-            
-            asset_value = "{}-ZZ-{}-{}-{}-{}".format(mbr_value, level, tag_number, pr_number, mbr_value+str(id_elem))
-            if asignar_parametro_seguro(param_asset, asset_value):
-                stats["AssetIdentifier"] += 1
-            
-            count += 1
+# ==== CACHE DE TIPOS (compartida, LRU por ElementId) ====
+cache = cache_elementos(doc)
+
+# ==== Lote de escrituras: cuenta por parámetro y omite los valores que no cambian ====
+lote = ParameterWriteBatch()
+transferencia = COBieComponentTransfer(resolver, cache, lote, data_list, space_data, sobrescribir=sobrescribir,
+                                       diferencias=diferencias, created_by=created_by,
+                                       warranty_start_date=warranty_start_date)
+
+# ==== Elementos a procesar: selección y sus subcomponentes (todos los niveles), sin repetir ====
+elementos_a_procesar = list(expandir_subcomponentes(doc, (doc.GetElement(r) for r in references)))
+
+# ==== COBie = 1 filtrado por Revit en el colector: los inactivos no se leen ni se reservan ====
+ids_cobie = set(e.Id.IntegerValue for e in elementos_cobie(doc, elementos_a_procesar, resolver=resolver))
+elementos_ignorados = len(elementos_a_procesar) - len(ids_cobie)
+elementos_a_procesar = [e for e in elementos_a_procesar if e.Id.IntegerValue in ids_cobie]
+
+# ==== Worksharing: se reservan en bloque y se descartan los elementos de otros usuarios ====
+reserva = reservar_elementos(doc, elementos_a_procesar)
+reserva.informe()
+elementos_a_procesar = reserva.disponibles
+
+# ==== Parámetros de control leídos en bloque (una sola pasada por los elementos) ====
+valores_control = transferencia.leer_control(doc, elementos_a_procesar)
+
+# Transacciones por bloques dentro de un grupo; el lote se aplica al final de cada bloque.
+# La clave de reanudación incluye si se sobrescribe o solo se llenan vacíos: una ejecución
+# cancelada en un modo no se reanuda en el otro
+modo_proceso = "diferencias" if modo_diferencias else "completo"
+modo_escritura = "sobrescribir" if sobrescribir else "vacios"
+with forms.ProgressBar(title="Transfiriendo datos COBie Component...", cancellable=True) as pb:
+    transaccion = ChunkedTransaction(doc, "Transfiere datos a Parametros COBieComponent",
+                                     cancelado=lambda: pb.cancelled, progreso=pb.update_progress,
+                                     reanudar="component|{}|{}|{}".format(sheet_name, modo_proceso, modo_escritura),
+                                     matriz=excel_instance.ruta_archivo)
+    pares_control = list(zip(elementos_a_procesar, valores_control))
+    clave_par = lambda par: par[0].Id.IntegerValue
+    ya_procesados = transaccion.progreso_anterior(pares_control, clave_par)
+    if ya_procesados:
+        reanudar = forms.alert("Una ejecución anterior sobre estos mismos elementos y con la misma matriz se "
+                               "interrumpió con {} elementos ya procesados.\n"
+                               "Si deshiciste esa ejecución, elige No.\n"
+                               "¿Reanudar desde donde quedó?".format(ya_procesados),
+                               yes=True, no=True)
+        if not reanudar:
+            transaccion.descartar_progreso()
+
+    transaccion.procesar(pares_control, transferencia.procesar, al_confirmar=lote.aplicar, clave=clave_par)
+print(transaccion.resumen())
+if transaccion.cancelado:
+    liberar_archivos()
+    forms.alert("Proceso cancelado: se conservan {} elementos ya procesados.\n"
+                "Vuelva a ejecutar el botón para reanudar.".format(transaccion.procesados + transaccion.omitidos),
+                exitscript=True)
+
+# Registrar la matriz aplicada para el próximo modo diferencias: solo si se sobrescribió
+# todo el modelo (o sus diferencias) sin excluir elementos por worksharing
+if modo_modelo or modo_diferencias:
+    if reserva.excluidos():
+        print("[WARN] {} elementos excluidos por worksharing: la matriz no se registra como aplicada "
+              "(el próximo modo diferencias no la tomará como base)".format(reserva.excluidos()))
+    else:
+        guardar_aplicada(doc, "component", sheet_name, instantanea(data_list, "CODIGO", COLUMNAS_MATRIZ_COMPONENT))
 
 # ==== RESUMEN DE PROCESAMIENTO ====
 print("\n" + "="*70)
 print("RESUMEN DE PROCESAMIENTO")
 print("="*70)
-print("Elementos procesados:          {}".format(count))
-print("Elementos ignorados (COBie=0): {}".format(elementos_ignorados))
+print("Elementos procesados:          {}".format(transferencia.procesados))
+print("Elementos ignorados (COBie=0): {}".format(elementos_ignorados + transferencia.ignorados))
+print("Excluidos (worksharing):       {}".format(reserva.excluidos()))
 print("")
 print("PARAMETROS ACTUALIZADOS:")
-for param_name, cantidad in sorted(stats.items()):
-    if cantidad > 0:
-        print("  - {:<25} {}".format(param_name + ":", cantidad))
-
-if elementos_sin_codigo > 0:
+for param_name, cantidad in sorted(lote.cambiados().items()):
+    print("  - {:<25} {}".format(param_name + ":", cantidad))
+print("Valores sin cambios (no escritos): {}".format(lote.total("sin_cambios")))
+print("Elementos modificados:         {}".format(len(lote.elementos_modificados)))
+print(cache.resumen())
+if lote.total("errores"):
+    print("Valores que no se pudieron escribir: {}".format(lote.total("errores")))
+
+if transferencia.sin_codigo > 0:
     print("\nADVERTENCIAS:")
-    print("  - Elementos sin codigo:      {} (ADVERTENCIA)".format(elementos_sin_codigo))
+    print("  - Elementos sin codigo:      {} (ADVERTENCIA)".format(transferencia.sin_codigo))
 
+errores = transferencia.errores
 if errores:
     print("\nERRORES ENCONTRADOS ({})".format(len(errores)))
     print("-"*70)
@@ -465,10 +315,13 @@ print("="*70 + "\n")
 
 # Mensaje final
 mensaje_final = "Procesamiento completado\n\n"
-mensaje_final += "Elementos procesados: {}\n".format(count)
+mensaje_final += "Elementos procesados: {}\n".format(transferencia.procesados)
 mensaje_final += "\nParametros actualizados:\n"
-for param_name, cantidad in sorted(stats.items()):
-    if cantidad > 0:
-        mensaje_final += "  {}: {}\n".format(param_name, cantidad)
+for param_name, cantidad in sorted(lote.cambiados().items()):
+    mensaje_final += "  {}: {}\n".format(param_name, cantidad)
+mensaje_final += "\nValores sin cambios: {}\n".format(lote.total("sin_cambios"))
+
+# La matriz ya no se consulta: se cierran los archivos abiertos de la sesión
+liberar_archivos()
 
 TaskDialog.Show("COBie Component", mensaje_final)
\ No newline at end of file
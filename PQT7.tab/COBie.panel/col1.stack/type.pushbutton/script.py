@@ -1,57 +1,34 @@
 # -*- coding: utf-8 -*-
 __title__ = "COBie Type"
 
-import re
-from Autodesk.Revit.DB import BuiltInParameter, StorageType, UnitUtils, UnitTypeId, FamilyInstance, ElementType, FilteredElementCollector, BuiltInCategory
 from Autodesk.Revit.UI import TaskDialog
 from pyrevit import script, revit, forms
-from Extensions._RevitAPI import getParameter, GetParameterAPI, SetParameter, get_param_value
+from Extensions._RevitAPI import elementos_por_codigo, resolver_parametros, ParameterWriteBatch, cache_elementos
+from Extensions._COBie import (COLUMNAS_MATRIZ_TYPE, TIPOS_MATRIZ_TYPE, MAPEO_TYPE, PARAMETROS_CALCULADOS_TYPE,
+                               COBieTypeTransfer, agrupar_por_tipo, parametros_estaticos_type)
+from Extensions._Transacciones import ChunkedTransaction
+from Extensions._Worksharing import reservar_elementos
 from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
 from DBRepositories.SpecialtiesRepository import SpecialtiesRepository
 from DBRepositories.SchoolRepository import ColegiosRepository
-from Helper._Excel import Excel
+from Helper._Excel import Excel, liberar_archivos
+from Helper._Prefetch import MatrixPrefetch
+from Helper._MatrixDiff import (instantanea, comparar, leer_aplicada, guardar_aplicada,
+                                 carpeta_aplicadas, AVISO_APLICADA_LOCAL)
 from Helper._HSpecialties import get_current_specialty
 
 nombre_archivo = obtener_nombre_archivo()
 if not validar_nombre(nombre_archivo):
     script.exit()
 
-parametros_cobie = [
-        "COBie.Type.Manufacturer",
-        "COBie.Type.ModelNumber",
-        "COBie.Type.WarrantyGuarantorParts",
-        "COBie.Type.WarrantyDurationParts",
-        "COBie.Type.WarrantyDurationLabor",
-        "COBie.Type.ReplacementCost",
-        "COBie.Type.ExpectedLife",
-        "COBie.Type.NominalLength",
-        "COBie.Type.NominalWidth",
-        "COBie.Type.NominalHeight",
-        "COBie.Type.Color",
-        "COBie.Type.Finish",
-        "COBie.Type.Constituents",
-        "COBie.Type.Description",  # Agregado aquí
-        "CODIGO"  # Columna identificadora
-    ]
-
-def extraer_medida(tipo_name):
-    """
-    Extrae el contenido que está dentro de paréntesis de un string
-    
-    Args:
-        tipo_name: String que contiene texto con paréntesis
-        
-    Returns:
-        String con el contenido dentro de paréntesis, o None si no encuentra
-    """
-    if not tipo_name:
-        return None
-    match = re.search(r'\(([^)]+)\)', tipo_name)
-    return match.group(1) if match else None
-
 uidoc = revit.uidoc
 doc = revit.doc
 
+# Los parámetros compartidos se leen por GUID, resuelto una sola vez por documento
+resolver = resolver_parametros(doc)
+# Los tipos se obtienen de una caché compartida: muchas instancias usan el mismo tipo
+cache = cache_elementos(doc)
+
 # ===== OBTENER ESPECIALIDAD USANDO EL HELPER CENTRALIZADO =====
 specialty_object = get_current_specialty(doc)
 
@@ -61,12 +38,7 @@ if not specialty_object:
                 "Verifique que el parámetro S&P_ESPECIALIDAD esté configurado correctamente.", 
                 exitscript=True)
 
-# Extraer los datos de la especialidad
 specialty = specialty_object.name
-sp_accesibility = specialty_object.accessibility_performance
-sp_code = specialty_object.code_perfomance
-sp_sustainability = specialty_object.sustainability
-sp_feature = specialty_object.feature
 
 print("Especialidad detectada: {}".format(specialty))
 
@@ -86,426 +58,210 @@ if school_object:
 if not created_by_value or not warranty_description_value:
     forms.alert("No se pudieron obtener los datos del colegio necesarios.", exitscript=True)
 
-# ==== Segun especialidad ====
-if specialty in ["ARQUITECTURA", "ESTRUCTURAS"]:
-    asset_type = "Semi-fixed"
-else:
-    asset_type = "Fixed"
-
-# ==== Datos estáticos ====
-CREATED_ON = "2025-08-04T11:59:30"
-DURATION_UNIT = "AÑO"
-SHAPE = "Poligonal"
-GRADE = "Grado Estándar"
-
-parameters_static = {
-    "COBie.Type.CreatedBy": created_by_value,
-    "COBie.Type.CreatedOn": CREATED_ON,
-    "COBie.Type.AssetType": asset_type,       
-    "COBie.Type.WarrantyGuarantorLabor": created_by_value,
-    "COBie.Type.WarrantyDurationUnit": DURATION_UNIT,
-    "COBie.Type.DurationUnit": DURATION_UNIT,
-    "COBie.Type.WarrantyDescription": warranty_description_value,
-    "COBie.Type.ModelReference": warranty_description_value,
-    "COBie.Type.Shape": SHAPE,
-    "COBie.Type.Grade": GRADE,
-    "COBie.Type.Features": sp_feature,
-    "COBie.Type.AccessibilityPerformance": sp_accesibility,
-    "COBie.Type.CodePerformance": sp_code,
-    "COBie.Type.SustainabilityPerformance": sp_sustainability,
+# ==== Datos estáticos (según colegio y especialidad) ====
+parameters_static = parametros_estaticos_type(created_by_value, warranty_description_value, specialty_object)
+
+# ==== Obtenemos la hoja excel de acuerdo a la especialidad ====
+specialty_to_sheet = {
+    "Arquitectura": "ESTANDAR COBIE  -AR",
+    "Instalaciones Sanitarias": "ESTANDAR COBIE  - PL",
+    "Instalaciones Electricas": "ESTANDAR COBIE  -EE",
+    "Instalaciones de Comunicacion": "ESTANDAR COBIE  - IICC",
+    "Instalaciones Mecanicas": "ESTANDAR COBIE  - ME"
 }
 
+sheet_name = specialty_to_sheet.get(specialty)
+if not sheet_name:
+    forms.alert("Especialidad '{}' no reconocida para cargar datos Excel.".format(specialty), exitscript=True)
+
 # ==== Opciones de procesamiento ====
+OPCION_MODELO = "Sobreescribir en todo el modelo"
+OPCION_DIFERENCIAS = "Solo códigos modificados en la matriz"
+
 opciones = [
     "Sobreescribir todos los parámetros",
+    OPCION_MODELO,
     "Solo llenar parámetros vacíos",
     "Cancelar"
 ]
 
+# El modo diferencias solo se ofrece si ya se aplicó la matriz de esta hoja a todo el modelo
+matriz_aplicada = leer_aplicada(doc, "type", sheet_name)
+mensaje_opciones = "¿Cómo deseas manejar los parámetros que ya tienen información?"
+if matriz_aplicada:
+    opciones.insert(3, OPCION_DIFERENCIAS)
+    if carpeta_aplicadas(doc) is None:
+        mensaje_opciones += AVISO_APLICADA_LOCAL
+
 opcion_seleccionada = forms.CommandSwitchWindow.show(
     opciones,
-    message="¿Cómo deseas manejar los parámetros que ya tienen información?"
+    message=mensaje_opciones
 )
 
 if not opcion_seleccionada or opcion_seleccionada == "Cancelar":
     script.exit()
 
-modo_sobreescribir = (opcion_seleccionada == "Sobreescribir todos los parámetros")
+modo_diferencias = (opcion_seleccionada == OPCION_DIFERENCIAS)
+modo_modelo = (opcion_seleccionada == OPCION_MODELO)
+modo_sobreescribir = modo_diferencias or modo_modelo or (opcion_seleccionada == "Sobreescribir todos los parámetros")
+
+# ==== Elegir la matriz y cargarla en segundo plano mientras se seleccionan elementos ====
+excel_instance = Excel()
+excel_instance.select_file()
+prefetch = MatrixPrefetch(excel_instance.read_table, sheet_name, COLUMNAS_MATRIZ_TYPE, 2, 3, indices=["CODIGO"], tipos=TIPOS_MATRIZ_TYPE)
 
 # ==== Selección y preparación ====
-try:
-    selection = uidoc.Selection.PickElementsByRectangle()
+diferencias = None
+if modo_diferencias:
+    # Se comparan la matriz actual y la última aplicada; solo se procesan los
+    # elementos del modelo cuyo código tiene filas nuevas o modificadas
+    data_list = prefetch.result()
+    diferencias = comparar(matriz_aplicada, instantanea(data_list, "CODIGO", COLUMNAS_MATRIZ_TYPE))
+    print("Diferencias con la última matriz aplicada:")
+    print(diferencias.resumen())
+    if not diferencias.codigos():
+        forms.alert("La matriz no tiene cambios respecto a la última aplicada.", exitscript=True)
+    selection = elementos_por_codigo(doc, diferencias.codigos())
     if not selection:
-        forms.alert("No se seleccionaron elementos.", exitscript=True)
-except Exception as e:
-    forms.alert("No se seleccionaron elementos o se produjo un error:\n\n" + str(e), exitscript=True)
-
-# ==== Obtenemos la hoja excel de acuerdo a la especialidad ====
-data_list = None
-
-if specialty == "Arquitectura":
-    excel_instance = Excel()
-    excel_rows = excel_instance.read_excel('ESTANDAR COBIE  -AR')
-    headers = excel_instance.get_headers(excel_rows, 2)
-    headers_required = excel_instance.headers_required(headers, parametros_cobie)
-    data_list = excel_instance.get_data_by_headers_required(excel_rows, headers_required, 3)
-    print("Datos de Arquitectura cargados:", len(data_list), "filas")
-
-elif specialty == "Instalaciones Sanitarias":
-    excel_instance = Excel()
-    excel_rows = excel_instance.read_excel('ESTANDAR COBIE  - PL')
-    headers = excel_instance.get_headers(excel_rows, 2)
-    headers_required = excel_instance.headers_required(headers, parametros_cobie)
-    data_list = excel_instance.get_data_by_headers_required(excel_rows, headers_required, 3)
-    print("Datos de Sanitarias cargados:", len(data_list), "filas")
-
-elif specialty == "Instalaciones Electricas":
-    excel_instance = Excel()
-    excel_rows = excel_instance.read_excel('ESTANDAR COBIE  -EE')
-    headers = excel_instance.get_headers(excel_rows, 2)
-    headers_required = excel_instance.headers_required(headers, parametros_cobie)
-    data_list = excel_instance.get_data_by_headers_required(excel_rows, headers_required, 3)
-    print("Datos de Eléctricas cargados:", len(data_list), "filas")
-
-elif specialty == "Instalaciones de Comunicacion":
-    excel_instance = Excel()
-    excel_rows = excel_instance.read_excel('ESTANDAR COBIE  - IICC')
-    headers = excel_instance.get_headers(excel_rows, 2)
-    headers_required = excel_instance.headers_required(headers, parametros_cobie)
-    data_list = excel_instance.get_data_by_headers_required(excel_rows, headers_required, 3)
-    print("Datos de Comunicaciones cargados:", len(data_list), "filas")
-
-elif specialty == "Instalaciones Mecanicas":
-    excel_instance = Excel()
-    excel_rows = excel_instance.read_excel('ESTANDAR COBIE  - ME')
-    headers = excel_instance.get_headers(excel_rows, 2)
-    headers_required = excel_instance.headers_required(headers, parametros_cobie)
-    data_list = excel_instance.get_data_by_headers_required(excel_rows, headers_required, 3)
-    print("Datos de Mecánicas cargados:", len(data_list), "filas")
-
+        forms.alert("Ningún elemento del modelo usa los códigos modificados.", exitscript=True)
+elif modo_modelo:
+    # Todos los elementos del modelo con un código de la matriz
+    data_list = prefetch.result()
+    selection = elementos_por_codigo(doc, set(instantanea(data_list, "CODIGO", COLUMNAS_MATRIZ_TYPE)["filas"]))
+    if not selection:
+        forms.alert("Ningún elemento del modelo usa los códigos de la matriz.", exitscript=True)
 else:
-    forms.alert("Especialidad '{}' no reconocida para cargar datos Excel.".format(specialty), exitscript=True)
+    try:
+        selection = uidoc.Selection.PickElementsByRectangle()
+        if not selection:
+            forms.alert("No se seleccionaron elementos.", exitscript=True)
+    except Exception as e:
+        forms.alert("No se seleccionaron elementos o se produjo un error:\n\n" + str(e), exitscript=True)
+
+data_list = prefetch.result()
+columnas_faltantes = excel_instance.columnas_faltantes
+print("Datos de {} cargados: {} filas ({:.2f} s en segundo plano)".format(specialty, len(data_list), prefetch.segundos))
 
 if not data_list:
     forms.alert("No se pudieron cargar los datos del Excel.", exitscript=True)
 
-# Función para verificar si un parámetro está vacío
-def parametro_esta_vacio(element, param_name):
-    """
-    Verifica si un parámetro está vacío o no tiene valor
-    
-    Args:
-        element: Elemento de Revit
-        param_name: Nombre del parámetro
-        
-    Returns:
-        True si el parámetro está vacío, False si tiene valor
-    """
-    try:
-        param = getParameter(element, param_name)
-        if not param or not param.HasValue:
-            return True
-        
-        # Verificar según el tipo de almacenamiento
-        if param.StorageType == StorageType.String:
-            valor = param.AsString()
-            return not valor or valor.strip() == ""
-        elif param.StorageType == StorageType.Double:
-            return param.AsDouble() == 0.0
-        elif param.StorageType == StorageType.Integer:
-            return param.AsInteger() == 0
-        else:
-            return True
-    except:
-        return True
-
-# ==== Función para buscar datos del Excel por código ====
-def buscar_datos_por_codigo(data_list, codigo_elemento):
-    """
-    Busca los datos del Excel que coincidan con el código del elemento.
-    
-    :param data_list: Lista de diccionarios con los datos del Excel.
-    :type data_list: list
-    :param codigo_elemento: Código del elemento de Revit.
-    :type codigo_elemento: str
-    :return: Diccionario con los datos encontrados o None si no encuentra.
-    :rtype: dict or None
-    """
-    if not data_list:
-        return None
-    
-    for row_data in data_list:
-        codigo_excel = row_data.get("CODIGO")
-        if codigo_excel and str(codigo_excel).strip() == str(codigo_elemento).strip():
-            return row_data
-    
-    return None
-
-# ==== Mapeo de parámetros Excel -> Revit ====
-param_mapping = {
-    "COBie.Type.Manufacturer": "COBie.Type.Manufacturer",
-    "COBie.Type.ModelNumber": "COBie.Type.ModelNumber",
-    "COBie.Type.WarrantyGuarantorParts": "COBie.Type.WarrantyGuarantorParts",
-    "COBie.Type.WarrantyDurationParts": "COBie.Type.WarrantyDurationParts",
-    "COBie.Type.WarrantyDurationLabor": "COBie.Type.WarrantyDurationLabor",
-    "COBie.Type.ReplacementCost": "COBie.Type.ReplacementCost",
-    "COBie.Type.ExpectedLife": "COBie.Type.ExpectedLife",
-    "COBie.Type.NominalLength": "COBie.Type.NominalLength",
-    "COBie.Type.NominalWidth": "COBie.Type.NominalWidth",
-    "COBie.Type.NominalHeight": "COBie.Type.NominalHeight",
-    "COBie.Type.Color": "COBie.Type.Color",
-    "COBie.Type.Finish": "COBie.Type.Finish",
-    "COBie.Type.Constituents": "COBie.Type.Constituents",
-    "COBie.Type.Description": "COBie.Type.Description"  # Agregado aquí
-}
+# ==== Avisar de antemano los parámetros que no se pueden leer por GUID ====
+parametros_usados = list(MAPEO_TYPE.values()) + list(parameters_static.keys()) + PARAMETROS_CALCULADOS_TYPE + [
+    "S&P_CODIGO DE ELEMENTO", "COBie.Type", "S&P_MATERIAL DE ELEMENTO",
+    "Classification.Uniclass.Pr.Number", "Classification.Uniclass.Pr.Description",
+]
+parametros_faltantes, parametros_duplicados = resolver.verificar(parametros_usados)
+for nombre in parametros_faltantes:
+    print("Aviso: '{}' no es un parámetro compartido del modelo; se buscará por nombre".format(nombre))
+for nombre in parametros_duplicados:
+    print("Aviso: '{}' tiene más de un parámetro compartido con ese nombre; se buscará por nombre".format(nombre))
 
 # ==== Procesamiento: Instancia → Tipo ====
-# Diccionario para almacenar: {type_id: {codigo, element_type, instancias}}
-element_types_data = {}
-
-for element in selection:
-    # ==== Obtener código de la INSTANCIA ====
-    codigo_elemento = None
-    param_codigo = getParameter(element, "S&P_CODIGO DE ELEMENTO")
-    if param_codigo and param_codigo.HasValue:
-        codigo_elemento = param_codigo.AsString()
-    
-    if not codigo_elemento or not codigo_elemento.strip():
-        continue
-    
-    # ==== Obtener el TIPO del elemento ====
-    type_elem = doc.GetElement(element.GetTypeId())
-    if not type_elem:
-        print("No se pudo obtener el tipo para instancia {}".format(element.Id))
-        continue
-    
-    type_id = type_elem.Id.IntegerValue
-    
-    # Almacenar o actualizar información del tipo
-    if type_id not in element_types_data:
-        element_types_data[type_id] = {
-            "codigo": codigo_elemento,
-            "element_type": type_elem,
-            "instancias": []
-        }
-    
-    element_types_data[type_id]["instancias"].append(element.Id)
-    
-    # Procesar subcomponentes si es FamilyInstance
-    if isinstance(element, FamilyInstance):
-        try:
-            for sc_id in element.GetSubComponentIds():
-                sub = doc.GetElement(sc_id)
-                if sub:
-                    type_sub = doc.GetElement(sub.GetTypeId())
-                    if type_sub:
-                        sub_type_id = type_sub.Id.IntegerValue
-                        if sub_type_id not in element_types_data:
-                            element_types_data[sub_type_id] = {
-                                "codigo": codigo_elemento,  # Usar el mismo código de la instancia padre
-                                "element_type": type_sub,
-                                "instancias": []
-                            }
-                        element_types_data[sub_type_id]["instancias"].append(sub.Id)
-        except Exception as e:
-            print("Error procesando subcomponentes de {}: {}".format(element.Id, str(e)))
+# {type_id: {codigo, element_type, instancias}}; los subcomponentes usan el código de su padre
+element_types_data = agrupar_por_tipo(doc, selection, resolver, cache)
+
+# ==== Worksharing: se reservan en bloque los tipos y se descartan los de otros usuarios ====
+reserva = reservar_elementos(doc, [t["element_type"] for t in element_types_data.values()])
+reserva.informe()
+for type_id in [k for k, t in element_types_data.items() if not reserva.editable(t["element_type"].Id)]:
+    del element_types_data[type_id]
 
 if not element_types_data:
     forms.alert("No se encontraron elementos válidos con códigos.", exitscript=True)
 
 print("Elementos agrupados por tipo:", len(element_types_data))
 
-# ==== Proceso COBie.Type con datos del Excel ====
-conteo = 0
-elementos_omitidos = 0
-codigos_no_encontrados = []
+# Con un snapshot SQLite solo se consultan las filas de los códigos seleccionados
+data_list.precargar("CODIGO", [t["codigo"] for t in element_types_data.values()])
 
-# Preparar datos para transaction en masa
-elementos_a_procesar = []
+# ==== Proceso COBie.Type con datos del Excel ====
+# Lote de escrituras: solo se escriben los valores que cambian
+lote = ParameterWriteBatch()
+transferencia = COBieTypeTransfer(resolver, data_list, lote, parameters_static, sobrescribir=modo_sobreescribir,
+                                  diferencias=diferencias, columnas_faltantes=columnas_faltantes)
 
 # Fase 1: Preparación de datos sin transaction
 print("Preparando datos para procesamiento en masa...")
 
+elementos_a_procesar = []
 current_step = 0
 total_types = len(element_types_data)
 
 for type_id, type_data in element_types_data.items():
-    element_type = type_data["element_type"]
-    codigo_elemento = type_data["codigo"]
-    instancias = type_data["instancias"]
-    
     # Mostrar progreso cada 10 elementos
     current_step += 1
     if current_step % 10 == 0 or current_step == total_types:
         print("Preparando: {} de {}".format(current_step, total_types))
     
-    # Verificar si el elemento debe procesarse
-    param_cobie_type = getParameter(element_type, "COBie.Type")
-    if not (param_cobie_type and param_cobie_type.StorageType == StorageType.Integer and param_cobie_type.AsInteger() == 1):
-        elementos_omitidos += 1
-        continue
-    
-    try:
-        # ==== Buscar datos en Excel ====
-        datos_excel = buscar_datos_por_codigo(data_list, codigo_elemento)
-        
-        if not datos_excel:
-            if codigo_elemento not in codigos_no_encontrados:
-                codigos_no_encontrados.append(codigo_elemento)
-                print("No se encontraron datos en Excel para código: {}".format(codigo_elemento))
-            elementos_omitidos += 1
-            continue
-        
-        # ==== Preparar datos del elemento tipo ====
-        category_object = element_type.Category
-        category_name = category_object.Name if category_object else "Sin Categoría"
-        
-        fam_name = "Sin Familia"
-        if isinstance(element_type, ElementType):
-            fam_name = element_type.FamilyName
-        
-        param_name_value = "Sin Nombre"
-        object_param_name = GetParameterAPI(element_type, BuiltInParameter.SYMBOL_NAME_PARAM)
-        if object_param_name:
-            param_name_value = object_param_name.AsString() or "Sin Nombre"
-        
-        param_name_material = "Sin Material"
-        object_param_material = getParameter(element_type, "S&P_MATERIAL DE ELEMENTO")
-        if object_param_material and object_param_material.HasValue:
-            param_name_material = object_param_material.AsString() or "Sin Material"
-        
-        medidas = extraer_medida(param_name_value)
-        
-        param_pr_number = getParameter(element_type, "Classification.Uniclass.Pr.Number")
-        param_pr_desc = getParameter(element_type, "Classification.Uniclass.Pr.Description")
-        
-        pr_number = ""
-        pr_desc = ""
-        if param_pr_number and param_pr_number.HasValue:
-            pr_number = param_pr_number.AsString() or ""
-        if param_pr_desc and param_pr_desc.HasValue:
-            pr_desc = param_pr_desc.AsString() or ""
-
-        # ==== Parámetros compartidos (base) ====
-        parameters_shared = {
-            "COBie.Type.Name": "{} : {} : {}".format(category_name, fam_name, param_name_value),
-            "COBie.Type.Category": "{} : {}".format(pr_number, pr_desc),
-            "COBie.Type.Size": medidas,
-            "COBie.Type.Material": param_name_material
-        }
-
-        # ==== Agregar parámetros estáticos ====
-        parameters_shared.update(parameters_static)
-        
-        # ==== Agregar parámetros del Excel ====
-        for excel_param, revit_param in param_mapping.items():
-            if excel_param in datos_excel and datos_excel[excel_param] is not None:
-                valor_excel = datos_excel[excel_param]
-                
-                # Parámetros de longitud - convertir de metros a unidades internas de Revit
-                if excel_param in ["COBie.Type.NominalLength",
-                                   "COBie.Type.NominalWidth", 
-                                   "COBie.Type.NominalHeight"]:
-                    try:
-                        if str(valor_excel).strip() != "":
-                            valor_metros = float(valor_excel)
-                            valor_excel = UnitUtils.ConvertToInternalUnits(valor_metros, UnitTypeId.Meters)
-                        else:
-                            valor_excel = 0
-                    except (ValueError, TypeError):
-                        valor_excel = 0
-                
-                elif excel_param == "COBie.Type.ReplacementCost":
-                    try:
-                        if str(valor_excel).strip() != "":
-                            valor_excel = float(valor_excel)
-                        else:
-                            valor_excel = None
-                    except (ValueError, TypeError):
-                        valor_excel = None
-                
-                # Todos los demás parámetros son texto
-                else:
-                    if str(valor_excel).strip() != "":
-                        valor_excel = str(valor_excel).strip()
-                    else:
-                        valor_excel = None
-                
-                if valor_excel is not None:
-                    parameters_shared[revit_param] = valor_excel
-
-        # Agregar elemento preparado a la lista
-        elementos_a_procesar.append({
-            "element_type": element_type,
-            "parameters": parameters_shared,
-            "codigo": codigo_elemento,
-            "instancias": len(instancias)
-        })
-        
-    except Exception as e:
-        print("Error preparando elemento tipo {}: {}".format(element_type.Id, str(e)))
-        elementos_omitidos += 1
+    elemento_data = transferencia.preparar(type_data["element_type"], type_data["codigo"], len(type_data["instancias"]))
+    if elemento_data is not None:
+        elementos_a_procesar.append(elemento_data)
 
 print("Elementos preparados para procesamiento: {}".format(len(elementos_a_procesar)))
 
 # Fase 2: Transaction en masa para aplicar parámetros
 print("Iniciando transaction en masa...")
 
-with revit.Transaction("Transferencia COBie Type Masiva"):
-    current_element = 0
-    total_elements = len(elementos_a_procesar)
-    
-    for elemento_data in elementos_a_procesar:
-        current_element += 1
-        if current_element % 10 == 0 or current_element == total_elements:
-            print("Aplicando: {} de {}".format(current_element, total_elements))
-        
-        element_type = elemento_data["element_type"]
-        parameters_shared = elemento_data["parameters"]
-        
-        try:
-            # ==== Aplicar todos los parámetros al TIPO ====
-            parametros_aplicados = 0
-            parametros_omitidos = 0
-            
-            for param_name, value in parameters_shared.items():
-                if value is not None:
-                    try:
-                        param = getParameter(element_type, param_name)
-                        if param:
-                            # Verificar si debemos aplicar el parámetro según el modo seleccionado
-                            debe_aplicar = modo_sobreescribir or parametro_esta_vacio(element_type, param_name)
-                            
-                            if debe_aplicar:
-                                SetParameter(param, value)
-                                parametros_aplicados += 1
-                            else:
-                                parametros_omitidos += 1
-                    except Exception as e:
-                        print("Error estableciendo parámetro {} en tipo {}: {}".format(
-                            param_name, element_type.Id, str(e)))
-
-            conteo += 1
-            if parametros_omitidos > 0:
-                print("Procesado tipo {} con código: {} ({} instancias) - Aplicados: {}, Omitidos: {}".format(
-                    element_type.Id, elemento_data["codigo"], elemento_data["instancias"], 
-                    parametros_aplicados, parametros_omitidos))
-            else:
-                print("Procesado tipo {} con código: {} ({} instancias) - Aplicados: {}".format(
-                    element_type.Id, elemento_data["codigo"], elemento_data["instancias"], parametros_aplicados))
-            
-        except Exception as e:
-            print("Error procesando elemento tipo {}: {}".format(element_type.Id, str(e)))
-            elementos_omitidos += 1
+current_element = 0
+total_elements = len(elementos_a_procesar)
+
+def procesar_tipo(elemento_data):
+    """Encola las escrituras de un tipo preparado (se aplican al confirmar cada bloque)."""
+    global current_element
+    current_element += 1
+    if current_element % 10 == 0 or current_element == total_elements:
+        print("Aplicando: {} de {}".format(current_element, total_elements))
+    transferencia.procesar(elemento_data)
+
+# Transacciones por bloques dentro de un grupo; el lote se aplica al final de cada bloque
+clave_tipo = lambda elemento_data: elemento_data["element_type"].Id.IntegerValue
+with forms.ProgressBar(title="Transfiriendo datos COBie Type...", cancellable=True) as pb:
+    transaccion = ChunkedTransaction(doc, "Transferencia COBie Type Masiva", tamano_bloque=200,
+                                     cancelado=lambda: pb.cancelled, progreso=pb.update_progress,
+                                     reanudar="type|{}|{}".format(sheet_name, opcion_seleccionada),
+                                     matriz=excel_instance.ruta_archivo)
+    ya_procesados = transaccion.progreso_anterior(elementos_a_procesar, clave_tipo)
+    if ya_procesados:
+        reanudar = forms.alert("Una ejecución anterior sobre estos mismos tipos y con la misma matriz se "
+                               "interrumpió con {} tipos ya procesados.\n"
+                               "Si deshiciste esa ejecución, elige No.\n"
+                               "¿Reanudar desde donde quedó?".format(ya_procesados),
+                               yes=True, no=True)
+        if not reanudar:
+            transaccion.descartar_progreso()
+    transaccion.procesar(elementos_a_procesar, procesar_tipo, al_confirmar=lote.aplicar, clave=clave_tipo)
+print(transaccion.resumen())
+if transaccion.cancelado:
+    liberar_archivos()
+    forms.alert("Proceso cancelado: se conservan {} tipos ya procesados.\n"
+                "Vuelva a ejecutar el botón para reanudar.".format(transaccion.procesados + transaccion.omitidos),
+                exitscript=True)
+
+# Registrar la matriz aplicada para el próximo modo diferencias: solo si se sobrescribió
+# todo el modelo (o sus diferencias) sin cancelar ni excluir tipos por worksharing
+if transaccion.completo and (modo_modelo or modo_diferencias) and not reserva.excluidos():
+    guardar_aplicada(doc, "type", sheet_name, instantanea(data_list, "CODIGO", COLUMNAS_MATRIZ_TYPE))
 
 # Mostrar resultados detallados
 total_tipos = len(element_types_data)
 mensaje = "Procesamiento completado:\n"
 mensaje += "• Modo: {}\n".format(opcion_seleccionada)
 mensaje += "• Total de tipos encontrados: {}\n".format(total_tipos)
-mensaje += "• Tipos procesados exitosamente: {}\n".format(conteo)
-mensaje += "• Tipos omitidos: {}\n".format(elementos_omitidos)
-if codigos_no_encontrados:
-    mensaje += "• Códigos no encontrados en Excel: {}\n".format(len(set(codigos_no_encontrados)))
+mensaje += "• Tipos procesados exitosamente: {}\n".format(transferencia.procesados)
+mensaje += "• Tipos omitidos: {}\n".format(transferencia.omitidos)
+mensaje += "• Tipos excluidos (worksharing): {}\n".format(reserva.excluidos())
+if transferencia.codigos_no_encontrados:
+    mensaje += "• Códigos no encontrados en Excel: {}\n".format(len(set(transferencia.codigos_no_encontrados)))
+mensaje += "• Tipos modificados: {}\n".format(len(lote.elementos_modificados))
+mensaje += "• Valores sin cambios (no escritos): {}\n".format(lote.total("sin_cambios"))
+if lote.total("errores"):
+    mensaje += "• Valores que no se pudieron escribir: {}\n".format(lote.total("errores"))
+
+print("Parámetros actualizados:")
+for param_name, cantidad in sorted(lote.cambiados().items()):
+    print("  - {}: {}".format(param_name, cantidad))
+
+# La matriz ya no se consulta: se cierran los archivos abiertos de la sesión
+liberar_archivos()
 
 TaskDialog.Show("Resultado del Proceso", mensaje)
\ No newline at end of file
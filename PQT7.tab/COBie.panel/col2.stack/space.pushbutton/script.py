@@ -26,8 +26,9 @@ from Autodesk.Revit.DB import (
 from collections import defaultdict
 from Extensions._RevitAPI import GetParameterAPI, getParameter, get_param_value
 from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
+from Extensions._Worksharing import reservar_elementos
 from Helper._Dictionary import get_formatted_string
-from Helper._Excel import Excel
+from Helper._Excel import Excel, liberar_archivos
 from DBRepositories.SchoolRepository import ColegiosRepository
 
 output = script.get_output()
@@ -88,6 +89,12 @@ rooms = list(
 )
 
 elementos = spaces + rooms
+
+# Worksharing: se reservan en bloque y se descartan los rooms/spaces de otros usuarios
+reserva = reservar_elementos(doc, elementos)
+reserva.informe(output)
+elementos = reserva.disponibles
+
 output.print_md("### 🔍 Iniciando transferencia COBie")
 output.print_md("- Rooms encontrados: **{}**".format(len(rooms)))
 output.print_md("- Spaces encontrados: **{}**".format(len(spaces)))
@@ -112,14 +119,10 @@ excel_instance = Excel()
 
 # Cargar datos de SPACE (del mismo archivo Excel ya abierto - NO PEDIRÁ EL ARCHIVO DE NUEVO)
 print("[INFO] Cargando hoja 'ESTANDAR COBie SPACE' del mismo archivo...")
-space_rows = excel_instance.read_excel('ESTANDAR COBie SPACE ')
-if not space_rows:
+space_data = excel_instance.read_table('ESTANDAR COBie SPACE ', columns_space, 2, 3, indices=["COBie.Space.Name"])
+if not space_data:
     forms.alert("No se encontró hoja de Excel 'ESTANDAR COBie SPACE'.", exitscript=True)
 
-space_headers = excel_instance.get_headers(space_rows, 2)
-space_headers_required = excel_instance.headers_required(space_headers, columns_space)
-space_data = excel_instance.get_data_by_headers_required(space_rows, space_headers_required, 3)
-
 print(space_data)
 
 with revit.Transaction("Transfiere datos a Parametros COBieSpace"):
@@ -142,10 +145,7 @@ with revit.Transaction("Transfiere datos a Parametros COBieSpace"):
         
         
         # 🟢 BÚSQUEDA: Buscar la fila en space_data donde la columna 'COBie.Space.Name' coincide con name_full
-        fila_excel = next((
-            row for row in space_data 
-            if row.get("COBie.Space.Name") == name_full
-        ), None) # Retorna el diccionario de la fila si lo encuentra, sino None
+        fila_excel = space_data.buscar("COBie.Space.Name", name_full) # Retorna el diccionario de la fila si lo encuentra, sino None
 
         
         if fila_excel:
@@ -248,4 +248,7 @@ output.print_md("- Elementos procesados (con mapping): **{}**".format(elementos_
 output.print_md("- Elementos omitidos (sin mapping): **{}**".format(elementos_omitidos))
 output.print_md("- Parámetros asignados correctamente: **{}**".format(asignados_ok))
 output.print_md("- Parámetros con error: **{}**".format(asignados_fail))
+# La matriz ya no se consulta: se cierran los archivos abiertos de la sesión
+liberar_archivos()
+
 output.print_md("✅ Proceso finalizado.")
\ No newline at end of file
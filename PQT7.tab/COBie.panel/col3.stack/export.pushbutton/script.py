@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+__title__ = "COBie\nExport"
+__doc__ = "Exporta los parámetros COBie.Type.* y COBie.Component.* del modelo a un xlsx con el formato de la matriz"
+
+import time
+from pyrevit import script, revit, forms
+from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
+from Extensions._RevitAPI import elementos_cobie
+from Extensions._COBie import ENCABEZADOS_EXPORT, COBieExport
+from Helper._HSpecialties import get_current_specialty
+from Helper._XlsxWriter import XlsxWriter, ArchivoEnUsoError
+
+nombre_archivo = obtener_nombre_archivo()
+if not validar_nombre(nombre_archivo):
+    script.exit()
+
+doc = revit.doc
+output = script.get_output()
+
+# En la matriz los encabezados están en la fila 3 y los datos desde la fila 4
+FILA_ENCABEZADOS = 2
+
+# ==== Nombre de hoja según la especialidad ====
+specialty_to_sheet = {
+    "Arquitectura": "ESTANDAR COBIE  -AR",
+    "Instalaciones Sanitarias": "ESTANDAR COBIE  - PL",
+    "Instalaciones Electricas": "ESTANDAR COBIE  -EE",
+    "Instalaciones de Comunicacion": "ESTANDAR COBIE  - IICC",
+    "Instalaciones Mecanicas": "ESTANDAR COBIE  - ME"
+}
+
+specialty_object = get_current_specialty(doc)
+specialty = specialty_object.name if specialty_object else None
+sheet_name = specialty_to_sheet.get(specialty, "ESTANDAR COBIE")
+
+
+# ==== Archivo de salida ====
+ruta_salida = forms.save_file(file_ext="xlsx", default_name="COBie {} - modelo".format(nombre_archivo))
+if not ruta_salida:
+    script.exit()
+
+# ==== Una sola pasada por el modelo, escribiendo cada fila al terminar de leerla ====
+inicio = time.time()
+exportacion = COBieExport(doc)
+
+try:
+    with XlsxWriter(ruta_salida) as libro:
+        libro.nueva_hoja(sheet_name)
+        libro.escribir_fila(["Exportación COBie del modelo {}".format(nombre_archivo)])
+        libro.saltar_filas(FILA_ENCABEZADOS - 1)
+        libro.escribir_fila(ENCABEZADOS_EXPORT)
+
+        # Solo los elementos con COBie = 1: el filtro se evalúa en el colector de Revit;
+        # los valores COBie.Type.* de cada tipo se leen una sola vez
+        exportacion.exportar(libro, elementos_cobie(doc))
+except ArchivoEnUsoError as e:
+    # El xlsx de destino está abierto (por ejemplo, en Excel): se avisa sin traceback
+    forms.alert(e.args[0], title="COBie Export", exitscript=True)
+
+segundos = time.time() - inicio
+
+# ==== Resumen ====
+output.print_md("## ✅ Exportación COBie completada")
+output.print_md("- **Archivo:** {}".format(ruta_salida))
+output.print_md("- **Hoja:** {}".format(sheet_name))
+output.print_md("- **Elementos exportados:** {}".format(exportacion.exportados))
+output.print_md("- **Tipos distintos:** {}".format(len(exportacion.valores_tipo)))
+output.print_md("- **Elementos sin código:** {}".format(exportacion.sin_codigo))
+output.print_md("- **Tiempo:** {:.2f} s".format(segundos))
@@ -4,12 +4,9 @@ __title__ = "Assign ID"
 # --- IMPORTS ---
 from Autodesk.Revit.UI.Selection import ObjectType
 from Autodesk.Revit.Exceptions import OperationCanceledException
-# Importamos WorksharingUtils y ElementId para el checkout
-from Autodesk.Revit.DB import WorksharingUtils, ElementId 
-# Importamos List de .NET para poder pasar la lista de IDs a Revit
-from System.Collections.Generic import List 
 
 from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
+from Extensions._Worksharing import reservar_elementos
 from pyrevit import revit, script
 
 doc, uidoc = revit.doc, revit.uidoc
@@ -45,29 +42,19 @@ except:
     # Si falló, es Revit 2023 o anterior
     get_id_val = lambda elem_id: elem_id.IntegerValue
 
-# --- 4. PREPARACIÓN Y CHECKOUT (SOLUCIÓN AL POPUP) ---
-# Convertimos la selección a una lista .NET de ElementIds
-ids_para_procesar = List[ElementId]()
-for r in refs:
-    ids_para_procesar.Add(r.ElementId)
-
-# Si el modelo es colaborativo, hacemos Checkout explícito
-if doc.IsWorkshared:
-    try:
-        # Esto evita la ventana de "Desea aplicar checkout..."
-        WorksharingUtils.CheckoutElements(doc, ids_para_procesar)
-    except Exception as e:
-        # Si falla el checkout (ej. alguien más tiene el objeto), lo registramos pero seguimos
-        output.print_md("⚠️ **Advertencia de Worksharing:** Algunos elementos no se pudieron reservar. " + str(e))
+# --- 4. VERIFICACIÓN Y CHECKOUT (SOLUCIÓN AL POPUP) ---
+# En modelos colaborativos se reservan en bloque los elementos libres (evita la ventana
+# de "Desea aplicar checkout...") y se descartan los que pertenecen a otro usuario
+reserva = reservar_elementos(doc, [doc.GetElement(r.ElementId) for r in refs])
+reserva.informe(output)
 
 # --- 5. PROCESAMIENTO ---
 asignados = []
 faltantes = []
 
 with revit.Transaction("Asignar Element ID"):
-    # Iteramos sobre la lista de IDs que ya preparamos
-    for eid in ids_para_procesar:
-        e = doc.GetElement(eid)
+    # Iteramos sobre los elementos disponibles tras la verificación
+    for e in reserva.disponibles:
         p = e.LookupParameter(param_name)
         
         if p and not p.IsReadOnly:
@@ -6,6 +6,8 @@ from Autodesk.Revit.DB import (
     StorageType, RevitLinkInstance, FilteredElementCollector, BuiltInParameter, ElementId
 )
 from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
+from Extensions._Worksharing import reservar_elementos
+from Extensions._RevitAPI import cache_elementos, elementos_cobie
 from Extensions._utils import (
     obtener_mapeo_nombres_categorias,
     obtener_elementos_de_categorias,
@@ -18,6 +20,8 @@ from Extensions._utils import (
 
 doc = revit.doc
 output = script.get_output()
+# Niveles, tipos y documentos vinculados se consultan muchas veces: caché compartida
+cache = cache_elementos(doc)
 
 # Constantes
 TOLERANCIA_PIES = 0.410105  # 12.5 cm en pies
@@ -54,7 +58,7 @@ def obtener_nivel_z(elemento):
         if hasattr(elemento, 'LevelId'):
             nivel_id = elemento.LevelId
             if nivel_id and nivel_id != ElementId.InvalidElementId:
-                nivel = doc.GetElement(nivel_id)
+                nivel = cache.nivel(nivel_id)
                 if nivel:
                     return nivel.Elevation
         
@@ -78,7 +82,9 @@ def obtener_habitaciones_de_vinculos_transformadas(documento, nombres_vinculos):
     from Autodesk.Revit.DB import BuiltInCategory
     
     links = FilteredElementCollector(documento).OfClass(RevitLinkInstance).ToElements()
-    links_dict = {l.Name: l for l in links if l.GetLinkDocument() is not None}
+    # Si es el documento activo se reutiliza la caché de esta ejecución
+    cache_vinculos = cache if documento.Equals(doc) else cache_elementos(documento)
+    links_dict = {l.Name: l for l in links if cache_vinculos.documento_vinculo(l) is not None}
     
     habitaciones_transformadas = []
     
@@ -87,7 +93,7 @@ def obtener_habitaciones_de_vinculos_transformadas(documento, nombres_vinculos):
             continue
         
         link_instance = links_dict[nombre_vinculo]
-        link_doc = link_instance.GetLinkDocument()
+        link_doc = cache_vinculos.documento_vinculo(link_instance)
         transform = link_instance.GetTotalTransform()
         
         if not link_doc:
@@ -362,20 +368,6 @@ def procesar_puerta_ventana(elemento, habitaciones_transformadas, failed_list):
         return False
 
 
-def verificar_cobie_activo(elemento):
-    """
-    Verifica si el parámetro COBie (bool) está activado (True/Si/1).
-    Retorna True si está activado, False en caso contrario.
-    """
-    try:
-        prm_cobie_bool = elemento.LookupParameter(PARAM_COBIE_BOOL)
-        if prm_cobie_bool and prm_cobie_bool.StorageType == StorageType.Integer:
-            return prm_cobie_bool.AsInteger() == 1
-    except:
-        pass
-    return False
-
-
 def asignar_ambiente(elemento, nombre_ambiente, numero_ambiente, failed_list):
     """
     Asigna valores a los parámetros 'S&P_AMBIENTE' y 'COBie.Component.Space'.
@@ -598,7 +590,7 @@ def obtener_habitaciones(documento):
         )
     
     # Filtrar solo vínculos cargados
-    links_cargados = [l for l in links if l.GetLinkDocument() is not None]
+    links_cargados = [l for l in links if cache.documento_vinculo(l) is not None]
     
     if not links_cargados:
         forms.alert(
@@ -613,7 +605,7 @@ def obtener_habitaciones(documento):
     from Autodesk.Revit.DB import BuiltInCategory
     nom_links_info = []
     for link in links_cargados:
-        link_doc = link.GetLinkDocument()
+        link_doc = cache.documento_vinculo(link)
         if link_doc:
             try:
                 # Intentar con categoría por nombre
@@ -763,6 +755,14 @@ output.print_md("### Habitaciones disponibles: {}".format(len(habs)))
 elems = obtener_elementos_de_categorias(doc, sels_cats)
 output.print_md("### Elementos encontrados: {}".format(len(elems)))
 
+# Worksharing: se reservan en bloque y se descartan los elementos de otros usuarios
+reserva = reservar_elementos(doc, elems)
+reserva.informe(output)
+elems = reserva.disponibles
+
+# COBie activado (= 1): lo filtra Revit en el colector, sin leer el parámetro elemento por elemento
+ids_cobie_activo = set(e.Id.IntegerValue for e in elementos_cobie(doc, elems, PARAM_COBIE_BOOL))
+
 # Tracking
 elems_asignados = set()
 elems_ignorados_cobie = []
@@ -790,7 +790,7 @@ with revit.Transaction("Asignar Ambiente"):
                     continue
                 
                 # Verificar COBie activo
-                if not verificar_cobie_activo(e):
+                if e.Id.IntegerValue not in ids_cobie_activo:
                     elems_ignorados_cobie.append(e.Id)
                     continue
                 
@@ -809,7 +809,7 @@ with revit.Transaction("Asignar Ambiente"):
             continue
             
         # Verificar COBie activo
-        if not verificar_cobie_activo(e):
+        if e.Id.IntegerValue not in ids_cobie_activo:
             if e.Id not in elems_ignorados_cobie:
                 elems_ignorados_cobie.append(e.Id)
             continue
@@ -876,7 +876,7 @@ if asignados_fase3 > 0:
                 # Intentar obtener nombre del tipo
                 elem_name = ""
                 try:
-                    tipo = doc.GetElement(elem.GetTypeId())
+                    tipo = cache.tipo(elem)
                     if tipo:
                         elem_name = tipo.get_Parameter(BuiltInParameter.ALL_MODEL_TYPE_NAME).AsString()
                 except:
@@ -921,6 +921,8 @@ if failed_param:
         output.print_md("")
         output.print_md("*Mostrando 15 de {} elementos*".format(len(failed_param)))
 
+output.print_md("*{}*".format(cache.resumen()))
+
 # Mensaje final personalizado
 mensaje_final = "Proceso terminado:\n\n"
 mensaje_final += "✅ {} elementos asignados correctamente\n".format(asignados_fase1 + asignados_fase2 + asignados_especial)
@@ -1,20 +1,24 @@
 # -*- coding: utf-8 -*-
 __title__ = "Uniclass Transfer"
 __doc__ = """
-Version = 1.2
-Date = 22.09.2025
+Version = 1.3
+Date = 18.10.2026
 ------------------------------------------------------------------
 Description:
 Nos permitira unir parametros Uniclass en el ItemReference.
+Opcionalmente valida los números Pr/Ss contra la tabla Uniclass y completa
+las descripciones y el Ss faltante a partir del Pr.
 IMPORTANTE: Requiere que el parámetro 'ClassificationReference.ItemReference' 
 exista en los tipos de elemento.
 ------------------------------------------------------------------
 ¿Cómo hacerlo?
 -> Click en el boton
+-> Elegimos si validar contra la tabla Uniclass (y el Excel que la contiene)
 -> Seleccionamos los elementos de la vista
 -> Click en finalizar en la parte superior
 ------------------------------------------------------------------
 Última actualización:
+- [18.10.2026] - 1.3 UPDATE - Validación y completado con el índice Uniclass
 - [22.09.2025] - 1.2 UPDATE - Validación de parámetros y manejo de errores mejorado
 - [22.09.2025] - 1.1 UPDATE - New Feature
 ------------------------------------------------------------------
@@ -22,8 +26,12 @@ Autor: Paolo Perez
 """
 from pyrevit import forms, script, revit
 from Autodesk.Revit.UI.Selection import ObjectType
-from Autodesk.Revit.DB import ElementId, FamilyInstance
 from Extensions._Modulo import obtener_nombre_archivo, validar_nombre
+from Extensions._RevitAPI import cache_elementos, expandir_subcomponentes, resolver_parametros, ParameterWriteBatch
+from Extensions._Worksharing import reservar_elementos
+from Helper._Excel import Excel, liberar_archivos
+from Helper._Prefetch import MatrixPrefetch
+from Helper._UniclassIndex import cargar_indice
 
 nombre_archivo = obtener_nombre_archivo()
 if not validar_nombre(nombre_archivo):
@@ -31,6 +39,29 @@ if not validar_nombre(nombre_archivo):
 
 doc = revit.doc
 uidoc = revit.uidoc
+output = script.get_output()
+cache = cache_elementos(doc)
+# Parámetros compartidos leídos por GUID; las escrituras se juntan en un lote que solo
+# escribe los valores que cambian (en modelos colaborativos no marca tipos sin cambios)
+resolver = resolver_parametros(doc)
+lote = ParameterWriteBatch()
+
+# ==== Validación opcional contra la tabla Uniclass ====
+validar_uniclass = forms.alert(
+    "¿Deseas validar y completar la clasificación con la tabla Uniclass?\n\n"
+    "SI: Validar números Pr/Ss y completar descripciones y Ss faltantes\n"
+    "NO: Solo transferir a ItemReference",
+    title="Uniclass Transfer",
+    yes=True,
+    no=True
+)
+
+prefetch = None
+if validar_uniclass:
+    # El índice se construye en segundo plano mientras se seleccionan elementos
+    excel_instance = Excel(tipo="uniclass")
+    excel_instance.select_file()
+    prefetch = MatrixPrefetch(cargar_indice, excel_instance)
 
 # Selección de elementos
 try:
@@ -43,10 +74,68 @@ if not selected_refs:
 
 selected_elements = [doc.GetElement(ref) for ref in selected_refs]
 
+indice_uniclass = None
+if prefetch:
+    indice_uniclass = prefetch.result()
+    if indice_uniclass is None:
+        forms.alert("No se encontró una hoja con la tabla Uniclass en el Excel seleccionado.", exitscript=True)
+
 # Para evitar procesar el mismo tipo varias veces y contar correctamente
 tipos_procesados = set()
 tipos_exitosos = set()
 tipos_con_error = set()
+tipos_completados = set()
+numeros_invalidos = {}
+
+def leer_texto(elem_type, nombre, pendientes):
+    """Valor de texto del parámetro, considerando lo ya encolado en el lote para el tipo."""
+    if nombre in pendientes:
+        return pendientes[nombre]
+    param = resolver.parametro(elem_type, nombre)
+    return (param.AsString() or "") if param and param.HasValue else ""
+
+def completar_parametro(elem_type, nombre, valor, pendientes):
+    """Encola un valor para un parámetro vacío. Retorna True si se encoló."""
+    param = resolver.editable(elem_type, nombre)
+    if not param or not valor:
+        return False
+    if leer_texto(elem_type, nombre, pendientes).strip():
+        return False
+    if not lote.agregar(elem_type, param, valor, nombre):
+        return False
+    pendientes[nombre] = valor
+    return True
+
+def validar_clasificacion(elem_type, pendientes):
+    """
+    Valida los números Pr/Ss del tipo contra el índice Uniclass y completa los vacíos:
+    descripciones a partir del número y Ss a partir del Pr.
+    Los valores encolados quedan en pendientes ({nombre: valor}).
+    """
+    valores = {}
+    for sistema in ("Pr", "Ss"):
+        valores[sistema] = leer_texto(elem_type, "Classification.Uniclass.{}.Number".format(sistema), pendientes).strip()
+    
+    completado = False
+    if not valores["Ss"] and valores["Pr"]:
+        ss_inferido = indice_uniclass.ss_de_pr(valores["Pr"])
+        if completar_parametro(elem_type, "Classification.Uniclass.Ss.Number", ss_inferido, pendientes):
+            valores["Ss"] = ss_inferido
+            completado = True
+    
+    for sistema in ("Pr", "Ss"):
+        numero = valores[sistema]
+        if not numero:
+            continue
+        if numero not in indice_uniclass:
+            numeros_invalidos.setdefault(numero, set()).add(elem_type.Id)
+            continue
+        descripcion = indice_uniclass.descripcion(numero)
+        if completar_parametro(elem_type, "Classification.Uniclass.{}.Description".format(sistema), descripcion, pendientes):
+            completado = True
+    
+    if completado:
+        tipos_completados.add(elem_type.Id)
 
 def transferir_parametros(elem_type):
     if not elem_type or elem_type.Id in tipos_procesados:
@@ -54,10 +143,15 @@ def transferir_parametros(elem_type):
     
     tipos_procesados.add(elem_type.Id)
     
-    # Obtener los parámetros origen
-    param_number = elem_type.LookupParameter("Classification.Uniclass.Ss.Number")
-    param_description = elem_type.LookupParameter("Classification.Uniclass.Ss.Description")
-    param_destino = elem_type.LookupParameter("ClassificationReference.ItemReference")
+    # Valores completados con la tabla Uniclass (aún en el lote, sin escribir)
+    pendientes = {}
+    if indice_uniclass is not None:
+        try:
+            validar_clasificacion(elem_type, pendientes)
+        except Exception as e:
+            print("Error validando Uniclass del tipo {}: {}".format(elem_type.Id, e))
+    
+    param_destino = resolver.parametro(elem_type, "ClassificationReference.ItemReference")
     
     # Verificar si existe el parámetro destino
     if not param_destino:
@@ -69,9 +163,9 @@ def transferir_parametros(elem_type):
         tipos_con_error.add(elem_type.Id)
         return False
     
-    # Obtener valores (usar cadena vacía si no hay valor)
-    number_value = param_number.AsString() if param_number and param_number.HasValue else ""
-    description_value = param_description.AsString() if param_description and param_description.HasValue else ""
+    # Obtener valores origen (usar cadena vacía si no hay valor)
+    number_value = leer_texto(elem_type, "Classification.Uniclass.Ss.Number", pendientes)
+    description_value = leer_texto(elem_type, "Classification.Uniclass.Ss.Description", pendientes)
     
     # Verificar que al menos uno de los parámetros origen tenga valor
     if not number_value and not description_value:
@@ -88,30 +182,34 @@ def transferir_parametros(elem_type):
     else:
         combined_value = ""
     
-    try:
-        # Asignar el valor combinado al parámetro destino
-        param_destino.Set(combined_value)
+    # Encolar el valor combinado; solo se escribe si es distinto del actual
+    if lote.agregar(elem_type, param_destino, combined_value, "ClassificationReference.ItemReference"):
         tipos_exitosos.add(elem_type.Id)
         return True
-    except Exception as e:
-        tipos_con_error.add(elem_type.Id)
-        return False
+    tipos_con_error.add(elem_type.Id)
+    return False
 
 elementos_procesados = 0
 elementos_con_error = 0
 
+# Tipo de cada elemento y de sus subcomponentes (todos los niveles), sin repetir
+tipos_alcance = []
+ids_alcance = set()
+for elem in expandir_subcomponentes(doc, selected_elements):
+    elem_type = cache.tipo(elem)
+    if elem_type and elem_type.Id.IntegerValue not in ids_alcance:
+        ids_alcance.add(elem_type.Id.IntegerValue)
+        tipos_alcance.append(elem_type)
+
+# En modelos colaborativos se excluyen antes de la transacción los tipos que otro
+# usuario tiene tomados o que están desactualizados respecto del central
+reserva = reservar_elementos(doc, tipos_alcance)
+reserva.informe(output)
+
 with revit.Transaction("Transferir parámetros de tipo"):
-    for elem in selected_elements:
-        # Tipo principal del elemento
-        transferir_parametros(doc.GetElement(elem.GetTypeId()))
-        
-        # Verificar si el elemento es una instancia de familia (que puede tener subcomponentes)
-        if isinstance(elem, FamilyInstance):
-            sub_ids = elem.GetSubComponentIds()
-            for sid in sub_ids:
-                sub_elem = doc.GetElement(sid)
-                if sub_elem and sub_elem.GetTypeId() != ElementId.InvalidElementId:
-                    transferir_parametros(doc.GetElement(sub_elem.GetTypeId()))
+    for elem_type in reserva.disponibles:
+        transferir_parametros(elem_type)
+    lote.aplicar()
 
 # Mostrar resultado con conteo de tipos únicos
 total_tipos = len(tipos_procesados)
@@ -121,10 +219,24 @@ tipos_no_actualizados = len(tipos_con_error)
 mensaje = "RESULTADO DE LA TRANSFERENCIA:\n\n"
 mensaje += "Total de tipos únicos procesados: " + str(total_tipos) + "\n"
 mensaje += "Tipos actualizados exitosamente: " + str(tipos_actualizados) + "\n"
-mensaje += "Tipos que NO se pudieron actualizar: " + str(tipos_no_actualizados)
+mensaje += "Tipos que NO se pudieron actualizar: " + str(tipos_no_actualizados) + "\n"
+mensaje += "Tipos excluidos (worksharing): " + str(reserva.excluidos()) + "\n"
+mensaje += "Tipos modificados en el modelo: " + str(len(lote.elementos_modificados)) + "\n"
+mensaje += "Valores sin cambios (no escritos): " + str(lote.total("sin_cambios"))
+if lote.total("errores"):
+    mensaje += "\nValores que fallaron al escribirse: " + str(lote.total("errores"))
+
+if indice_uniclass is not None:
+    mensaje += "\nTipos completados con la tabla Uniclass: " + str(len(tipos_completados))
+    mensaje += "\nNúmeros Uniclass no encontrados en la tabla: " + str(len(numeros_invalidos))
+    for numero in sorted(numeros_invalidos):
+        print("Número Uniclass no válido: {} ({} tipos)".format(numero, len(numeros_invalidos[numero])))
 
 if tipos_no_actualizados > 0:
     mensaje += "\n\nNOTA: Los tipos no actualizados probablemente no tienen el parámetro"
     mensaje += "\n'ClassificationReference.ItemReference' o este es de solo lectura."
 
+# La matriz ya no se consulta: se cierran los archivos abiertos de la sesión
+liberar_archivos()
+
 forms.alert(mensaje, title="Resultado de Transferencia Uniclass")
\ No newline at end of file
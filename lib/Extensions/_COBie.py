@@ -0,0 +1,658 @@
+# -*- coding: utf-8 -*-
+"""
+Nucleo por elemento de los botones COBie Type, COBie Component y COBie Export.
+Cada boton conserva sus ventanas, la seleccion y los mensajes; aqui solo se decide que
+se escribe (o se exporta) de cada elemento. Asi el boton y offline/bench.py ejecutan
+exactamente el mismo codigo.
+"""
+
+import re
+
+from Autodesk.Revit.DB import BuiltInParameter, ElementId, ElementType, StorageType, UnitTypeId, UnitUtils
+from Extensions._RevitAPI import GetParameterAPI, get_param_value, leer_parametros, resolver_parametros, subcomponentes
+
+CREATED_ON = "2025-08-04T11:59:30"
+
+PARAMETRO_CODIGO = "S&P_CODIGO DE ELEMENTO"
+
+# ==== COBie Type ====
+COLUMNAS_MATRIZ_TYPE = [
+    "COBie.Type.Manufacturer",
+    "COBie.Type.ModelNumber",
+    "COBie.Type.WarrantyGuarantorParts",
+    "COBie.Type.WarrantyDurationParts",
+    "COBie.Type.WarrantyDurationLabor",
+    "COBie.Type.ReplacementCost",
+    "COBie.Type.ExpectedLife",
+    "COBie.Type.NominalLength",
+    "COBie.Type.NominalWidth",
+    "COBie.Type.NominalHeight",
+    "COBie.Type.Color",
+    "COBie.Type.Finish",
+    "COBie.Type.Constituents",
+    "COBie.Type.Description",
+    "CODIGO",  # Columna identificadora
+]
+
+# Tipo de cada columna: se convierte una sola vez al cargar la tabla
+# (longitudes de metros a unidades internas de Revit, costo a número y el resto a texto)
+TIPOS_MATRIZ_TYPE = dict((columna, "texto") for columna in COLUMNAS_MATRIZ_TYPE if columna != "CODIGO")
+TIPOS_MATRIZ_TYPE.update({
+    "COBie.Type.NominalLength": "metros",
+    "COBie.Type.NominalWidth": "metros",
+    "COBie.Type.NominalHeight": "metros",
+    "COBie.Type.ReplacementCost": "float",
+})
+
+# Columna de la matriz -> parámetro del tipo
+MAPEO_TYPE = dict((columna, columna) for columna in COLUMNAS_MATRIZ_TYPE if columna != "CODIGO")
+
+# Parámetros calculados a partir del propio tipo
+PARAMETROS_CALCULADOS_TYPE = ["COBie.Type.Name", "COBie.Type.Category", "COBie.Type.Size", "COBie.Type.Material"]
+
+DURATION_UNIT = "AÑO"
+SHAPE = "Poligonal"
+GRADE = "Grado Estándar"
+
+# ==== COBie Component ====
+COLUMNAS_MATRIZ_COMPONENT = [
+    "COBie.Component.InstallationDate",
+    "COBie.Component.Description",
+    "CODIGO",
+]
+
+COLUMNAS_SPACE = [
+    "COBie.Space.Name",
+    "COBie.Space.RoomTag",
+]
+
+TIPOS_MATRIZ_COMPONENT = {
+    "COBie.Component.InstallationDate": "fecha",
+}
+
+# Parámetros de control del ejemplar, leídos en bloque antes de procesar
+PARAMETROS_CONTROL_COMPONENT = [
+    "COBie",
+    "S&P_NIVEL DE ELEMENTO",
+    "S&P_ZONIFICACION",
+    PARAMETRO_CODIGO,
+    "COBie.Component.Space",
+]
+
+NIVELES_TECHO = {"TECHO", "Techo", "techo", "Cubierta", "CUBIERTA", "cubierta"}
+
+# ==== COBie Export (mismos encabezados que la matriz) ====
+COLUMNAS_EXPORT_TYPE = [
+    "COBie.Type.Name",
+    "COBie.Type.Category",
+    "COBie.Type.Description",
+    "COBie.Type.AssetType",
+    "COBie.Type.Manufacturer",
+    "COBie.Type.ModelNumber",
+    "COBie.Type.WarrantyGuarantorParts",
+    "COBie.Type.WarrantyDurationParts",
+    "COBie.Type.WarrantyGuarantorLabor",
+    "COBie.Type.WarrantyDurationLabor",
+    "COBie.Type.WarrantyDurationUnit",
+    "COBie.Type.WarrantyDescription",
+    "COBie.Type.ReplacementCost",
+    "COBie.Type.ExpectedLife",
+    "COBie.Type.DurationUnit",
+    "COBie.Type.ModelReference",
+    "COBie.Type.NominalLength",
+    "COBie.Type.NominalWidth",
+    "COBie.Type.NominalHeight",
+    "COBie.Type.Shape",
+    "COBie.Type.Size",
+    "COBie.Type.Color",
+    "COBie.Type.Finish",
+    "COBie.Type.Grade",
+    "COBie.Type.Material",
+    "COBie.Type.Constituents",
+    "COBie.Type.Features",
+    "COBie.Type.AccessibilityPerformance",
+    "COBie.Type.CodePerformance",
+    "COBie.Type.SustainabilityPerformance",
+    "COBie.Type.CreatedBy",
+    "COBie.Type.CreatedOn",
+]
+
+COLUMNAS_EXPORT_COMPONENT = [
+    "COBie.Component.Name",
+    "COBie.Component.Description",
+    "COBie.Component.Space",
+    "COBie.Component.SerialNumber",
+    "COBie.Component.InstallationDate",
+    "COBie.Component.WarrantyStartDate",
+    "COBie.Component.TagNumber",
+    "COBie.Component.BarCode",
+    "COBie.Component.AssetIdentifier",
+]
+
+# Longitudes: en el modelo están en pies y en la matriz en metros
+COLUMNAS_METROS = set([
+    "COBie.Type.NominalLength",
+    "COBie.Type.NominalWidth",
+    "COBie.Type.NominalHeight",
+])
+
+ENCABEZADOS_EXPORT = ["CODIGO"] + COLUMNAS_EXPORT_TYPE + COLUMNAS_EXPORT_COMPONENT + ["ElementId"]
+
+
+# ==== Utilidades ====
+
+def extraer_medida(tipo_name):
+    """
+    Extrae el contenido que está dentro de paréntesis de un string.
+
+    :param tipo_name: Texto con paréntesis (nombre del tipo).
+    :return: Contenido dentro de los paréntesis, o None si no hay.
+    """
+    if not tipo_name:
+        return None
+    match = re.search(r'\(([^)]+)\)', tipo_name)
+    return match.group(1) if match else None
+
+
+def parametro_esta_vacio(param):
+    """
+    :param param: Parámetro de Revit ya obtenido (o None).
+    :return: True si no tiene valor (texto vacío, 0 o 0.0).
+    """
+    try:
+        if not param or not param.HasValue:
+            return True
+        if param.StorageType == StorageType.String:
+            valor = param.AsString()
+            return not valor or valor.strip() == ""
+        elif param.StorageType == StorageType.Double:
+            return param.AsDouble() == 0.0
+        elif param.StorageType == StorageType.Integer:
+            return param.AsInteger() == 0
+        else:
+            return True
+    except:
+        return True
+
+
+def esta_vacio(param):
+    """
+    :param param: Parámetro de Revit ya obtenido (o None).
+    :return: True si está vacío o tiene un valor no válido ("", "n/a", "none").
+    """
+    if not param:
+        return True
+    value = get_param_value(param)
+    if value is None:
+        return True
+    if isinstance(value, str):
+        if value.strip().lower() in ("", "n/a", "none"):
+            return True
+    return False
+
+
+def divide_string(text, idx, character_divider=None, compare=None, value_default=None):
+    """
+    Divide un string usando un separador y devuelve la parte en la posición idx.
+    Si el texto completo coincide con 'compare', devuelve 'value_default'.
+    """
+    if not text:
+        return ""
+    if compare and text.strip().lower() == compare.lower():
+        return value_default
+    parts = text.split(character_divider) if character_divider else text.split()
+    if idx < 0 or idx >= len(parts):
+        return ""
+    return parts[idx]
+
+
+def roomtag_de_espacio(cobie_space_value, space_table):
+    """
+    :param cobie_space_value: Valor de COBie.Component.Space del ejemplar.
+    :param space_table: MatrixTable de la hoja SPACE indexada por COBie.Space.Name.
+    :return: RoomTag del ambiente (el primero si hay varios separados por coma) o "0".
+    """
+    if not cobie_space_value:
+        return "0"
+    cobie_space_value_clean = str(cobie_space_value).strip()
+    if not cobie_space_value_clean or cobie_space_value_clean == "0":
+        return "0"
+    if "," in cobie_space_value_clean:
+        cobie_space_value_clean = cobie_space_value_clean.split(",")[0].strip()
+    space_row = space_table.buscar("COBie.Space.Name", cobie_space_value_clean)
+    if space_row:
+        room_tag = space_row.get("COBie.Space.RoomTag", "0")
+        return room_tag if room_tag else "0"
+    return "0"
+
+
+def valor_exportable(param, en_metros=False):
+    """
+    Obtiene el valor de un parámetro tal como se escribe en la matriz.
+
+    :param param: Parámetro de Revit (o None).
+    :param en_metros: Si es True, la longitud se convierte de pies a metros.
+    :return: Texto, número o None si el parámetro no existe o está vacío.
+    """
+    if param is None or not param.HasValue:
+        return None
+    storage = param.StorageType
+    if storage == StorageType.String:
+        return (param.AsString() or "").strip() or None
+    if storage == StorageType.Double:
+        valor = param.AsDouble()
+        if en_metros:
+            valor = UnitUtils.ConvertFromInternalUnits(valor, UnitTypeId.Meters)
+        return valor
+    if storage == StorageType.Integer:
+        return param.AsInteger()
+    if storage == StorageType.ElementId:
+        return param.AsElementId().IntegerValue
+    return None
+
+
+# ==== COBie Type ====
+
+def parametros_estaticos_type(created_by, warranty_description, especialidad):
+    """
+    :param created_by: CreatedBy del colegio.
+    :param warranty_description: Descripción de garantía del colegio.
+    :param especialidad: Especialidad del modelo (get_current_specialty).
+    :return: {parámetro: valor} comunes a todos los tipos.
+    """
+    asset_type = "Semi-fixed" if especialidad.name in ["ARQUITECTURA", "ESTRUCTURAS"] else "Fixed"
+    return {
+        "COBie.Type.CreatedBy": created_by,
+        "COBie.Type.CreatedOn": CREATED_ON,
+        "COBie.Type.AssetType": asset_type,
+        "COBie.Type.WarrantyGuarantorLabor": created_by,
+        "COBie.Type.WarrantyDurationUnit": DURATION_UNIT,
+        "COBie.Type.DurationUnit": DURATION_UNIT,
+        "COBie.Type.WarrantyDescription": warranty_description,
+        "COBie.Type.ModelReference": warranty_description,
+        "COBie.Type.Shape": SHAPE,
+        "COBie.Type.Grade": GRADE,
+        "COBie.Type.Features": especialidad.feature,
+        "COBie.Type.AccessibilityPerformance": especialidad.accessibility_performance,
+        "COBie.Type.CodePerformance": especialidad.code_perfomance,
+        "COBie.Type.SustainabilityPerformance": especialidad.sustainability,
+    }
+
+
+def agrupar_por_tipo(doc, seleccion, resolver, cache):
+    """
+    Agrupa la selección por tipo. Cada tipo toma el código de la primera instancia que lo
+    usa; los subcomponentes (todos los niveles) toman el código de su instancia padre.
+
+    :param seleccion: Ejemplares seleccionados.
+    :return: {id del tipo: {"codigo", "element_type", "instancias": [ElementId]}}
+    """
+    element_types_data = {}
+    codigos_seleccion = leer_parametros(doc, seleccion, [PARAMETRO_CODIGO], resolver)
+
+    # Los elementos seleccionados se procesan con su propio código aunque también estén anidados
+    subcomponentes_vistos = set(e.Id.IntegerValue for e in seleccion)
+
+    def agregar(tipo, codigo, instancia):
+        datos = element_types_data.get(tipo.Id.IntegerValue)
+        if datos is None:
+            datos = element_types_data[tipo.Id.IntegerValue] = {
+                "codigo": codigo, "element_type": tipo, "instancias": []}
+        datos["instancias"].append(instancia.Id)
+
+    for element, valores in zip(seleccion, codigos_seleccion):
+        codigo_elemento = valores[PARAMETRO_CODIGO]
+        if not codigo_elemento:
+            continue
+        type_elem = cache.tipo(element)
+        if not type_elem:
+            print("No se pudo obtener el tipo para instancia {}".format(element.Id))
+            continue
+        agregar(type_elem, codigo_elemento, element)
+        for sub in subcomponentes(doc, element, subcomponentes_vistos):
+            type_sub = cache.tipo(sub)
+            if type_sub:
+                agregar(type_sub, codigo_elemento, sub)
+    return element_types_data
+
+
+class COBieTypeTransfer(object):
+    """
+    Prepara los valores COBie.Type.* de cada tipo (matriz, datos del tipo y parámetros
+    estáticos) y los encola en un ParameterWriteBatch.
+    """
+
+    def __init__(self, resolver, tabla, lote, parametros_estaticos, sobrescribir=True, diferencias=None,
+                 columnas_faltantes=(), informar=True):
+        """
+        :param resolver: ParameterResolver del documento.
+        :param tabla: MatrixTable de la hoja de la especialidad indexada por CODIGO.
+        :param lote: ParameterWriteBatch donde se encolan las escrituras.
+        :param parametros_estaticos: {parámetro: valor} comunes (parametros_estaticos_type).
+        :param sobrescribir: Si es False, solo se escriben los parámetros vacíos.
+        :param diferencias: MatrixDiff del modo diferencias (solo columnas cambiadas), o None.
+        :param columnas_faltantes: Columnas que no están en la matriz.
+        :param informar: Si es True, imprime cada tipo procesado.
+        """
+        self.resolver = resolver
+        self.tabla = tabla
+        self.lote = lote
+        self.parametros_estaticos = parametros_estaticos
+        self.sobrescribir = sobrescribir
+        self.diferencias = diferencias
+        self.columnas_faltantes = columnas_faltantes
+        self.informar = informar
+        self.procesados = 0
+        self.omitidos = 0
+        self.codigos_no_encontrados = []
+
+    def preparar(self, element_type, codigo_elemento, instancias=0):
+        """
+        :param element_type: Tipo a procesar.
+        :param codigo_elemento: CODIGO de la instancia que usa el tipo.
+        :param instancias: Cantidad de instancias del tipo (solo informativo).
+        :return: {"element_type", "parameters", "codigo", "instancias"} o None si el tipo se
+                 omite (COBie.Type distinto de 1, código sin fila en la matriz o error).
+        """
+        param_cobie_type = self.resolver.editable(element_type, "COBie.Type")
+        if not (param_cobie_type and param_cobie_type.StorageType == StorageType.Integer
+                and param_cobie_type.AsInteger() == 1):
+            self.omitidos += 1
+            return None
+
+        try:
+            datos_excel = self.tabla.buscar("CODIGO", codigo_elemento)
+            if not datos_excel:
+                if codigo_elemento not in self.codigos_no_encontrados:
+                    self.codigos_no_encontrados.append(codigo_elemento)
+                    if self.informar:
+                        print("No se encontraron datos en Excel para código: {}".format(codigo_elemento))
+                self.omitidos += 1
+                return None
+
+            category_object = element_type.Category
+            category_name = category_object.Name if category_object else "Sin Categoría"
+
+            fam_name = "Sin Familia"
+            if isinstance(element_type, ElementType):
+                fam_name = element_type.FamilyName
+
+            param_name_value = "Sin Nombre"
+            object_param_name = GetParameterAPI(element_type, BuiltInParameter.SYMBOL_NAME_PARAM)
+            if object_param_name:
+                param_name_value = object_param_name.AsString() or "Sin Nombre"
+
+            param_name_material = "Sin Material"
+            object_param_material = self.resolver.editable(element_type, "S&P_MATERIAL DE ELEMENTO")
+            if object_param_material and object_param_material.HasValue:
+                param_name_material = object_param_material.AsString() or "Sin Material"
+
+            param_pr_number = self.resolver.editable(element_type, "Classification.Uniclass.Pr.Number")
+            param_pr_desc = self.resolver.editable(element_type, "Classification.Uniclass.Pr.Description")
+            pr_number = ""
+            pr_desc = ""
+            if param_pr_number and param_pr_number.HasValue:
+                pr_number = param_pr_number.AsString() or ""
+            if param_pr_desc and param_pr_desc.HasValue:
+                pr_desc = param_pr_desc.AsString() or ""
+
+            parameters_shared = {
+                "COBie.Type.Name": "{} : {} : {}".format(category_name, fam_name, param_name_value),
+                "COBie.Type.Category": "{} : {}".format(pr_number, pr_desc),
+                "COBie.Type.Size": extraer_medida(param_name_value),
+                "COBie.Type.Material": param_name_material,
+            }
+            parameters_shared.update(self.parametros_estaticos)
+
+            # En modo diferencias solo se reescriben las columnas de la matriz que cambiaron
+            columnas_excel = MAPEO_TYPE
+            if self.diferencias is not None:
+                parameters_shared = {}
+                columnas_excel = dict((c, MAPEO_TYPE[c]) for c in self.diferencias.columnas_cambiadas(codigo_elemento)
+                                      if c in MAPEO_TYPE)
+
+            # Valores de la matriz (ya convertidos al cargar la tabla)
+            for excel_param, revit_param in columnas_excel.items():
+                if excel_param in self.columnas_faltantes:
+                    continue
+                valor_excel = datos_excel.get(excel_param)
+                # Longitud vacía o no numérica: se escribe 0
+                if valor_excel is None and TIPOS_MATRIZ_TYPE.get(excel_param) == "metros":
+                    valor_excel = 0
+                if valor_excel is not None:
+                    parameters_shared[revit_param] = valor_excel
+
+            return {
+                "element_type": element_type,
+                "parameters": parameters_shared,
+                "codigo": codigo_elemento,
+                "instancias": instancias,
+            }
+        except Exception as e:
+            print("Error preparando elemento tipo {}: {}".format(element_type.Id, str(e)))
+            self.omitidos += 1
+            return None
+
+    def procesar(self, elemento_data):
+        """Encola las escrituras de un tipo preparado (se aplican al confirmar cada bloque)."""
+        element_type = elemento_data["element_type"]
+        try:
+            parametros_aplicados = 0
+            parametros_omitidos = 0
+            for param_name, value in elemento_data["parameters"].items():
+                if value is None:
+                    continue
+                try:
+                    param = self.resolver.editable(element_type, param_name)
+                    if not param:
+                        continue
+                    # Según el modo: sobrescribir o solo llenar vacíos
+                    if self.sobrescribir or parametro_esta_vacio(param):
+                        self.lote.agregar(element_type, param, value, param_name)
+                        parametros_aplicados += 1
+                    else:
+                        parametros_omitidos += 1
+                except Exception as e:
+                    print("Error estableciendo parámetro {} en tipo {}: {}".format(
+                        param_name, element_type.Id, str(e)))
+
+            self.procesados += 1
+            if self.informar:
+                texto = "Procesado tipo {} con código: {} ({} instancias) - A escribir: {}".format(
+                    element_type.Id, elemento_data["codigo"], elemento_data["instancias"], parametros_aplicados)
+                if parametros_omitidos > 0:
+                    texto += ", Omitidos: {}".format(parametros_omitidos)
+                print(texto)
+        except Exception as e:
+            print("Error procesando elemento tipo {}: {}".format(element_type.Id, str(e)))
+            self.omitidos += 1
+
+
+# ==== COBie Component ====
+
+class COBieComponentTransfer(object):
+    """
+    Calcula los valores COBie.Component.* de cada ejemplar (matriz, hoja SPACE, tipo y
+    parámetros de control) y los encola en un ParameterWriteBatch.
+    """
+
+    def __init__(self, resolver, cache, lote, tabla, espacios, sobrescribir=True, diferencias=None,
+                 created_by=None, warranty_start_date=None):
+        """
+        :param resolver: ParameterResolver del documento.
+        :param cache: ElementCache del documento (tipos de los ejemplares).
+        :param lote: ParameterWriteBatch donde se encolan las escrituras.
+        :param tabla: MatrixTable de la hoja de la especialidad indexada por CODIGO.
+        :param espacios: MatrixTable de la hoja SPACE indexada por COBie.Space.Name.
+        :param sobrescribir: Si es False, solo se escriben los parámetros vacíos.
+        :param diferencias: MatrixDiff del modo diferencias (solo columnas de la matriz
+                            cambiadas; el resto no se escribe), o None.
+        :param created_by: CreatedBy del colegio.
+        :param warranty_start_date: Inicio de garantía de componentes del colegio.
+        """
+        self.resolver = resolver
+        self.cache = cache
+        self.lote = lote
+        self.tabla = tabla
+        self.espacios = espacios
+        self.sobrescribir = sobrescribir
+        self.diferencias = diferencias
+        self.created_by = created_by
+        self.warranty_start_date = warranty_start_date
+        self.procesados = 0
+        self.ignorados = 0              # COBie distinto de 1
+        self.sin_codigo = 0
+        self.errores = []
+
+    def leer_control(self, doc, elementos):
+        """
+        :return: Valores de PARAMETROS_CONTROL_COMPONENT de cada elemento, en el mismo orden.
+        """
+        return leer_parametros(doc, elementos, PARAMETROS_CONTROL_COMPONENT, self.resolver)
+
+    def asignar(self, elem, param, value, nombre):
+        """
+        Encola la asignación (el lote solo escribe los valores que cambian).
+
+        :return: True si se encoló, False si no corresponde asignarlo.
+        """
+        if value is None or (isinstance(value, str) and value.strip() in ("", "n/a")):
+            return False
+        if not param or param.IsReadOnly:
+            return False
+        if not self.sobrescribir and not esta_vacio(param):
+            return False
+        return self.lote.agregar(elem, param, value, nombre)
+
+    def procesar(self, par):
+        """
+        Calcula y encola las escrituras COBie de un elemento.
+
+        :param par: (elemento, valores de control de leer_control).
+        """
+        elem, valores = par
+        if valores["COBie"] != 1:
+            self.ignorados += 1
+            return
+
+        resolver = self.resolver
+        param_installation_date = resolver.parametro(elem, "COBie.Component.InstallationDate")
+        param_description = resolver.parametro(elem, "COBie.Component.Description")
+
+        level_param_value = valores["S&P_NIVEL DE ELEMENTO"]
+        level = "RF" if level_param_value in NIVELES_TECHO else divide_string(level_param_value, 1)
+
+        elem_category_object = elem.Category
+        name_category = elem_category_object.Name if elem_category_object else "Sin categoria"
+
+        id_elem = elem.Id.IntegerValue
+
+        element_type_object_id = elem.GetTypeId()
+        if element_type_object_id == ElementId.InvalidElementId:
+            self.errores.append("Elemento ID {} sin tipo asociado".format(id_elem))
+            return
+
+        el_type_object = self.cache.elemento(element_type_object_id)
+        name_type = get_param_value(GetParameterAPI(el_type_object, BuiltInParameter.SYMBOL_NAME_PARAM))
+        pr_number = get_param_value(resolver.editable(el_type_object, "Classification.Uniclass.Pr.Number"))
+        family_name = el_type_object.FamilyName if isinstance(el_type_object, ElementType) else "Sin familia"
+
+        mbr_value = divide_string(valores["S&P_ZONIFICACION"], 1, compare="sitio", value_default="000")
+        tag_number = roomtag_de_espacio(valores["COBie.Component.Space"], self.espacios)
+
+        code_elem = valores[PARAMETRO_CODIGO]
+        if code_elem in (None, "", "n/a"):
+            self.sin_codigo += 1
+            code_elem = ""
+
+        # ==== Datos de la matriz ====
+        data_row = self.tabla.buscar("CODIGO", code_elem) if code_elem else None
+        columnas_excel = (self.diferencias.columnas_cambiadas(code_elem) if self.diferencias is not None
+                          else COLUMNAS_MATRIZ_COMPONENT)
+        if data_row:
+            # La fecha ya viene en formato ISO desde la carga de la tabla
+            if "COBie.Component.InstallationDate" in columnas_excel:
+                fecha_formateada = data_row.get("COBie.Component.InstallationDate")
+                if fecha_formateada:
+                    self.asignar(elem, param_installation_date, fecha_formateada, "InstallationDate")
+            if "COBie.Component.Description" in data_row and "COBie.Component.Description" in columnas_excel:
+                desc_excel = data_row["COBie.Component.Description"]
+                if desc_excel and str(desc_excel).strip().lower() not in ("", "n/a"):
+                    self.asignar(elem, param_description, str(desc_excel), "Description")
+
+        if self.diferencias is not None:
+            # El resto de parámetros no depende de la matriz
+            self.procesados += 1
+            return
+
+        self.asignar(elem, resolver.parametro(elem, "COBie.Component.SerialNumber"),
+                     "{} {}".format(code_elem, id_elem), "SerialNumber")
+        self.asignar(elem, resolver.parametro(elem, "COBie.Component.Name"),
+                     "{} : {} : {} : {}".format(name_category, family_name, name_type, id_elem), "Name")
+        self.asignar(elem, resolver.parametro(elem, "COBie.CreatedOn"), CREATED_ON, "CreatedOn")
+        self.asignar(elem, resolver.parametro(elem, "COBie.CreatedBy"), self.created_by, "CreatedBy")
+        self.asignar(elem, resolver.parametro(elem, "COBie.Component.WarrantyStartDate"),
+                     self.warranty_start_date, "WarrantyStartDate")
+        self.asignar(elem, resolver.parametro(elem, "COBie.Component.TagNumber"), tag_number, "TagNumber")
+        self.asignar(elem, resolver.parametro(elem, "COBie.Component.BarCode"),
+                     "{}{}".format(mbr_value, id_elem), "BarCode")
+        self.asignar(elem, resolver.parametro(elem, "COBie.Component.AssetIdentifier"),
+                     "{}-ZZ-{}-{}-{}-{}".format(mbr_value, level, tag_number, pr_number, mbr_value + str(id_elem)),
+                     "AssetIdentifier")
+        self.procesados += 1
+
+
+# ==== COBie Export ====
+
+class COBieExport(object):
+    """
+    Filas de la exportación COBie: código, valores COBie.Type.* del tipo (leídos una sola
+    vez por tipo), valores COBie.Component.* del ejemplar e ElementId.
+    Los parámetros se leen por GUID con el ParameterResolver, no por nombre.
+    """
+
+    def __init__(self, doc, resolver=None):
+        """
+        :param doc: Documento activo.
+        :param resolver: ParameterResolver a usar (por defecto, el del documento).
+        """
+        self.doc = doc
+        self.resolver = resolver or resolver_parametros(doc)
+        self.valores_tipo = {}          # {id del tipo: valores COBie.Type.*}
+        self.exportados = 0
+        self.sin_codigo = 0
+
+    def valores_de(self, elemento, columnas):
+        """Lee las columnas indicadas de un elemento, en el mismo orden."""
+        parametro = self.resolver.parametro
+        return [valor_exportable(parametro(elemento, c), c in COLUMNAS_METROS) for c in columnas]
+
+    def fila(self, elem):
+        """
+        :param elem: Ejemplar COBie.
+        :return: Fila con los valores de ENCABEZADOS_EXPORT.
+        """
+        codigo = valor_exportable(self.resolver.parametro(elem, PARAMETRO_CODIGO))
+        if codigo is None:
+            self.sin_codigo += 1
+
+        id_tipo = elem.GetTypeId()
+        clave_tipo = id_tipo.IntegerValue
+        if clave_tipo not in self.valores_tipo:
+            tipo = self.doc.GetElement(id_tipo) if id_tipo != ElementId.InvalidElementId else None
+            self.valores_tipo[clave_tipo] = (self.valores_de(tipo, COLUMNAS_EXPORT_TYPE) if tipo
+                                             else [None] * len(COLUMNAS_EXPORT_TYPE))
+
+        self.exportados += 1
+        return ([codigo] + self.valores_tipo[clave_tipo] + self.valores_de(elem, COLUMNAS_EXPORT_COMPONENT)
+                + [elem.Id.IntegerValue])
+
+    def exportar(self, libro, elementos):
+        """
+        Escribe una fila por elemento en la hoja abierta del XlsxWriter, al terminar de leerlo.
+
+        :return: Cantidad de filas escritas.
+        """
+        for elem in elementos:
+            libro.escribir_fila(self.fila(elem))
+        return self.exportados
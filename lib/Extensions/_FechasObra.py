@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from Autodesk.Revit.DB import FamilyInstance
+from Extensions._RevitAPI import expandir_subcomponentes
 from datetime import datetime, timedelta
 import random, re
 
@@ -32,21 +32,9 @@ def buscar_fecha_por_semana(nombre_semana, semanas):
             return fecha_random.strftime("%Y-%m-%d")
     return None
 
-# Incluir familias anidadas compartidas
-def obtener_todos_los_elementos(elementos):
-    todos = []
-    for elem in elementos:
-        todos.append(elem)
-        if isinstance(elem, FamilyInstance):
-            try:
-                sub_ids = elem.GetSubComponentIds()
-                for sid in sub_ids:
-                    sub_elem = doc.GetElement(sid)
-                    if sub_elem:
-                        todos.append(sub_elem)
-            except:
-                pass
-    return todos
+# Incluir familias anidadas compartidas (todos los niveles, sin repetir)
+def obtener_todos_los_elementos(doc, elementos):
+    return list(expandir_subcomponentes(doc, elementos))
 
 # Función para corregir el formato de fecha y devolver string con formato "yyyy-mm-dd"
 def corregir_formato_fecha(fecha_str):
@@ -2,7 +2,7 @@
 
 from Autodesk.Revit.DB import BuiltInCategory
 from pyrevit import forms, revit
-from pyrevit.interop import xl
+from Helper._Excel import Excel
 
 doc = revit.doc
 
@@ -25,48 +25,52 @@ def ignorar_categorias():
     
     return nombres_excluir
 
-def leer_excel_filtrado():
+COLUMNAS_ELEMENTOS = ["Item", "Specialty", "COBie Requirement"]
+
+def cargar_hoja_elementos(excel):
+    """
+    Lee la hoja ELEMENTOS proyectada a las columnas necesarias.
+    No muestra ventanas, por lo que puede ejecutarse en segundo plano.
+    
+    Args:
+        excel (Excel): Instancia con la matriz ya seleccionada
+    
+    Returns:
+        MatrixTable: Filas de la hoja ELEMENTOS
+    """
+    return excel.read_table("ELEMENTOS", COLUMNAS_ELEMENTOS, 8, 9)  # Fila 9 en Excel (índice 8)
+
+def leer_excel_filtrado(excel=None):
     """
     Lee un archivo Excel y filtra elementos según requerimientos COBie.
     
     Busca columnas 'Item', 'Specialty', 'COBie Requirement'.
     Clasifica elementos en dos listas según COBie Requirement (Y/N).
     
+    Args:
+        excel (Excel, optional): Instancia a reutilizar (por ejemplo, la usada en una carga anticipada)
+    
     Returns:
         list: [elementos_sin_cobie, elementos_con_cobie]
     """
-    ruta = forms.pick_excel_file()
-    if not ruta:
-        forms.alert("No se seleccionó ningún archivo.", exitscript=True)
-        return []
-    
-    datos = xl.load(ruta, sheets="ELEMENTOS", headers=False)
-    filas = datos.get('ELEMENTOS', {}).get('rows', [])
+    if excel is None:
+        excel = Excel()
+    filas = cargar_hoja_elementos(excel)
     
-    if len(filas) < 8:
-        forms.alert("El archivo no tiene suficientes filas para contener encabezados en la fila 9.", exitscript=True)
-        return []
-    
-    encabezados = filas[8]  # Fila 9 en Excel (índice 8)
-    try:
-        col_espe = encabezados.index("Specialty")               # Columna B
-        col_descri = encabezados.index("COBie Requirement")     # Columna I
-        col_item = encabezados.index("Item")                    # Columna A
-    except ValueError:
+    if excel.columnas_faltantes:
         forms.alert("No se encontraron las columnas necesarias: 'Especialidad', 'COBie', 'NRM 1'.", exitscript=True)
         return []
     
     resultados_cobie = []
     resultados_sin_cobie = []
     
-    for fila in filas[9:]:  # Desde la fila 10 (índice 9)
-        if len(fila) <= max(col_espe, col_descri, col_item):
+    for fila in filas:  # Desde la fila 10 (índice 9)
+        valor_espe = fila["Specialty"]
+        valor_descri = fila["COBie Requirement"]
+        valor_col1 = fila["Item"]
+        if None in (valor_espe, valor_descri, valor_col1):
             continue
         
-        valor_espe = fila[col_espe]
-        valor_descri = fila[col_descri]
-        valor_col1 = fila[col_item]
-        
         # Convertir valores a cadena antes de aplicar comparaciones
         valor_espe_str = str(valor_espe).strip()
         valor_descri_str = str(valor_descri).strip()
@@ -1,5 +1,15 @@
 # -*- coding: utf-8 -*-
-from Autodesk.Revit.DB import BuiltInParameter, Element, StorageType, ElementId
+from collections import OrderedDict
+from Autodesk.Revit.DB import BuiltInParameter, Element, StorageType, ElementId, FilteredElementCollector, SharedParameterElement, FamilyInstance
+from Autodesk.Revit.DB import ElementParameterFilter, FilterRule, ParameterFilterRuleFactory
+from System.Collections.Generic import List
+from Helper._MatrixTable import MatrixTable
+
+# {ruta o título del documento: (Document, cantidad de parámetros compartidos, ParameterResolver)}
+_RESOLVERES = {}
+
+# Máximo de elementos que guarda cada ElementCache antes de descartar los menos usados
+TAMANO_CACHE_ELEMENTOS = 4096
 
 def getParameter(element, name):
     """Obtiene un parametro compartido si no es de solo lectura.
@@ -11,22 +21,91 @@ def getParameter(element, name):
         return param
     return None
 
+# Diferencia relativa por debajo de la cual dos dobles se consideran iguales
+_TOLERANCIA_DOBLE = 1e-9
+
+def _a_element_id(new_value):
+    return new_value if isinstance(new_value, ElementId) else None
+
+def _doble_igual(parameter, valor):
+    return parameter.HasValue and abs(parameter.AsDouble() - valor) <= _TOLERANCIA_DOBLE * max(1.0, abs(valor))
+
+class AccesorParametro(object):
+    """
+    Lectura, conversión y comparación de un parámetro, resueltas una sola vez para su
+    StorageType. Así los bucles sobre miles de elementos no vuelven a preguntar el tipo
+    de almacenamiento en cada llamada.
+    """
+
+    __slots__ = ("leer", "convertir", "igual")
+
+    def __init__(self, leer, convertir, igual):
+        """
+        :param leer: parameter -> valor (como get_param_value).
+        :param convertir: valor -> valor con el tipo que acepta Set (None si no aplica).
+        :param igual: (parameter, valor convertido) -> True si ya tiene ese valor.
+        """
+        self.leer = leer
+        self.convertir = convertir
+        self.igual = igual
+
+    def escribir(self, parameter, new_value):
+        """
+        Escribe el valor si cambia.
+
+        :return: "cambiados", "sin_cambios" o "errores" (la estadística a sumar).
+        """
+        valor = self.convertir(new_value)
+        if valor is None:
+            return "errores"
+        if self.igual(parameter, valor):
+            return "sin_cambios"
+        return "cambiados" if parameter.Set(valor) else "errores"
+
+_ACCESORES = {
+    StorageType.String: AccesorParametro(
+        lambda p: (p.AsString() or "").strip(), str,
+        lambda p, v: (p.AsString() or "") == v),
+    StorageType.Double: AccesorParametro(
+        lambda p: p.AsDouble(), float, _doble_igual),
+    StorageType.Integer: AccesorParametro(
+        lambda p: p.AsInteger(), int,
+        lambda p, v: p.HasValue and p.AsInteger() == v),
+    StorageType.ElementId: AccesorParametro(
+        lambda p: p.AsElementId(), _a_element_id,
+        lambda p, v: p.HasValue and p.AsElementId().IntegerValue == v.IntegerValue),
+}
+
+def accesor_de(parameter):
+    """Obtiene el AccesorParametro del StorageType del parámetro (None si no tiene)."""
+    return _ACCESORES.get(parameter.StorageType)
+
+def valor_igual(parameter, new_value):
+    """Indica si el parámetro ya tiene el valor dado, comparando según su StorageType.
+    :param parameter: Parámetro de Revit.
+    :param new_value: Valor que se quiere escribir.
+    :return: True si escribirlo no cambiaría nada."""
+    accesor = accesor_de(parameter)
+    if accesor is None:
+        return False
+    try:
+        valor = accesor.convertir(new_value)
+    except (ValueError, TypeError):
+        return False
+    return valor is not None and accesor.igual(parameter, valor)
+
 def SetParameter(parameter, new_value):
     """Setea un parámetro si no es de solo lectura.
+    Si el parámetro ya tiene ese valor no se escribe (el elemento no queda modificado).
     :param parameter: El parámetro de Revit a modificar.
     :param new_value: El nuevo valor como string (se adapta según tipo de parámetro).
     :return: True si se seteó correctamente, False si fue de solo lectura o inválido."""
     if parameter and not parameter.IsReadOnly:
+        accesor = accesor_de(parameter)
+        if accesor is None:
+            return True
         try:
-            if parameter.StorageType == StorageType.String:
-                parameter.Set(str(new_value))
-            elif parameter.StorageType == StorageType.Double:
-                parameter.Set(float(new_value))
-            elif parameter.StorageType == StorageType.Integer:
-                parameter.Set(int(new_value))
-            elif parameter.StorageType == StorageType.ElementId:
-                if isinstance(new_value, ElementId):
-                    parameter.Set(new_value)
+            accesor.escribir(parameter, new_value)
             return True
         except Exception as e:
             print("Error al setear el parámetro:", e)
@@ -61,15 +140,454 @@ def get_param_value(param, default=None):
     """Devuelve el valor del parámetro según su tipo, o default si no existe."""
     if not param:
         return default
-    try:
-        if param.StorageType == StorageType.String:
-            return (param.AsString() or "").strip()
-        elif param.StorageType == StorageType.Double:
-            return param.AsDouble()
-        elif param.StorageType == StorageType.Integer:
-            return param.AsInteger()
-        elif param.StorageType == StorageType.ElementId:
-            return param.AsElementId()
+    accesor = _ACCESORES.get(param.StorageType)
+    if accesor is None:
         return default
-    except:
-        return default
\ No newline at end of file
+    return accesor.leer(param)
+
+def elementos_por_codigo(doc, codigos, nombre_parametro="S&P_CODIGO DE ELEMENTO"):
+    """
+    Recorre las instancias del modelo cuyo código de elemento está en el conjunto dado.
+    
+    :param doc: Documento activo.
+    :param codigos: Conjunto de códigos (texto sin espacios extremos).
+    :param nombre_parametro: Parámetro de instancia que guarda el código.
+    :return: Lista de elementos encontrados.
+    """
+    encontrados = []
+    if not codigos:
+        return encontrados
+    colector = FilteredElementCollector(doc).WhereElementIsNotElementType()
+    # Revit descarta en el colector los elementos sin código; el resto se compara en Python
+    filtro = filtro_parametros(doc, con_valor=[nombre_parametro])
+    if filtro is not None:
+        colector = colector.WherePasses(filtro)
+    for elem in colector:
+        param = elem.LookupParameter(nombre_parametro)
+        if param and param.StorageType == StorageType.String:
+            valor = (param.AsString() or "").strip()
+            if valor in codigos:
+                encontrados.append(elem)
+    return encontrados
+
+def subcomponentes(doc, elemento, vistos=None):
+    """
+    Recorre las familias anidadas compartidas de un elemento en todos los niveles
+    (hijos, nietos, ...), en profundidad y sin repetir elementos.
+
+    :param doc: Documento activo.
+    :param elemento: Elemento padre (si no es FamilyInstance no tiene subcomponentes).
+    :param vistos: Conjunto de IntegerValue ya recorridos; se comparte entre llamadas
+                   para no devolver dos veces un subcomponente alcanzado por dos caminos.
+    :return: Generador de subcomponentes (sin incluir el elemento padre).
+    """
+    vistos = set() if vistos is None else vistos
+    vistos.add(elemento.Id.IntegerValue)
+    if not isinstance(elemento, FamilyInstance):
+        return
+    try:
+        sub_ids = list(elemento.GetSubComponentIds())
+    except Exception:
+        return
+    for sid in sub_ids:
+        if sid.IntegerValue in vistos:
+            continue
+        sub = doc.GetElement(sid)
+        if sub is None:
+            continue
+        yield sub
+        for nieto in subcomponentes(doc, sub, vistos):
+            yield nieto
+
+def expandir_subcomponentes(doc, elementos, vistos=None):
+    """
+    Recorre los elementos y, detrás de cada uno, sus familias anidadas compartidas en
+    todos los niveles. Cada elemento se devuelve una sola vez aunque esté seleccionado y
+    también anidado. Es un generador: la selección se recorre a medida que se consume.
+
+    :param doc: Documento activo.
+    :param elementos: Elementos (o generador de elementos); se ignoran los None.
+    :param vistos: Conjunto de IntegerValue a omitir; se actualiza con los recorridos.
+    :return: Generador de elementos sin repetir.
+    """
+    vistos = set() if vistos is None else vistos
+    for elemento in elementos:
+        if elemento is None or elemento.Id.IntegerValue in vistos:
+            continue
+        yield elemento
+        for sub in subcomponentes(doc, elemento, vistos):
+            yield sub
+
+class ParameterResolver(object):
+    """
+    Resuelve una sola vez por documento el GUID de cada parámetro compartido a partir
+    de su nombre (SharedParameterElement), para leer con element.get_Parameter(guid)
+    en lugar de buscar por nombre en todos los parámetros del elemento.
+    Los nombres sin GUID único (no compartidos o repetidos) se siguen buscando por nombre.
+    """
+
+    def __init__(self, doc):
+        """
+        :param doc: Documento activo.
+        """
+        self.guids = {}
+        self.ids = {}                   # {nombre: ElementId del SharedParameterElement}, para filtros nativos
+        self.duplicados = {}
+        for elemento in FilteredElementCollector(doc).OfClass(SharedParameterElement):
+            nombre = elemento.Name
+            guid = elemento.GuidValue
+            if nombre in self.duplicados:
+                self.duplicados[nombre].append(guid)
+            elif nombre in self.guids and self.guids[nombre] != guid:
+                self.duplicados[nombre] = [self.guids.pop(nombre), guid]
+                self.ids.pop(nombre, None)
+            else:
+                self.guids[nombre] = guid
+                self.ids[nombre] = elemento.Id
+
+    def verificar(self, nombres):
+        """
+        Revisa de antemano los nombres que usará un proceso.
+
+        :param nombres: Nombres de parámetros compartidos.
+        :return: (faltantes, duplicados): nombres sin parámetro compartido en el documento
+                 y nombres que corresponden a más de un GUID.
+        """
+        faltantes = [n for n in nombres if n not in self.guids and n not in self.duplicados]
+        duplicados = [n for n in nombres if n in self.duplicados]
+        return faltantes, duplicados
+
+    def parametro(self, element, nombre):
+        """Obtiene el parámetro por GUID si es compartido y único, si no por nombre."""
+        if element is None or nombre is None:
+            return None
+        guid = self.guids.get(nombre)
+        if guid is not None:
+            return element.get_Parameter(guid)
+        return element.LookupParameter(nombre)
+
+    def editable(self, element, nombre):
+        """Igual que getParameter: el parámetro solo si no es de solo lectura."""
+        param = self.parametro(element, nombre)
+        if param and not param.IsReadOnly:
+            return param
+        return None
+
+def _clave_documento(doc):
+    return doc.PathName or doc.Title
+
+def _mismo_documento(guardado, doc):
+    """Indica si el documento guardado sigue abierto y es el mismo que doc."""
+    try:
+        return guardado.IsValidObject and guardado.Equals(doc)
+    except Exception:
+        return False
+
+def resolver_parametros(doc):
+    """
+    Obtiene el ParameterResolver del documento, construyéndolo la primera vez.
+    Se reconstruye si el documento guardado se cerró o es otro con la misma ruta, y
+    si cambió la cantidad de parámetros compartidos (parámetros agregados o borrados
+    después de construirlo). Para forzarlo, ver invalidar_resolver.
+
+    :param doc: Documento activo.
+    :return: ParameterResolver del documento.
+    """
+    clave = _clave_documento(doc)
+    cantidad = FilteredElementCollector(doc).OfClass(SharedParameterElement).GetElementCount()
+    guardado = _RESOLVERES.get(clave)
+    if guardado is None or guardado[1] != cantidad or not _mismo_documento(guardado[0], doc):
+        # Se aprovecha para olvidar los documentos que ya se cerraron
+        for otra in [c for c, (d, _, _) in _RESOLVERES.items() if not _mismo_documento(d, d)]:
+            del _RESOLVERES[otra]
+        guardado = (doc, cantidad, ParameterResolver(doc))
+        _RESOLVERES[clave] = guardado
+    return guardado[2]
+
+def invalidar_resolver(doc=None):
+    """
+    Descarta el ParameterResolver guardado, por ejemplo tras reemplazar un parámetro
+    compartido por otro con el mismo nombre.
+
+    :param doc: Documento a invalidar; si es None se descartan todos.
+    """
+    if doc is None:
+        _RESOLVERES.clear()
+    else:
+        _RESOLVERES.pop(_clave_documento(doc), None)
+
+def _regla_con_valor(id_parametro):
+    # CreateHasValueParameterRule existe desde Revit 2023; antes se usa "distinto de vacío"
+    try:
+        return ParameterFilterRuleFactory.CreateHasValueParameterRule(id_parametro)
+    except AttributeError:
+        return ParameterFilterRuleFactory.CreateNotEqualsRule(id_parametro, "", True)
+
+def filtro_parametros(doc, iguales=None, con_valor=(), resolver=None):
+    """
+    Construye un ElementParameterFilter para que Revit descarte los elementos dentro del
+    colector nativo, sin traerlos a Python para leerles el parámetro.
+
+    :param doc: Documento activo.
+    :param iguales: {nombre: entero} parámetros compartidos enteros que deben tener ese valor.
+    :param con_valor: Nombres de parámetros compartidos que deben tener valor.
+    :param resolver: ParameterResolver del documento (se obtiene si no se indica).
+    :return: ElementParameterFilter, o None si algún nombre no es un parámetro compartido
+             único del documento (en ese caso hay que filtrar en Python).
+    """
+    resolver = resolver or resolver_parametros(doc)
+    reglas = List[FilterRule]()
+    for nombre, valor in (iguales or {}).items():
+        id_parametro = resolver.ids.get(nombre)
+        if id_parametro is None:
+            return None
+        reglas.Add(ParameterFilterRuleFactory.CreateEqualsRule(id_parametro, valor))
+    for nombre in con_valor:
+        id_parametro = resolver.ids.get(nombre)
+        if id_parametro is None:
+            return None
+        reglas.Add(_regla_con_valor(id_parametro))
+    return ElementParameterFilter(reglas) if reglas.Count else None
+
+def _entero_igual(elemento, nombre, valor):
+    param = elemento.LookupParameter(nombre)
+    return bool(param) and param.StorageType == StorageType.Integer and param.AsInteger() == valor
+
+def elementos_cobie(doc, elementos=None, nombre="COBie", resolver=None):
+    """
+    Elementos con el parámetro COBie activado (= 1). El filtro se evalúa en el colector
+    de Revit; solo si COBie no es un parámetro compartido único se revisa en Python.
+
+    :param doc: Documento activo.
+    :param elementos: Elementos entre los que buscar; si es None, todas las instancias del modelo.
+    :param nombre: Nombre del parámetro entero que marca los elementos COBie.
+    :param resolver: ParameterResolver del documento (se obtiene si no se indica).
+    :return: Elementos con COBie activo, en el orden del colector.
+    """
+    filtro = filtro_parametros(doc, {nombre: 1}, resolver=resolver)
+    if elementos is None:
+        colector = FilteredElementCollector(doc).WhereElementIsNotElementType()
+        if filtro is not None:
+            return colector.WherePasses(filtro)
+        return (e for e in colector if _entero_igual(e, nombre, 1))
+    if filtro is None:
+        # Sin filtro nativo no se puede recorrer un colector sobre ids sin filtrar
+        return (e for e in elementos if e is not None and _entero_igual(e, nombre, 1))
+    ids = List[ElementId]([e.Id for e in elementos if e is not None])
+    if not ids.Count:
+        return []
+    return FilteredElementCollector(doc, ids).WherePasses(filtro)
+
+class ElementCache(object):
+    """
+    Caché LRU de elementos de un documento por ElementId, para tipos, niveles y demás
+    elementos que muchas instancias comparten. Cada acierto evita una llamada a
+    doc.GetElement; los documentos de vínculos se guardan aparte, por instancia de vínculo.
+    Los elementos guardados que ya no son válidos (borrados o deshechos) se vuelven a
+    leer del documento en lugar de devolverse.
+    """
+
+    def __init__(self, doc, tamano=TAMANO_CACHE_ELEMENTOS):
+        """
+        :param doc: Documento del que se leen los elementos.
+        :param tamano: Máximo de elementos guardados.
+        """
+        self.doc = doc
+        self.tamano = tamano
+        self._elementos = OrderedDict()     # {IntegerValue: Element}, del menos al más usado
+        self._vinculos = {}                 # {IntegerValue del vínculo: Document o None}
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartados = 0
+
+    def __len__(self):
+        return len(self._elementos)
+
+    def elemento(self, element_id):
+        """
+        :param element_id: ElementId del elemento.
+        :return: Elemento del documento (None si el id es inválido o no existe).
+        """
+        if element_id is None or element_id == ElementId.InvalidElementId:
+            return None
+        clave = element_id.IntegerValue
+        elementos = self._elementos
+        if clave in elementos:
+            elemento = elementos.pop(clave)
+            if elemento.IsValidObject:
+                self.aciertos += 1
+                elementos[clave] = elemento
+                return elemento
+        self.fallos += 1
+        elemento = self.doc.GetElement(element_id)
+        if elemento is None:
+            # No se guarda: un Undo puede volver a crear el elemento con ese id
+            return None
+        elementos[clave] = elemento
+        if len(elementos) > self.tamano:
+            elementos.popitem(last=False)
+            self.descartados += 1
+        return elemento
+
+    def tipo(self, element):
+        """
+        :param element: Instancia.
+        :return: Tipo del elemento (None si no tiene).
+        """
+        return self.elemento(element.GetTypeId()) if element is not None else None
+
+    def nivel(self, level_id):
+        """
+        :param level_id: ElementId del nivel (por ejemplo, element.LevelId).
+        :return: Nivel (None si el id es inválido).
+        """
+        return self.elemento(level_id)
+
+    def documento_vinculo(self, link_instance):
+        """
+        :param link_instance: RevitLinkInstance.
+        :return: Documento vinculado (None si el vínculo no está cargado).
+        """
+        clave = link_instance.Id.IntegerValue
+        documento = self._vinculos.get(clave)
+        if documento is not None and documento.IsValidObject:
+            self.aciertos += 1
+            return documento
+        self.fallos += 1
+        documento = link_instance.GetLinkDocument()
+        self._vinculos[clave] = documento
+        return documento
+
+    def limpiar(self):
+        """Olvida los elementos guardados (por ejemplo, tras borrar elementos)."""
+        self._elementos.clear()
+        self._vinculos.clear()
+
+    def resumen(self):
+        """
+        :return: Texto con aciertos, fallos y llamadas a la API evitadas.
+        """
+        consultas = self.aciertos + self.fallos
+        porcentaje = 100.0 * self.aciertos / consultas if consultas else 0.0
+        return "Caché de elementos: {} consultas, {} llamadas a la API evitadas ({:.0f}%), {} descartados".format(
+            consultas, self.aciertos, porcentaje, self.descartados)
+
+def cache_elementos(doc):
+    """
+    Crea el ElementCache de una ejecución del botón. No se guarda entre ejecuciones:
+    guarda objetos Element vivos, que el usuario puede borrar o deshacer entre una
+    ejecución y la siguiente.
+
+    :param doc: Documento activo.
+    :return: ElementCache nuevo del documento.
+    """
+    return ElementCache(doc)
+
+def leer_parametros(doc, elementos, nombres, resolver=None, solo_editables=True):
+    """
+    Lee varios parámetros de muchos elementos en una sola pasada y los entrega como una
+    tabla por columnas de datos Python (sin objetos de Revit salvo ElementId), para que
+    la lógica posterior no vuelva a consultar el modelo.
+
+    :param doc: Documento activo.
+    :param elementos: Elementos o ElementIds.
+    :param nombres: Nombres de los parámetros a leer.
+    :param resolver: ParameterResolver a usar (por defecto, el del documento).
+    :param solo_editables: Si es True, los parámetros de solo lectura se leen como None
+                           (mismo criterio que getParameter).
+    :return: MatrixTable con las columnas ["ElementId"] + nombres, una fila por elemento
+             en el mismo orden recibido e indexada por "ElementId" (los ids que no
+             existen quedan con todos sus valores en None).
+    """
+    resolver = resolver or resolver_parametros(doc)
+    filas = []
+    for elemento in elementos:
+        if isinstance(elemento, ElementId):
+            id_elemento = elemento
+            elemento = doc.GetElement(id_elemento)
+            if elemento is None:
+                filas.append([id_elemento.IntegerValue] + [None] * len(nombres))
+                continue
+        fila = [elemento.Id.IntegerValue]
+        for nombre in nombres:
+            param = resolver.parametro(elemento, nombre)
+            if not param or (solo_editables and param.IsReadOnly):
+                fila.append(None)
+                continue
+            accesor = _ACCESORES.get(param.StorageType)
+            fila.append(accesor.leer(param) if accesor is not None else None)
+        filas.append(fila)
+    return MatrixTable(["ElementId"] + list(nombres), filas, indices=["ElementId"])
+
+class ParameterWriteBatch(object):
+    """
+    Lote de escrituras de parámetros. Se juntan los pares (parámetro, valor) y al aplicar
+    solo se llama a Set cuando el valor realmente cambia, de modo que en modelos
+    colaborativos no se marcan como modificados elementos que quedan igual.
+    """
+
+    def __init__(self):
+        self._pendientes = []
+        # {(nombre, StorageType): AccesorParametro}: un parámetro de proyecto y uno de familia
+        # pueden compartir nombre con distinto tipo de almacenamiento
+        self._accesores = {}
+        self.estadisticas = {}      # {nombre: {"cambiados", "sin_cambios", "errores"}}
+        self.elementos_modificados = set()
+
+    def __len__(self):
+        return len(self._pendientes)
+
+    def agregar(self, element, parameter, new_value, nombre=None):
+        """
+        Agrega una escritura al lote (no escribe todavía).
+
+        :param element: Elemento dueño del parámetro.
+        :param parameter: Parámetro de Revit a escribir.
+        :param new_value: Nuevo valor (se adapta según el tipo de parámetro).
+        :param nombre: Nombre de la definición; agrupa las estadísticas
+                       (por defecto, el nombre de la definición del parámetro).
+        :return: True si se agregó, False si el parámetro no existe o es de solo lectura.
+        """
+        if not parameter or parameter.IsReadOnly:
+            return False
+        nombre = nombre or parameter.Definition.Name
+        clave = (nombre, parameter.StorageType)
+        if clave not in self._accesores:
+            accesor = accesor_de(parameter)
+            if accesor is None:
+                return False
+            self._accesores[clave] = accesor
+        self._pendientes.append((element, parameter, new_value, nombre, self._accesores[clave]))
+        return True
+
+    def aplicar(self):
+        """
+        Escribe los valores que cambian. Debe llamarse dentro de una transacción.
+
+        :return: Estadísticas por parámetro {nombre: {"cambiados", "sin_cambios", "errores"}}.
+        """
+        for element, parameter, new_value, nombre, accesor in self._pendientes:
+            conteo = self.estadisticas.setdefault(nombre, {"cambiados": 0, "sin_cambios": 0, "errores": 0})
+            try:
+                resultado = accesor.escribir(parameter, new_value)
+            except Exception:
+                resultado = "errores"
+            conteo[resultado] += 1
+            if resultado == "cambiados" and element is not None:
+                self.elementos_modificados.add(element.Id.IntegerValue)
+        self._pendientes = []
+        return self.estadisticas
+
+    def cambiados(self):
+        """
+        :return: {nombre: cantidad de valores escritos} solo de los parámetros con cambios.
+        """
+        return dict((nombre, conteo["cambiados"]) for nombre, conteo in self.estadisticas.items()
+                    if conteo["cambiados"])
+
+    def total(self, campo):
+        """
+        :param campo: "cambiados", "sin_cambios" o "errores".
+        :return: Suma del campo en todos los parámetros.
+        """
+        return sum(conteo[campo] for conteo in self.estadisticas.values())
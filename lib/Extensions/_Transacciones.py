@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Escrituras masivas confirmadas por bloques.
+Los elementos se procesan en bloques de N, cada bloque en su propia Transaction dentro
+de un TransactionGroup que al final se asimila en un unico paso de deshacer. Asi Revit
+no acumula los registros de deshacer de toda la seleccion en una sola transaccion y, si
+el usuario cancela, lo ya confirmado se conserva. Los elementos de cada bloque
+confirmado se registran en disco, junto con una huella del alcance (ids de los
+elementos y huella de la matriz), para poder reanudar una ejecucion interrumpida solo
+si se vuelve a ejecutar sobre los mismos elementos con la misma matriz.
+"""
+
+import hashlib
+import time
+
+from Autodesk.Revit.DB import Transaction, TransactionGroup
+from Helper import _MatrixCache
+
+TAMANO_BLOQUE = 1000
+
+
+def _id_elemento(elemento):
+    return elemento.Id.IntegerValue
+
+
+def _nombre_estado(doc, clave):
+    documento = u"{}|{}".format(doc.PathName or doc.Title, clave)
+    return "bloques_" + hashlib.md5(documento.encode("utf-8")).hexdigest()
+
+
+def _huella_alcance(ids, matriz):
+    texto = u"{}|{}".format(",".join(str(i) for i in sorted(ids)),
+                            _MatrixCache.huella_archivo(matriz) if matriz else None)
+    return hashlib.md5(texto.encode("utf-8")).hexdigest()
+
+
+class ChunkedTransaction(object):
+    """
+    Ejecuta una función por elemento en bloques confirmados por separado, dentro de un
+    TransactionGroup. Entre bloques se consulta la cancelación y se informa el avance.
+    """
+
+    def __init__(self, doc, nombre, tamano_bloque=TAMANO_BLOQUE, cancelado=None, progreso=None, reanudar=None,
+                 matriz=None, informar=True):
+        """
+        :param doc: Documento activo.
+        :param nombre: Nombre del grupo de transacciones (cada bloque agrega "(i/n)").
+        :param tamano_bloque: Cantidad de elementos por transacción.
+        :param cancelado: Función sin argumentos que devuelve True para detener el proceso
+                          antes del siguiente bloque (por ejemplo, lambda: pb.cancelled).
+        :param progreso: Función progreso(hechos, total) llamada tras cada bloque confirmado
+                         (por ejemplo, pb.update_progress).
+        :param reanudar: Clave del proceso (por ejemplo, "component"); si se indica, los
+                         elementos confirmados se guardan para omitirlos en la siguiente ejecución.
+        :param matriz: Ruta de la matriz aplicada; si cambia, no se ofrece reanudar.
+        :param informar: Si es True, imprime el rendimiento de cada bloque.
+        """
+        self.doc = doc
+        self.nombre = nombre
+        self.tamano_bloque = max(1, int(tamano_bloque))
+        self.informar = informar
+        self._cancelado = cancelado or (lambda: False)
+        self._progreso = progreso
+        self._estado = _nombre_estado(doc, reanudar) if reanudar else None
+        self._matriz = matriz
+        self._completados = set()
+        self._descartado = False
+        self.bloques = []               # [(elementos, segundos)] de cada bloque confirmado
+        self.procesados = 0
+        self.omitidos = 0               # ya confirmados en una ejecución anterior
+        self.cancelado = False
+        self.completo = False
+
+    def _leer_completados(self, ids):
+        # El avance guardado solo vale para el mismo alcance y la misma matriz
+        if not self._estado or self._descartado:
+            return set()
+        estado = _MatrixCache.leer_estado(self._estado)
+        if not isinstance(estado, dict) or estado.get("huella") != _huella_alcance(ids, self._matriz):
+            return set()
+        return set(estado.get("completados") or [])
+
+    def progreso_anterior(self, elementos, clave=_id_elemento):
+        """
+        :param elementos: Elementos que se van a procesar (el mismo alcance que procesar).
+        :param clave: Función que obtiene el id entero de cada elemento.
+        :return: Cantidad de esos elementos confirmados por una ejecución anterior interrumpida
+                 sobre el mismo alcance y con la misma matriz (0 si no hay nada que reanudar).
+        """
+        ids = [clave(e) for e in elementos]
+        completados = self._leer_completados(ids)
+        return sum(1 for i in ids if i in completados)
+
+    def descartar_progreso(self):
+        """Olvida el avance de la ejecución anterior: se vuelven a procesar todos los elementos."""
+        self._descartado = True
+        if self._estado:
+            _MatrixCache.guardar_estado(self._estado, None)
+
+    def procesar(self, elementos, funcion, al_confirmar=None, clave=_id_elemento):
+        """
+        Procesa los elementos por bloques.
+
+        :param elementos: Lista de elementos (o de datos preparados por elemento).
+        :param funcion: funcion(elemento), se ejecuta dentro de la transacción del bloque.
+        :param al_confirmar: Función sin argumentos llamada al final de cada bloque, antes de
+                             confirmarlo (por ejemplo, lote.aplicar de un ParameterWriteBatch).
+        :param clave: Función que obtiene el id entero de cada elemento para reanudar.
+        :return: True si se procesaron todos los elementos, False si se canceló.
+        """
+        ids = [clave(e) for e in elementos]
+        huella = _huella_alcance(ids, self._matriz)
+        self._completados = self._leer_completados(ids)
+        pendientes = [e for e in elementos if clave(e) not in self._completados]
+        self.omitidos = len(elementos) - len(pendientes)
+        if self.omitidos and self.informar:
+            print("Reanudando '{}': {} elementos ya confirmados se omiten".format(self.nombre, self.omitidos))
+        total_bloques = (len(pendientes) + self.tamano_bloque - 1) // self.tamano_bloque
+
+        grupo = TransactionGroup(self.doc, self.nombre)
+        grupo.Start()
+        try:
+            for numero, inicio in enumerate(range(0, len(pendientes), self.tamano_bloque), 1):
+                if self._cancelado():
+                    self.cancelado = True
+                    break
+                bloque = pendientes[inicio:inicio + self.tamano_bloque]
+                self._confirmar_bloque(bloque, funcion, al_confirmar, u"{} ({}/{})".format(self.nombre, numero, total_bloques))
+                self._completados.update(clave(e) for e in bloque)
+                if self._estado:
+                    _MatrixCache.guardar_estado(self._estado, {"huella": huella,
+                                                               "completados": list(self._completados)})
+                if self._progreso is not None:
+                    self._progreso(self.omitidos + self.procesados, len(elementos))
+                if self.informar:
+                    cantidad, segundos = self.bloques[-1]
+                    print("Bloque {}/{}: {} elementos en {:.2f} s ({:.0f} elementos/s)".format(
+                        numero, total_bloques, cantidad, segundos, cantidad / segundos if segundos else 0))
+        finally:
+            # Lo confirmado se conserva aunque se cancele o falle un bloque
+            grupo.Assimilate()
+
+        self.completo = not self.cancelado
+        if self.completo and self._estado:
+            _MatrixCache.guardar_estado(self._estado, None)
+        return self.completo
+
+    def _confirmar_bloque(self, bloque, funcion, al_confirmar, nombre):
+        inicio = time.time()
+        transaccion = Transaction(self.doc, nombre)
+        transaccion.Start()
+        try:
+            for elemento in bloque:
+                funcion(elemento)
+            if al_confirmar is not None:
+                al_confirmar()
+            transaccion.Commit()
+        except Exception:
+            transaccion.RollBack()
+            raise
+        self.procesados += len(bloque)
+        self.bloques.append((len(bloque), time.time() - inicio))
+
+    def resumen(self):
+        """
+        :return: Texto con elementos procesados, bloques y rendimiento medio.
+        """
+        segundos = sum(s for _, s in self.bloques)
+        texto = "{} elementos en {} bloques, {:.2f} s ({:.0f} elementos/s)".format(
+            self.procesados, len(self.bloques), segundos, self.procesados / segundos if segundos else 0)
+        if self.omitidos:
+            texto += "; {} ya confirmados antes".format(self.omitidos)
+        if self.cancelado:
+            texto += "; cancelado por el usuario"
+        return texto
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Verificacion previa de propiedad en modelos colaborativos.
+Antes de escribir, se consulta el estado de reserva de todo el alcance de una vez, se
+reservan en una sola llamada a CheckoutElements los elementos libres y se quitan de la
+lista de trabajo los que pertenecen a otro usuario o estan desactualizados respecto al
+central. Asi ninguna escritura falla a mitad de la transaccion por un elemento ajeno.
+"""
+
+from Autodesk.Revit.DB import WorksharingUtils, CheckoutStatus, ModelUpdatesStatus, ElementId
+from System.Collections.Generic import List
+
+SIN_PROPIETARIO = "(desconocido)"
+
+
+class WorksharingScan(object):
+    """
+    Resultado de la verificacion: elementos disponibles (en el orden recibido) y los
+    excluidos agrupados por motivo.
+    """
+
+    def __init__(self, disponibles):
+        self.disponibles = disponibles
+        self.de_otros = {}              # {usuario: [ElementId]}
+        self.desactualizados = []       # [ElementId] modificados en el central sin recargar
+        self.no_reservados = []         # [ElementId] que CheckoutElements no pudo reservar
+        self.reservados = 0
+        self._excluidos = set()
+
+    def excluir(self, element_id, motivo, usuario=None):
+        self._excluidos.add(element_id.IntegerValue)
+        if motivo == "de_otros":
+            self.de_otros.setdefault(usuario or SIN_PROPIETARIO, []).append(element_id)
+        else:
+            getattr(self, motivo).append(element_id)
+
+    def editable(self, element_id):
+        """
+        :param element_id: ElementId de un elemento del alcance verificado.
+        :return: False si el elemento quedó excluido.
+        """
+        return element_id.IntegerValue not in self._excluidos
+
+    def excluidos(self):
+        """
+        :return: Cantidad de elementos quitados de la lista de trabajo.
+        """
+        return len(self._excluidos)
+
+    def informe(self, output=None, enlazar=20):
+        """
+        Imprime los elementos excluidos por motivo.
+
+        :param output: Salida de pyRevit (script.get_output()); si es None se usa print.
+        :param enlazar: Máximo de ids con enlace por grupo.
+        """
+        if not self._excluidos:
+            return
+
+        def escribir(texto):
+            if output is not None:
+                output.print_md(texto)
+            else:
+                print(texto)
+
+        def ids(lista):
+            texto = output.linkify(lista[:enlazar]) if output is not None else ", ".join(str(i) for i in lista[:enlazar])
+            return texto + (" (+{})".format(len(lista) - enlazar) if len(lista) > enlazar else "")
+
+        escribir("⚠️ Worksharing: {} elementos excluidos antes de procesar".format(len(self._excluidos)))
+        for usuario, lista in sorted(self.de_otros.items()):
+            escribir("- Reservados por **{}** ({}): {}".format(usuario, len(lista), ids(lista)))
+        if self.desactualizados:
+            escribir("- Desactualizados, requieren recargar del central ({}): {}".format(
+                len(self.desactualizados), ids(self.desactualizados)))
+        if self.no_reservados:
+            escribir("- No se pudieron reservar ({}): {}".format(len(self.no_reservados), ids(self.no_reservados)))
+
+
+def _propietario(doc, element_id):
+    try:
+        return WorksharingUtils.GetWorksharingTooltipInfo(doc, element_id).Owner or SIN_PROPIETARIO
+    except Exception:
+        return SIN_PROPIETARIO
+
+
+def reservar_elementos(doc, elementos):
+    """
+    Verifica la propiedad de todos los elementos y reserva los libres en una sola llamada.
+    En un modelo no colaborativo todos quedan disponibles sin consultar nada.
+
+    :param doc: Documento activo.
+    :param elementos: Elementos a escribir (se ignoran None y repetidos).
+    :return: WorksharingScan con la lista de disponibles y los excluidos.
+    """
+    if not doc.IsWorkshared:
+        return WorksharingScan([e for e in elementos if e is not None])
+
+    resultado = WorksharingScan([])
+    vistos = set()
+    candidatos = []
+    por_reservar = List[ElementId]()
+    for elem in elementos:
+        if elem is None or elem.Id.IntegerValue in vistos:
+            continue
+        vistos.add(elem.Id.IntegerValue)
+        estado = WorksharingUtils.GetCheckoutStatus(doc, elem.Id)
+        if estado == CheckoutStatus.OwnedByOtherUser:
+            resultado.excluir(elem.Id, "de_otros", _propietario(doc, elem.Id))
+            continue
+        actualizacion = WorksharingUtils.GetModelUpdatesStatus(doc, elem.Id)
+        if actualizacion in (ModelUpdatesStatus.UpdatedInCentral, ModelUpdatesStatus.DeletedInCentral):
+            resultado.excluir(elem.Id, "desactualizados")
+            continue
+        if estado != CheckoutStatus.OwnedByCurrentUser:
+            por_reservar.Add(elem.Id)
+        candidatos.append(elem)
+
+    reservados = set()
+    if por_reservar.Count:
+        try:
+            reservados = set(i.IntegerValue for i in WorksharingUtils.CheckoutElements(doc, por_reservar))
+        except Exception as e:
+            print("No se pudieron reservar los elementos: {}".format(e))
+        resultado.reservados = len(reservados)
+    pedidos = set(i.IntegerValue for i in por_reservar)
+
+    for elem in candidatos:
+        if elem.Id.IntegerValue in pedidos and elem.Id.IntegerValue not in reservados:
+            resultado.excluir(elem.Id, "no_reservados")
+        else:
+            resultado.disponibles.append(elem)
+    return resultado
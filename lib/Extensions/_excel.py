@@ -1,75 +1,81 @@
 # -*- coding: utf-8 -*-
+"""
+Lectores de Excel de uso general (maestro de elementos y tabla Uniclass).
+Todos leen a traves de Helper._Excel, por lo que comparten el libro abierto,
+las tablas ya proyectadas y la cache en disco con el resto de botones.
+"""
 
 from Autodesk.Revit.DB import BuiltInCategory
 from pyrevit import forms
-from pyrevit.interop import xl
+from Helper._Excel import Excel as ExcelMatriz
+from Helper._UniclassIndex import cargar_indice, COLUMNA_CODIGO, SISTEMAS
 
-uniclass_dict = {}
-master_dict = {}
+COLUMNAS_MAESTRO = ["Descripción de elemento", "Sistema", "Especialidad", "Sub Especialidad"]
 
 class Excel:
+    def __init__(self, tipo="maestro"):
+        self._excel = ExcelMatriz(tipo=tipo)
+
     def get_Excel(self, nombre_sheet):
-        ruta = forms.pick_excel_file()
-        if not ruta:
-            forms.alert("No se selecciono archivo excel.", exitscript=True)
-            return []
-        
-        excel_file = xl.load(ruta, sheets=nombre_sheet, headers=True)
-        filas = excel_file.get(nombre_sheet, {}).get("rows", [])
-        
-        encabezados = [h.strip() for h in excel_file[nombre_sheet]["headers"]]
-        
-        index_desc = encabezados.index("Descripción de elemento")
-        index_sistema = encabezados.index("Sistema")
-        index_espec = encabezados.index("Especialidad")
-        index_sub = encabezados.index("Sub Especialidad")
-        
-        for fila in filas:
-            descripcion = str(fila[index_desc]).strip()
+        """
+        Lee el maestro de elementos indexado por su descripción.
+
+        :param nombre_sheet: Hoja del maestro (encabezados en la primera fila).
+        :return: {descripcion: {"Sistema", "Especialidad", "Sub Especialidad"}}
+        """
+        tabla = self._excel.read_table(nombre_sheet, COLUMNAS_MAESTRO, 0, 1)
+        if self._excel.columnas_faltantes:
+            forms.alert("No se encontraron las columnas: {}".format(", ".join(self._excel.columnas_faltantes)), exitscript=True)
+            return {}
+
+        master_dict = {}
+        for fila in tabla:
+            descripcion = str(fila["Descripción de elemento"]).strip()
             master_dict[descripcion] = {
-                "Sistema" : fila[index_sistema],
-                "Especialidad" : fila[index_espec],
-                "Sub Especialidad" : fila[index_sub],
+                "Sistema" : fila["Sistema"],
+                "Especialidad" : fila["Especialidad"],
+                "Sub Especialidad" : fila["Sub Especialidad"],
             }
         return master_dict
-    
+
     def read_excel(self, nombre_sheet):
-        ruta = forms.pick_excel_file()
-        if not ruta:
-            forms.alert("No se selecciono archivo excel.", exitscript=True)
-        
-        excel_file = xl.load(ruta, sheets=nombre_sheet, headers=True)
-        filas = excel_file.get(nombre_sheet, {}).get("rows", [])
-        
-        return [excel_file, filas]
+        """
+        Lee una hoja completa con la primera fila como encabezados.
+
+        :return: [{nombre_sheet: {"headers": [...], "rows": [...]}}, filas]
+        """
+        filas = self._excel.read_excel(nombre_sheet)
+        encabezados = [str(h).strip() for h in filas[0]] if filas else []
+        datos = filas[1:]
+
+        return [{nombre_sheet: {"headers": encabezados, "rows": datos}}, datos]
+
+    def invalidar(self):
+        """Descarta lo cargado del archivo para volver a leerlo en la siguiente llamada."""
+        self._excel.invalidar()
+
+def get_excel_uniclass(nombre_sheet, excel=None):
+    """
+    Obtiene la tabla Uniclass indexada por 'Código'.
+    Usa el mismo índice que Helper._UniclassIndex, por lo que no vuelve a leer el libro.
+
+    :param nombre_sheet: Hoja de la tabla Uniclass.
+    :param excel: Instancia de Helper._Excel.Excel a reutilizar (opcional).
+    :return: {codigo: {"Classification.Uniclass.XX.Number/Description": valor}}
+    """
+    excel = excel or ExcelMatriz(tipo="uniclass")
+    indice = cargar_indice(excel, nombre_sheet)
+    if indice is None:
+        forms.alert("No se encontró la tabla Uniclass en la hoja '{}'.".format(nombre_sheet), exitscript=True)
+        return {}
 
-def get_excel_uniclass(nombre_sheet):
-    ruta = forms.pick_excel_file()
-    if not ruta:
-        forms.alert("No se seleccionó ningún archivo uniclass.", exitscript=True)
-        return []
-    
-    datos = xl.load(ruta, sheets=nombre_sheet, headers=True)
-    filas = datos.get(nombre_sheet, {}).get("rows", [])
-    
-    encabezados = [h.strip() for h in datos[nombre_sheet]["headers"]]
-    
-    index_codigo = encabezados.index("Código")
-    index_EF_number = encabezados.index("Classification.Uniclass.EF.Number")
-    index_EF_desc = encabezados.index("Classification.Uniclass.EF.Description")
-    index_Pr_number = encabezados.index("Classification.Uniclass.Pr.Number")
-    index_Pr_desc = encabezados.index("Classification.Uniclass.Pr.Description")
-    index_Ss_number = encabezados.index("Classification.Uniclass.Ss.Number")
-    index_Ss_desc = encabezados.index("Classification.Uniclass.Ss.Description")
-    
-    for fila in filas:
-        codigo = str(fila[index_codigo]).strip()
-        uniclass_dict[codigo] = {
-            "Classification.Uniclass.EF.Number": fila[index_EF_number],
-            "Classification.Uniclass.EF.Description": fila[index_EF_desc],
-            "Classification.Uniclass.Pr.Number": fila[index_Pr_number],
-            "Classification.Uniclass.Pr.Description": fila[index_Pr_desc],
-            "Classification.Uniclass.Ss.Number": fila[index_Ss_number],
-            "Classification.Uniclass.Ss.Description": fila[index_Ss_desc]
-        }
-    return uniclass_dict
\ No newline at end of file
+    uniclass_dict = {}
+    for codigo in indice.codigos():
+        fila = indice.por_codigo(codigo)
+        datos = {}
+        for sistema in SISTEMAS:
+            for campo in ("Number", "Description"):
+                columna = "Classification.Uniclass.{}.{}".format(sistema, campo)
+                datos[columna] = fila.get(columna)
+        uniclass_dict[codigo] = datos
+    return uniclass_dict
@@ -1,18 +1,155 @@
 # -*- coding: utf-8 -*-
 
+import os
+import threading
+import time
 from Autodesk.Revit.DB import BuiltInCategory
 from pyrevit import forms, revit
-from pyrevit.interop import xl
+from Helper._Workbook import Workbook, resolver_encabezados
+from Helper import _MatrixCache, _SessionCache
+from Helper._MatrixTable import MatrixTable
+from Helper._MatrixSnapshot import MatrixSnapshot, es_snapshot
+from Helper._Prefetch import ejecutar_en_paralelo
+
+OPCION_ULTIMA_MATRIZ = "Usar la última matriz"
+OPCION_OTRA_MATRIZ = "Elegir otra matriz"
+FILTRO_MATRIZ = "Matriz COBie (*.xlsx;*.sqlite)|*.xlsx;*.sqlite"
+FILTRO_EXCEL = "Excel (*.xlsx)|*.xlsx"
+
+# ==== Sesion compartida por todas las instancias de Excel ====
+# Un archivo se abre una sola vez y cada proyeccion de hoja se construye una sola vez,
+# sin importar que boton o modulo la pida. Se descarta con invalidar().
+# Las proyecciones tambien quedan en _SessionCache, que sobrevive entre botones.
+_FUENTES = {}   # {ruta: (huella, Workbook o MatrixSnapshot)}
+_TABLAS = {}    # {(ruta, huella, hoja, columnas, start_row, start_data, tipos): (tabla, faltantes)}
+_BLOQUEO = threading.RLock()
+
+
+def _clave_ruta(ruta):
+    return os.path.normcase(os.path.abspath(ruta))
+
+
+def abrir_fuente(ruta):
+    """
+    Obtiene el libro (o snapshot SQLite) compartido de un archivo.
+    Si el archivo cambio desde que se abrio, se descarta lo cargado en memoria.
+    
+    Args:
+        ruta (str): Ruta del archivo
+    
+    Returns:
+        Workbook: Libro abierto, o MatrixSnapshot si la ruta es un snapshot
+    """
+    with _BLOQUEO:
+        clave = _clave_ruta(ruta)
+        huella = _MatrixCache.huella_archivo(ruta)
+        entrada = _FUENTES.get(clave)
+        if entrada is not None and entrada[0] == huella:
+            return entrada[1]
+        if entrada is not None:
+            invalidar(ruta, disco=False)
+        fuente = MatrixSnapshot(ruta) if es_snapshot(ruta) else Workbook(ruta)
+        _FUENTES[clave] = (huella, fuente)
+        return fuente
+
+
+def liberar_archivos():
+    """
+    Cierra los archivos que las fuentes compartidas mantienen abiertos, conservando lo
+    ya cargado en memoria. Los botones la llaman al terminar para no dejar la matriz
+    bloqueada; si se vuelve a leer, la fuente reabre el archivo.
+    Los libros xlsx solo abren el zip durante cada lectura; los snapshots cierran su
+    conexion SQLite.
+    """
+    with _BLOQUEO:
+        for _, fuente in _FUENTES.values():
+            if isinstance(fuente, MatrixSnapshot):
+                fuente.cerrar()
+
+
+def invalidar(ruta=None, disco=True):
+    """
+    Descarta los libros y tablas cargados en memoria y, opcionalmente, la cache en disco.
+    
+    Args:
+        ruta (str): Archivo a invalidar; si es None se invalidan todos
+        disco (bool): Si es True tambien se borra la cache en disco
+    """
+    with _BLOQUEO:
+        clave = _clave_ruta(ruta) if ruta else None
+        for k in list(_FUENTES):
+            if clave is None or k == clave:
+                _FUENTES.pop(k)[1].cerrar()
+        for k in list(_TABLAS):
+            if clave is None or k[0] == clave:
+                del _TABLAS[k]
+    _SessionCache.invalidar(ruta)
+    
+    if disco:
+        if ruta:
+            _MatrixCache.invalidar(ruta)
+        else:
+            _MatrixCache.limpiar()
+
 
 class Excel:
-    def __init__(self):
-        """Inicializa la clase Excel con ruta de archivo None."""
+    def __init__(self, tipo="matriz"):
+        """
+        Inicializa la clase Excel con ruta de archivo None.
+        
+        Args:
+            tipo (str): Tipo de archivo que se elige ("matriz" o "uniclass"); cada tipo
+                        recuerda su propio último archivo usado
+        """
+        self.tipo = tipo
         self.ruta_archivo = None
+        self.columnas_faltantes = []
+        self.columnas_faltantes_por_tabla = {}
+        self.tiempos = {}
+        self.tiempo_total = None
+    
+    def select_file(self, reuse=True):
+        """
+        Elige la matriz Excel a usar. Si existe una matriz usada anteriormente,
+        ofrece reutilizarla en lugar de volver a buscarla.
+        
+        Args:
+            reuse (bool): Si es True, ofrece reutilizar la última matriz usada
+        
+        Returns:
+            str: Ruta del archivo seleccionado
+        """
+        if self.ruta_archivo is not None:
+            return self.ruta_archivo
+        
+        es_matriz = (self.tipo == "matriz")
+        ultima = _MatrixCache.leer_ultima_matriz(self.tipo) if reuse else None
+        if ultima and os.path.exists(ultima):
+            opcion = forms.CommandSwitchWindow.show(
+                [OPCION_ULTIMA_MATRIZ, OPCION_OTRA_MATRIZ],
+                message="{}: {}".format("Matriz COBie" if es_matriz else "Excel {}".format(self.tipo),
+                                        os.path.basename(ultima))
+            )
+            if not opcion:
+                forms.alert("No se seleccionó ningún archivo.", exitscript=True)
+                return None
+            if opcion == OPCION_ULTIMA_MATRIZ:
+                self.ruta_archivo = ultima
+        
+        if self.ruta_archivo is None:
+            # Se acepta tambien el snapshot compilado con Helper._MatrixCompiler
+            self.ruta_archivo = forms.pick_file(files_filter=FILTRO_MATRIZ if es_matriz else FILTRO_EXCEL)
+            if not self.ruta_archivo:
+                forms.alert("No se seleccionó ningún archivo.", exitscript=True)
+                return None
+        
+        _MatrixCache.guardar_ultima_matriz(self.ruta_archivo, self.tipo)
+        return self.ruta_archivo
     
     def read_excel(self, hoja, encabezados=False):
         """
         Lee un archivo Excel. Si ya se seleccionó un archivo anteriormente,
-        usa ese mismo archivo para leer otras hojas.
+        usa ese mismo archivo (ya abierto) para leer otras hojas sin volver a parsearlo.
 
         :param hoja: El nombre de la hoja de cálculo.
         :type hoja: str
@@ -22,21 +159,35 @@ class Excel:
         :rtype: list
         """
         # Solo pedir el archivo si no se ha seleccionado antes
-        if self.ruta_archivo is None:
-            self.ruta_archivo = forms.pick_excel_file()
-            if not self.ruta_archivo:
-                forms.alert("No se seleccionó ningún archivo.", exitscript=True)
-                return []
+        if not self.select_file():
+            return []
         
-        # Usar la ruta guardada
-        datos = xl.load(self.ruta_archivo, sheets=str(hoja), headers=encabezados)
-        filas = datos.get(hoja, {}).get('rows', [])
+        # Un snapshot solo guarda las columnas proyectadas, no la hoja completa
+        if es_snapshot(self.ruta_archivo):
+            forms.alert("La hoja '{}' debe leerse completa y el archivo elegido es un snapshot "
+                        "SQLite.\nElige el archivo Excel (.xlsx).".format(hoja))
+            return []
+        
+        filas = self._abrir_libro().filas(str(hoja))
+        if encabezados:
+            filas = filas[1:]
         
         return filas
     
     def reset_file(self):
         """Resetea la ruta del archivo para permitir seleccionar uno nuevo."""
         self.ruta_archivo = None
+        self.columnas_faltantes = []
+    
+    def invalidar(self, disco=True):
+        """
+        Descarta lo cargado del archivo seleccionado para forzar una nueva lectura.
+        
+        Args:
+            disco (bool): Si es True tambien se borra su cache en disco
+        """
+        if self.ruta_archivo:
+            invalidar(self.ruta_archivo, disco)
     
     def get_headers(self, rows, start_row = 0):
         """
@@ -72,16 +223,7 @@ class Excel:
         Returns:
             dict: Diccionario existente {nombre_columna: indice}. Si alguna falta → None
         """
-        
-        found = {}
-        for col in columns_name:
-            idx = None
-            for i, h in headers.items():
-                if h == col:
-                    idx = i
-                    break
-            found[col] = idx
-        return found
+        return resolver_encabezados(headers, columns_name)
     
     def get_data_by_headers_required(self, rows_data, columns_required, start_data=1):
         """
@@ -93,15 +235,193 @@ class Excel:
             start_data (int): Fila desde donde empiezan los datos (default: 1)
         
         Returns:
-            list: Lista de dicts, cada fila con sus columnas requeridas
+            MatrixTable: Filas con sus columnas requeridas; cada fila se lee como un dict
         """
-        data = []
+        columnas = list(columns_required)
+        posiciones = [columns_required[c] for c in columnas]
+        filas = []
         for r in rows_data[start_data:]:
-            row_dict = {}
-            for col_name, idx in columns_required.items():
-                if idx is not None and idx < len(r):
-                    row_dict[col_name] = r[idx]
-                else:
-                    row_dict[col_name] = None
-            data.append(row_dict)
-        return data
\ No newline at end of file
+            filas.append(tuple(r[idx] if idx is not None and idx < len(r) else None for idx in posiciones))
+        return MatrixTable(columnas, filas)
+    
+    def read_data(self, hoja, columns_name, start_row=2, start_data=3):
+        """
+        Obtiene las filas de una hoja proyectadas a las columnas requeridas.
+        Se busca primero en la cache de la sesion de Revit (compartida entre botones),
+        luego en la cache en disco, y solo si el Excel cambio se vuelve a leer.
+        
+        Args:
+            hoja (str): Nombre de la hoja
+            columns_name (list): Lista de nombres de columnas requeridas
+            start_row (int): Fila de los encabezados (default: 2)
+            start_data (int): Fila desde donde empiezan los datos (default: 3)
+        
+        Returns:
+            list: Lista de dicts, cada fila con sus columnas requeridas
+        """
+        if not self.select_file():
+            return []
+        
+        if es_snapshot(self.ruta_archivo):
+            return [dict(fila) for fila in self.read_table(hoja, columns_name, start_row, start_data)]
+        
+        columnas = list(columns_name)
+        return [dict(zip(columnas, fila)) for fila in self._leer_proyeccion(hoja, columnas, start_row, start_data)]
+    
+    def _leer_proyeccion(self, hoja, columnas, start_row, start_data):
+        """
+        Obtiene las filas de una hoja como tuplas en el orden de columnas, usando la cache
+        de la sesion y la cache en disco. Actualiza columnas_faltantes.
+        """
+        firma = u"{}|{}|{}".format(start_row, start_data, u"|".join(columnas))
+        
+        datos = _SessionCache.leer(self.ruta_archivo, hoja, firma)
+        if datos is None:
+            datos = _MatrixCache.leer(self.ruta_archivo, hoja, firma)
+            if datos is not None:
+                _SessionCache.guardar(self.ruta_archivo, hoja, firma, datos)
+        if datos is None:
+            libro = self._abrir_libro()
+            # El mapa de columnas de la hoja se guarda aparte: sirve para cualquier
+            # otra proyeccion de la misma hoja sin volver a descubrir los encabezados
+            firma_encabezados = u"encabezados|{}".format(start_row)
+            if libro.encabezados(str(hoja), start_row) is None:
+                encabezados = _MatrixCache.leer(self.ruta_archivo, hoja, firma_encabezados)
+                if encabezados is not None:
+                    libro.registrar_encabezados(str(hoja), start_row, encabezados)
+            
+            # Lectura en streaming: solo se decodifican las columnas requeridas
+            required, filas = libro.proyectar(str(hoja), start_row, columnas, start_data)
+            if required is None:
+                self.columnas_faltantes = list(columnas)
+                return []
+            faltantes = [c for c in columnas if required[c] is None]
+            datos = (faltantes, filas)
+            _SessionCache.guardar(self.ruta_archivo, hoja, firma, datos)
+            _MatrixCache.guardar(self.ruta_archivo, hoja, firma, datos)
+            _MatrixCache.guardar(self.ruta_archivo, hoja, firma_encabezados,
+                                 libro.encabezados(str(hoja), start_row))
+        
+        self.columnas_faltantes, filas = datos
+        return filas
+    
+    def read_table(self, hoja, columns_name, start_row=2, start_data=3, indices=None, tipos=None):
+        """
+        Obtiene una hoja como MatrixTable con indices hash sobre las columnas clave.
+        
+        Args:
+            hoja (str): Nombre de la hoja
+            columns_name (list): Lista de nombres de columnas requeridas
+            start_row (int): Fila de los encabezados (default: 2)
+            start_data (int): Fila desde donde empiezan los datos (default: 3)
+            indices (list): Columnas a indexar, por ejemplo ["CODIGO"]
+            tipos (dict): Esquema {columna: "texto" | "float" | "metros" | "fecha"};
+                          cada columna se convierte una sola vez al construir la tabla
+        
+        Returns:
+            MatrixTable: Tabla con las filas proyectadas e indexadas. Si la matriz
+            es un snapshot SQLite, una SnapshotTable que consulta las filas bajo demanda.
+        """
+        if not self.select_file():
+            return MatrixTable(columns_name, [])
+        
+        clave = (_clave_ruta(self.ruta_archivo), _MatrixCache.huella_archivo(self.ruta_archivo),
+                 hoja, tuple(columns_name), start_row, start_data, tuple(sorted((tipos or {}).items())))
+        if clave in _TABLAS:
+            tabla, self.columnas_faltantes = _TABLAS[clave]
+            # Solo se construyen los indices que la tabla compartida aun no tiene
+            for columna in indices or []:
+                tabla.asegurar_indice(columna)
+            return tabla
+        
+        if es_snapshot(self.ruta_archivo):
+            tabla, self.columnas_faltantes = self._abrir_snapshot().tabla(hoja, columns_name, tipos)
+            if tabla is None:
+                tabla = MatrixTable(columns_name, [])
+        else:
+            # Las tuplas van directo al almacen por columnas, sin pasar por un dict por fila
+            filas = self._leer_proyeccion(hoja, list(columns_name), start_row, start_data)
+            tabla = MatrixTable(columns_name, filas, indices, tipos)
+        
+        with _BLOQUEO:
+            _TABLAS[clave] = (tabla, self.columnas_faltantes)
+        return tabla
+    
+    def read_tables(self, pedidos, max_hilos=None):
+        """
+        Lee varias hojas del mismo archivo en paralelo (cada hoja en su propio hilo,
+        con un maximo de max_hilos) y junta los resultados.
+        
+        Args:
+            pedidos (dict): {nombre: dict con los argumentos de read_table}, por ejemplo
+                            {"space": {"hoja": "...", "columns_name": [...], "indices": [...]}}
+            max_hilos (int): Limite de hilos; por defecto, los nucleos disponibles
+        
+        Returns:
+            dict: {nombre: tabla}. Las columnas faltantes de cada tabla quedan en
+                  columnas_faltantes_por_tabla y los segundos de cada lectura en tiempos.
+        """
+        if not self.select_file():
+            return dict((nombre, MatrixTable(p["columns_name"], [])) for nombre, p in pedidos.items())
+        
+        def leer(argumentos):
+            # Cada hilo usa su propia instancia: columnas_faltantes no se comparte
+            lector = Excel(self.tipo)
+            lector.ruta_archivo = self.ruta_archivo
+            tabla = lector.read_table(**argumentos)
+            return tabla, lector.columnas_faltantes
+        
+        inicio = time.time()
+        tareas = dict((nombre, (leer, (argumentos,), {})) for nombre, argumentos in pedidos.items())
+        resultados, self.tiempos = ejecutar_en_paralelo(tareas, max_hilos)
+        self.tiempo_total = time.time() - inicio
+        
+        tablas = {}
+        self.columnas_faltantes = []
+        self.columnas_faltantes_por_tabla = {}
+        for nombre, (tabla, faltantes) in resultados.items():
+            tablas[nombre] = tabla
+            self.columnas_faltantes_por_tabla[nombre] = faltantes
+            self.columnas_faltantes.extend(c for c in faltantes if c not in self.columnas_faltantes)
+        return tablas
+    
+    def resumen_tiempos(self):
+        """
+        Texto con los segundos de cada hoja de la ultima lectura en paralelo.
+        La suma de las hojas frente al total muestra la ganancia por paralelismo.
+        """
+        if not self.tiempos:
+            return "Sin lecturas en paralelo"
+        lineas = ["  - {}: {:.2f} s".format(nombre, segundos) for nombre, segundos in sorted(self.tiempos.items())]
+        lineas.append("  Total: {:.2f} s (secuencial: {:.2f} s)".format(self.tiempo_total, sum(self.tiempos.values())))
+        return "\n".join(lineas)
+    
+    def buscar_hoja(self, columns_name, start_row=0):
+        """
+        Busca la primera hoja del libro cuyos encabezados contienen todas las columnas dadas.
+        Solo se lee la fila de encabezados de cada hoja.
+        
+        Args:
+            columns_name (list): Columnas que debe tener la hoja
+            start_row (int): Fila de los encabezados (default: 0)
+        
+        Returns:
+            str: Nombre de la hoja o None si ninguna coincide
+        """
+        if not self.select_file() or es_snapshot(self.ruta_archivo):
+            return None
+        
+        libro = self._abrir_libro()
+        for hoja in libro.nombres_hojas():
+            required = resolver_encabezados(libro.leer_encabezados(hoja, start_row), columns_name)
+            if all(idx is not None for idx in required.values()):
+                return hoja
+        return None
+    
+    def _abrir_libro(self):
+        """Libro compartido del archivo; las hojas se parsean al pedirlas."""
+        return abrir_fuente(self.ruta_archivo)
+    
+    def _abrir_snapshot(self):
+        """Conexion compartida al snapshot SQLite."""
+        return abrir_fuente(self.ruta_archivo)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Cache en disco de las hojas ya proyectadas de la matriz COBie.
+Cada entrada guarda las filas de una hoja (solo las columnas pedidas) en un archivo
+binario y se reutiliza mientras el tamaño y la fecha de modificacion del Excel no cambien.
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# Cambiar este numero invalida todas las entradas escritas con un formato anterior
+VERSION_CACHE = 1
+
+CARPETA_CACHE = os.path.join(os.getenv("APPDATA") or tempfile.gettempdir(), "PQT7", "cache")
+
+
+def huella_archivo(ruta):
+    """
+    Obtiene la huella de un archivo para validar la cache.
+
+    Args:
+        ruta (str): Ruta del archivo
+
+    Returns:
+        tuple: (tamaño en bytes, fecha de modificacion) o None si no existe
+    """
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    return (estado.st_size, estado.st_mtime)
+
+
+def _md5(texto):
+    return hashlib.md5(texto.encode("utf-8")).hexdigest()
+
+
+def _carpeta_archivo(ruta):
+    """Carpeta que agrupa todas las entradas de un mismo Excel (para invalidarlas juntas)."""
+    return os.path.join(CARPETA_CACHE, _md5(u"{}".format(os.path.normcase(os.path.abspath(ruta)))))
+
+
+def _ruta_entrada(ruta, hoja, firma):
+    """Nombre del archivo de cache para una hoja y una proyeccion de columnas."""
+    return os.path.join(_carpeta_archivo(ruta), _md5(u"{}|{}".format(hoja, firma)) + ".bin")
+
+
+def leer(ruta, hoja, firma):
+    """
+    Lee una entrada de la cache si sigue siendo valida.
+
+    Args:
+        ruta (str): Ruta del archivo Excel de origen
+        hoja (str): Nombre de la hoja
+        firma (str): Identificador de la proyeccion (columnas y filas usadas)
+
+    Returns:
+        object: Datos guardados, o None si no hay entrada o el Excel cambio
+    """
+    huella = huella_archivo(ruta)
+    if huella is None:
+        return None
+
+    archivo = _ruta_entrada(ruta, hoja, firma)
+    if not os.path.exists(archivo):
+        return None
+
+    try:
+        with open(archivo, "rb") as f:
+            version, huella_guardada, datos = pickle.load(f)
+    except Exception:
+        return None
+
+    if version != VERSION_CACHE or tuple(huella_guardada) != huella:
+        return None
+    return datos
+
+
+def guardar(ruta, hoja, firma, datos):
+    """
+    Guarda una entrada en la cache. Los errores de escritura se ignoran:
+    la cache nunca debe impedir que el boton termine.
+
+    Args:
+        ruta (str): Ruta del archivo Excel de origen
+        hoja (str): Nombre de la hoja
+        firma (str): Identificador de la proyeccion (columnas y filas usadas)
+        datos (object): Datos serializables a guardar
+
+    Returns:
+        bool: True si se guardo correctamente
+    """
+    huella = huella_archivo(ruta)
+    if huella is None:
+        return False
+
+    archivo = _ruta_entrada(ruta, hoja, firma)
+    temporal = archivo + ".tmp"
+    try:
+        if not os.path.isdir(os.path.dirname(archivo)):
+            os.makedirs(os.path.dirname(archivo))
+        with open(temporal, "wb") as f:
+            pickle.dump((VERSION_CACHE, huella, datos), f, 2)
+        if os.path.exists(archivo):
+            os.remove(archivo)
+        os.rename(temporal, archivo)
+        return True
+    except Exception as e:
+        print("No se pudo guardar la cache de la matriz: {}".format(e))
+        return False
+
+
+def leer_estado(nombre, carpeta=None):
+    """
+    Lee un estado guardado por nombre (independiente del Excel de origen).
+
+    Args:
+        nombre (str): Identificador del estado
+        carpeta (str): Carpeta del estado (default: CARPETA_CACHE del equipo)
+
+    Returns:
+        object: Datos guardados o None si no existen o tienen otro formato
+    """
+    archivo = os.path.join(carpeta or CARPETA_CACHE, nombre + ".estado")
+    if not os.path.exists(archivo):
+        return None
+    try:
+        with open(archivo, "rb") as f:
+            version, datos = pickle.load(f)
+    except Exception:
+        return None
+    return datos if version == VERSION_CACHE else None
+
+
+def guardar_estado(nombre, datos, carpeta=None):
+    """
+    Guarda un estado por nombre. Igual que guardar, los errores se informan y se ignoran.
+
+    Args:
+        nombre (str): Identificador del estado
+        datos (object): Datos a guardar
+        carpeta (str): Carpeta del estado (default: CARPETA_CACHE del equipo)
+
+    Returns:
+        bool: True si se guardo correctamente
+    """
+    carpeta = carpeta or CARPETA_CACHE
+    archivo = os.path.join(carpeta, nombre + ".estado")
+    temporal = archivo + ".tmp"
+    try:
+        if not os.path.isdir(carpeta):
+            os.makedirs(carpeta)
+        with open(temporal, "wb") as f:
+            pickle.dump((VERSION_CACHE, datos), f, 2)
+        if os.path.exists(archivo):
+            os.remove(archivo)
+        os.rename(temporal, archivo)
+        return True
+    except Exception as e:
+        print("No se pudo guardar el estado '{}': {}".format(nombre, e))
+        return False
+
+
+def leer_ultima_matriz(tipo="matriz"):
+    """
+    Obtiene la ruta del ultimo archivo usado en cualquier boton.
+
+    Args:
+        tipo (str): Tipo de archivo ("matriz" para la matriz COBie, "uniclass", ...)
+
+    Returns:
+        str: Ruta guardada o None si no hay registro
+    """
+    archivo = os.path.join(CARPETA_CACHE, "ultima_{}.txt".format(tipo))
+    try:
+        with io.open(archivo, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except (IOError, OSError):
+        return None
+
+
+def guardar_ultima_matriz(ruta, tipo="matriz"):
+    """Registra la ruta del archivo usado para ofrecerlo en la siguiente ejecucion."""
+    try:
+        if not os.path.isdir(CARPETA_CACHE):
+            os.makedirs(CARPETA_CACHE)
+        with io.open(os.path.join(CARPETA_CACHE, "ultima_{}.txt".format(tipo)), "w", encoding="utf-8") as f:
+            f.write(u"{}".format(ruta))
+    except (IOError, OSError):
+        pass
+
+
+def invalidar(ruta):
+    """
+    Elimina de la cache en disco todas las entradas de un Excel.
+
+    Args:
+        ruta (str): Ruta del archivo Excel de origen
+    """
+    shutil.rmtree(_carpeta_archivo(ruta), ignore_errors=True)
+
+
+def limpiar():
+    """Elimina todas las entradas de la cache en disco (los estados se conservan)."""
+    if not os.path.isdir(CARPETA_CACHE):
+        return
+    for nombre in os.listdir(CARPETA_CACHE):
+        ruta = os.path.join(CARPETA_CACHE, nombre)
+        if os.path.isdir(ruta):
+            shutil.rmtree(ruta, ignore_errors=True)
+        elif nombre.endswith(".bin") or nombre.endswith(".tmp"):
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Compilador de la matriz COBie a un snapshot SQLite indexado.
+Se ejecuta fuera de Revit (no importa la API de Revit ni pyRevit):
+
+    cd lib
+    python -m Helper._MatrixCompiler "MATRIZ COBie.xlsx" [salida.sqlite]
+
+Compila todas las hojas 'ESTANDAR COBIE -XX', 'ESTANDAR COBie SPACE ' y 'ELEMENTOS'.
+Los botones aceptan el archivo .sqlite resultante en lugar del xlsx.
+"""
+
+import os
+import re
+import sys
+import time
+
+from Helper._Workbook import Workbook, normalizar_encabezado
+from Helper._MatrixTable import normalizar_clave
+from Helper import _MatrixCache
+
+VERSION_SNAPSHOT = 1
+
+_PATRON_ESTANDAR = re.compile(r"^estandar cobie-\w+$")
+
+
+def configuracion_hoja(nombre):
+    """
+    Obtiene la configuracion de compilacion de una hoja de la matriz.
+
+    Args:
+        nombre (str): Nombre de la hoja en el libro
+
+    Returns:
+        tuple: (fila de encabezados, fila de datos, columna clave) o None si la hoja no se compila
+    """
+    limpio = normalizar_encabezado(nombre)
+    if limpio == "elementos":
+        return (8, 9, "Item")
+    if limpio == "estandar cobie space":
+        return (2, 3, "COBie.Space.Name")
+    if _PATRON_ESTANDAR.match(limpio):
+        return (2, 3, "CODIGO")
+    return None
+
+
+def leer_encabezados(libro, hoja, start_row):
+    """
+    Lee la fila de encabezados de una hoja con el mismo criterio que Excel.get_headers.
+
+    Returns:
+        list: Nombres de columna no vacios, sin repetir, en orden de aparicion
+    """
+    for indice, fila in enumerate(libro.iterar_filas(hoja)):
+        if indice < start_row:
+            continue
+        nombres = []
+        for h in fila:
+            if h not in ("", None) and h not in nombres:
+                nombres.append(h)
+        return nombres
+    return []
+
+
+def compilar(ruta_xlsx, ruta_sqlite):
+    """
+    Compila la matriz Excel a un archivo SQLite.
+
+    Args:
+        ruta_xlsx (str): Ruta de la matriz COBie
+        ruta_sqlite (str): Ruta del snapshot a generar
+
+    Returns:
+        dict: {nombre_hoja: cantidad de filas compiladas}
+    """
+    import sqlite3
+
+    temporal = ruta_sqlite + ".tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+    resumen = {}
+    conexion = sqlite3.connect(temporal)
+    try:
+        cursor = conexion.cursor()
+        cursor.execute("CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        cursor.execute("CREATE TABLE hojas (nombre TEXT PRIMARY KEY, tabla TEXT, "
+                       "fila_encabezados INTEGER, fila_datos INTEGER, columna_clave TEXT)")
+        cursor.execute("CREATE TABLE columnas (tabla TEXT, posicion INTEGER, nombre TEXT)")
+
+        huella = _MatrixCache.huella_archivo(ruta_xlsx)
+        cursor.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("version", str(VERSION_SNAPSHOT)),
+            ("origen", os.path.abspath(ruta_xlsx)),
+            ("tamano", str(huella[0])),
+            ("modificado", str(huella[1])),
+            ("compilado", time.strftime("%Y-%m-%dT%H:%M:%S")),
+        ])
+
+        with Workbook(ruta_xlsx) as libro:
+            numero = 0
+            for hoja in libro.nombres_hojas():
+                config = configuracion_hoja(hoja)
+                if config is None:
+                    continue
+                start_row, start_data, columna_clave = config
+
+                nombres = leer_encabezados(libro, hoja, start_row)
+                if not nombres:
+                    continue
+                _, filas = libro.proyectar(hoja, start_row, nombres, start_data)
+
+                tabla = "hoja_{}".format(numero)
+                numero += 1
+                posicion_clave = nombres.index(columna_clave) if columna_clave in nombres else None
+
+                definicion = ", ".join("c{}".format(i) for i in range(len(nombres)))
+                cursor.execute("CREATE TABLE {} (fila INTEGER PRIMARY KEY, clave TEXT, {})".format(tabla, definicion))
+                cursor.execute("INSERT INTO hojas VALUES (?, ?, ?, ?, ?)",
+                               (hoja, tabla, start_row, start_data, columna_clave))
+                cursor.executemany("INSERT INTO columnas VALUES (?, ?, ?)",
+                                   [(tabla, i, n) for i, n in enumerate(nombres)])
+
+                marcadores = ", ".join(["?"] * (len(nombres) + 2))
+                insertar = "INSERT INTO {} VALUES ({})".format(tabla, marcadores)
+                registros = []
+                for i, fila in enumerate(filas):
+                    clave = normalizar_clave(fila[posicion_clave]) if posicion_clave is not None else None
+                    registros.append((start_data + i, clave) + tuple(fila))
+                cursor.executemany(insertar, registros)
+                cursor.execute("CREATE INDEX idx_{0}_clave ON {0} (clave)".format(tabla))
+                resumen[hoja] = len(registros)
+
+        conexion.commit()
+    finally:
+        conexion.close()
+
+    if os.path.exists(ruta_sqlite):
+        os.remove(ruta_sqlite)
+    os.rename(temporal, ruta_sqlite)
+    return resumen
+
+
+def main(argumentos):
+    """Punto de entrada de linea de comandos."""
+    if not argumentos:
+        print("Uso: python -m Helper._MatrixCompiler MATRIZ.xlsx [salida.sqlite]")
+        return 2
+
+    ruta_xlsx = argumentos[0]
+    ruta_sqlite = argumentos[1] if len(argumentos) > 1 else os.path.splitext(ruta_xlsx)[0] + ".sqlite"
+
+    inicio = time.time()
+    resumen = compilar(ruta_xlsx, ruta_sqlite)
+    for hoja in sorted(resumen):
+        print("{!r}: {} filas".format(hoja, resumen[hoja]))
+    print("Snapshot generado en {} ({:.2f} s)".format(ruta_sqlite, time.time() - inicio))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
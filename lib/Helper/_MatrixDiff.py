@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Comparacion de la matriz COBie con la ultima matriz aplicada al modelo.
+Cada boton guarda, por modelo y hoja, una instantanea {CODIGO: valores} al terminar de
+aplicar la matriz a todo el modelo sobrescribiendo los valores. En la siguiente ejecucion
+se compara contra la matriz actual para reescribir solo los elementos cuyos codigos
+cambiaron, y solo las columnas que cambiaron.
+La instantanea se guarda junto al modelo (junto al central si es colaborativo) para que
+todos los equipos que trabajan sobre el mismo modelo comparen contra la misma matriz.
+Solo si el modelo no tiene una carpeta accesible (sin guardar, en la nube) se guarda en
+el equipo, y los botones lo advierten al ofrecer el modo diferencias.
+"""
+
+import hashlib
+import os
+
+from Helper import _MatrixCache
+from Helper._MatrixTable import normalizar_clave
+from Helper._Workbook import normalizar_encabezado
+
+# Carpeta, junto al modelo, con las instantaneas de las matrices aplicadas
+CARPETA_APLICADAS = "PQT7_matrices_aplicadas"
+
+# Advertencia del modo diferencias cuando la instantanea solo se guarda en este equipo
+AVISO_APLICADA_LOCAL = ("\n\nNota: el modelo no tiene una carpeta compartida; la última matriz aplicada "
+                        "se registra solo en este equipo y no incluye lo aplicado desde otros equipos.")
+
+
+def instantanea(tabla, columna_clave, columnas):
+    """
+    Toma una instantanea de una hoja indexada por su columna clave.
+    Si una clave se repite se conserva la primera fila, igual que MatrixTable.buscar.
+
+    Args:
+        tabla (MatrixTable): Tabla de la hoja (o SnapshotTable)
+        columna_clave (str): Columna clave, por ejemplo "CODIGO"
+        columnas (list): Columnas a comparar
+
+    Returns:
+        dict: {"columnas": [...], "filas": {clave: tupla de valores}}
+    """
+    columnas = [c for c in columnas if c != columna_clave]
+    filas = {}
+    for fila in tabla:
+        clave = normalizar_clave(fila.get(columna_clave))
+        if clave is not None and clave not in filas:
+            filas[clave] = tuple(fila.get(c) for c in columnas)
+    return {"columnas": columnas, "filas": filas}
+
+
+class MatrixDiff(object):
+    """
+    Resultado de comparar dos instantaneas de una hoja.
+    """
+
+    def __init__(self, columnas, agregados, eliminados, modificados):
+        """
+        Args:
+            columnas (list): Columnas comparadas
+            agregados (list): Claves nuevas en la matriz actual
+            eliminados (list): Claves que ya no existen en la matriz actual
+            modificados (dict): {clave: [columnas con valores distintos]}
+        """
+        self.columnas = columnas
+        self.agregados = agregados
+        self.eliminados = eliminados
+        self.modificados = modificados
+
+    def codigos(self):
+        """
+        Obtiene las claves que deben volver a aplicarse (nuevas o modificadas).
+
+        Returns:
+            set: Claves normalizadas
+        """
+        return set(self.agregados) | set(self.modificados)
+
+    def columnas_cambiadas(self, valor):
+        """
+        Obtiene las columnas a reescribir para un codigo.
+
+        Args:
+            valor (object): Codigo del elemento (se normaliza igual que las claves)
+
+        Returns:
+            list: Columnas cambiadas (todas si el codigo es nuevo, ninguna si no cambio)
+        """
+        clave = normalizar_clave(valor)
+        if clave in self.modificados:
+            return self.modificados[clave]
+        if clave in self.agregados:
+            return list(self.columnas)
+        return []
+
+    def resumen(self):
+        """
+        Genera un resumen legible de las diferencias.
+
+        Returns:
+            str: Texto con los codigos y columnas cambiadas
+        """
+        lineas = [
+            "Codigos nuevos: {}".format(len(self.agregados)),
+            "Codigos modificados: {}".format(len(self.modificados)),
+            "Codigos eliminados: {}".format(len(self.eliminados)),
+        ]
+        for clave in sorted(self.modificados):
+            lineas.append("  - {}: {}".format(clave, ", ".join(self.modificados[clave])))
+        return "\n".join(lineas)
+
+
+def comparar(anterior, actual):
+    """
+    Compara dos instantaneas de la misma hoja.
+    Si cambiaron las columnas comparadas, las columnas nuevas se consideran cambiadas
+    en todos los codigos.
+
+    Args:
+        anterior (dict): Instantanea de la ultima matriz aplicada
+        actual (dict): Instantanea de la matriz actual
+
+    Returns:
+        MatrixDiff: Diferencias encontradas
+    """
+    columnas = actual["columnas"]
+    posiciones_anteriores = dict((c, i) for i, c in enumerate(anterior["columnas"]))
+    filas_anteriores = anterior["filas"]
+
+    agregados = []
+    modificados = {}
+    for clave, valores in actual["filas"].items():
+        previos = filas_anteriores.get(clave)
+        if previos is None:
+            agregados.append(clave)
+            continue
+        cambiadas = []
+        for i, columna in enumerate(columnas):
+            posicion = posiciones_anteriores.get(columna)
+            if posicion is None or previos[posicion] != valores[i]:
+                cambiadas.append(columna)
+        if cambiadas:
+            modificados[clave] = cambiadas
+
+    eliminados = [clave for clave in filas_anteriores if clave not in actual["filas"]]
+    return MatrixDiff(columnas, sorted(agregados), sorted(eliminados), modificados)
+
+
+def ruta_documento(doc):
+    """
+    Identifica el modelo de forma estable entre sesiones.
+    En modelos colaborativos se usa la ruta del central, comun a todas las copias locales.
+
+    Args:
+        doc (Document): Documento activo
+
+    Returns:
+        str: Ruta del modelo central, o del archivo (el titulo si no se ha guardado)
+    """
+    if doc.IsWorkshared:
+        try:
+            from Autodesk.Revit.DB import ModelPathUtils
+            return ModelPathUtils.ConvertModelPathToUserVisiblePath(doc.GetWorksharingCentralModelPath())
+        except Exception:
+            pass
+    return doc.PathName or doc.Title
+
+
+def carpeta_aplicadas(doc):
+    """
+    Carpeta compartida donde se guardan las matrices aplicadas al modelo.
+
+    Args:
+        doc (Document): Documento activo
+
+    Returns:
+        str: Carpeta junto al modelo (o al central), o None si el modelo no tiene una
+        carpeta accesible y la instantanea queda solo en este equipo
+    """
+    carpeta = os.path.dirname(ruta_documento(doc))
+    if not carpeta or not os.path.isdir(carpeta):
+        return None
+    return os.path.join(carpeta, CARPETA_APLICADAS)
+
+
+def _nombre_estado(doc, boton, hoja):
+    clave = u"{}|{}|{}".format(ruta_documento(doc), boton, normalizar_encabezado(hoja))
+    return "aplicada_" + hashlib.md5(clave.encode("utf-8")).hexdigest()
+
+
+def leer_aplicada(doc, boton, hoja):
+    """
+    Obtiene la instantanea de la ultima matriz aplicada por un boton en una hoja del modelo.
+
+    Args:
+        doc (Document): Documento activo
+        boton (str): Identificador del boton, por ejemplo "type"
+        hoja (str): Nombre de la hoja
+
+    Returns:
+        dict: Instantanea guardada o None si el boton nunca aplico esa hoja al modelo
+    """
+    return _MatrixCache.leer_estado(_nombre_estado(doc, boton, hoja), carpeta_aplicadas(doc))
+
+
+def guardar_aplicada(doc, boton, hoja, datos):
+    """
+    Registra la instantanea de la matriz que el boton acaba de aplicar.
+    Solo debe llamarse tras aplicar la matriz a todo el modelo sobrescribiendo los valores
+    (o tras un modo diferencias sobre una instantanea valida): una seleccion parcial o un
+    llenado de vacios no deja el modelo con los valores de la matriz.
+
+    Args:
+        doc (Document): Documento activo
+        boton (str): Identificador del boton
+        hoja (str): Nombre de la hoja
+        datos (dict): Instantanea de la matriz aplicada
+
+    Returns:
+        bool: True si se guardo correctamente
+    """
+    return _MatrixCache.guardar_estado(_nombre_estado(doc, boton, hoja), datos, carpeta_aplicadas(doc))
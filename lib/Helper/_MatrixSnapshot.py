@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura del snapshot SQLite generado por Helper._MatrixCompiler.
+Las hojas se consultan bajo demanda: solo se leen las filas cuyos codigos se buscan,
+usando el indice de la columna clave de cada hoja.
+"""
+
+import threading
+
+from Helper._MatrixTable import normalizar_clave, preparar_conversiones, convertir_fila
+from Helper._Workbook import buscar_hoja, resolver_encabezados
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+EXTENSIONES_SNAPSHOT = (".sqlite", ".db")
+
+# SQLite limita la cantidad de parametros por consulta
+_TAMANO_LOTE = 500
+
+
+def es_snapshot(ruta):
+    """Indica si la ruta corresponde a un snapshot SQLite de la matriz."""
+    return bool(ruta) and ruta.lower().endswith(EXTENSIONES_SNAPSHOT)
+
+
+class MatrixSnapshot(object):
+    """
+    Conexion de solo lectura a un snapshot de la matriz COBie.
+    La conexion se abre con la primera consulta y se cierra con cerrar(); una consulta
+    posterior vuelve a abrirla.
+    """
+
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta (str): Ruta del archivo .sqlite
+        """
+        if sqlite3 is None:
+            raise ImportError("El modulo sqlite3 no esta disponible en este motor de Python.")
+        self.ruta = ruta
+        self._bloqueo = threading.Lock()
+        self._conexion = None
+        self._hojas = {}
+        for nombre, tabla, columna_clave in self._consultar(
+                "SELECT nombre, tabla, columna_clave FROM hojas"):
+            self._hojas[nombre] = (tabla, columna_clave)
+
+    def cerrar(self):
+        """Cierra la conexion (se vuelve a abrir si se consulta otra vez)."""
+        with self._bloqueo:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
+
+    def tiene_hoja(self, hoja):
+        """Indica si el snapshot contiene la hoja indicada."""
+        return buscar_hoja(list(self._hojas), hoja) is not None
+
+    def tabla(self, hoja, columns_name, tipos=None):
+        """
+        Obtiene una tabla consultable de una hoja del snapshot.
+
+        Args:
+            hoja (str): Nombre de la hoja
+            columns_name (list): Columnas requeridas
+            tipos (dict): Esquema {columna: tipo} aplicado a cada fila al traerla
+
+        Returns:
+            tuple: (SnapshotTable o None si la hoja no existe, lista de columnas faltantes)
+        """
+        nombre = buscar_hoja(list(self._hojas), hoja)
+        if nombre is None:
+            return None, list(columns_name)
+
+        tabla, columna_clave = self._hojas[nombre]
+        encabezados = dict(self._consultar(
+            "SELECT posicion, nombre FROM columnas WHERE tabla = ?", (tabla,)))
+        required = resolver_encabezados(encabezados, columns_name)
+        faltantes = [c for c in columns_name if required[c] is None]
+        return SnapshotTable(self, tabla, columna_clave, columns_name, required, tipos), faltantes
+
+    def _consultar(self, sql, parametros=()):
+        with self._bloqueo:
+            if self._conexion is None:
+                self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+            return self._conexion.execute(sql, parametros).fetchall()
+
+
+class SnapshotTable(object):
+    """
+    Hoja del snapshot con la misma interfaz de lectura que MatrixTable.
+    Las filas se traen de SQLite solo cuando se buscan y quedan en memoria.
+    """
+
+    def __init__(self, snapshot, tabla, columna_clave, columnas, required, tipos=None):
+        self.columnas = list(columnas)
+        self._conversiones = preparar_conversiones(self.columnas, tipos)
+        self._snapshot = snapshot
+        self._tabla = tabla
+        self._columna_clave = columna_clave
+        self._required = required
+        self._filas_por_clave = {}
+        self._total = None
+
+        seleccion = []
+        for columna in self.columnas:
+            idx = required[columna]
+            seleccion.append("c{}".format(idx) if idx is not None else "NULL")
+        self._select = "SELECT clave, {} FROM {}".format(", ".join(seleccion), tabla)
+
+    def __len__(self):
+        if self._total is None:
+            self._total = self._snapshot._consultar("SELECT COUNT(*) FROM {}".format(self._tabla))[0][0]
+        return self._total
+
+    def __iter__(self):
+        for registro in self._snapshot._consultar(self._select + " ORDER BY fila"):
+            yield self._fila(registro)
+
+    def __repr__(self):
+        return "SnapshotTable(tabla={0}, columnas={1})".format(self._tabla, self.columnas)
+
+    def _fila(self, registro):
+        return convertir_fila(dict(zip(self.columnas, registro[1:])), self._conversiones)
+
+    def crear_indice(self, columna):
+        """El indice de la columna clave ya existe en SQLite; no hay nada que construir."""
+        pass
+
+    def tiene_indice(self, columna):
+        """Solo la columna clave tiene indice (el de SQLite)."""
+        return columna == self._columna_clave
+
+    def asegurar_indice(self, columna):
+        """Compatibilidad con MatrixTable: el indice ya existe en SQLite."""
+        pass
+
+    def precargar(self, columna, valores):
+        """
+        Trae en lote las filas de los valores indicados (por ejemplo, los codigos
+        presentes en la seleccion) para que las busquedas posteriores no consulten SQLite.
+
+        Args:
+            columna (str): Columna clave
+            valores (iterable): Valores a precargar
+        """
+        if columna != self._columna_clave:
+            return
+        pendientes = []
+        for valor in valores:
+            clave = normalizar_clave(valor)
+            if clave is not None and clave not in self._filas_por_clave:
+                self._filas_por_clave[clave] = None
+                pendientes.append(clave)
+
+        for inicio in range(0, len(pendientes), _TAMANO_LOTE):
+            lote = pendientes[inicio:inicio + _TAMANO_LOTE]
+            sql = "{} WHERE clave IN ({}) ORDER BY fila".format(self._select, ", ".join(["?"] * len(lote)))
+            for registro in self._snapshot._consultar(sql, lote):
+                if self._filas_por_clave.get(registro[0]) is None:
+                    self._filas_por_clave[registro[0]] = self._fila(registro)
+
+    def buscar(self, columna, valor, default=None):
+        """
+        Busca la fila cuya columna clave coincide con el valor dado.
+
+        Args:
+            columna (str): Columna clave de la hoja
+            valor (object): Valor a buscar
+            default (object): Valor devuelto si no hay coincidencia
+
+        Returns:
+            dict: Fila encontrada o default
+        """
+        clave = normalizar_clave(valor)
+        if clave is None:
+            return default
+
+        if columna != self._columna_clave:
+            for fila in self:
+                if normalizar_clave(fila.get(columna)) == clave:
+                    return fila
+            return default
+
+        if clave not in self._filas_por_clave:
+            self.precargar(columna, [clave])
+        fila = self._filas_por_clave.get(clave)
+        return fila if fila is not None else default
+
+    def contiene(self, columna, valor):
+        """Indica si existe una fila con ese valor en la columna clave."""
+        return self.buscar(columna, valor) is not None
+
+    def claves(self, columna):
+        """Obtiene las claves distintas de la columna clave."""
+        if columna != self._columna_clave:
+            return list(set(normalizar_clave(f.get(columna)) for f in self) - set([None]))
+        registros = self._snapshot._consultar(
+            "SELECT DISTINCT clave FROM {} WHERE clave IS NOT NULL".format(self._tabla))
+        return [r[0] for r in registros]
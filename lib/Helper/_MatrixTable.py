@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+Tabla en memoria de una hoja de la matriz COBie con indices hash por columna.
+Las claves se normalizan una sola vez al construir la tabla, de modo que cada busqueda
+posterior es O(1) en lugar de recorrer todas las filas.
+Del mismo modo, las columnas tipadas (fechas, numeros, longitudes) se convierten una
+sola vez al construir la tabla y los botones solo leen los valores ya convertidos.
+Las filas se guardan por columnas (una lista por columna, con los textos y numeros
+repetidos compartidos, o un array de codigos si la columna tiene pocos textos
+distintos) y se entregan como vistas FilaMatriz que se leen como un dict.
+La misma tabla se comparte entre botones e hilos (cache de _Excel), por eso los
+indices que faltan se construyen bajo el bloqueo de la tabla.
+"""
+
+import threading
+from array import array
+from datetime import datetime, timedelta
+
+_FECHA_BASE = datetime(1899, 12, 30)
+
+# Un pie (unidad interna de Revit) mide exactamente 0.3048 m
+_METROS_POR_PIE = 0.3048
+
+# Una columna de textos se codifica si tiene como maximo este numero de valores
+# distintos (codigos de 2 bytes) y estos no superan la mitad de sus filas
+_MAXIMO_CODIGOS = 65535
+
+
+def normalizar_clave(valor):
+    """
+    Normaliza el valor de una columna clave para usarlo en un indice.
+
+    Args:
+        valor (object): Valor de la celda o del parametro de Revit
+
+    Returns:
+        str: Valor como texto sin espacios extremos, o None si esta vacio
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    clave = str(valor).strip()
+    return clave if clave else None
+
+
+def a_texto(valor):
+    """Texto sin espacios extremos, o None si la celda esta vacia."""
+    if valor is None:
+        return None
+    texto = u"{}".format(valor).strip()
+    return texto if texto else None
+
+
+def a_float(valor):
+    """Numero decimal, o None si la celda esta vacia o no es numerica."""
+    if hasattr(valor, "strip"):
+        valor = valor.strip()
+    if valor is None or valor == "":
+        return None
+    try:
+        return float(valor)
+    except (ValueError, TypeError):
+        return None
+
+
+def a_pies(valor):
+    """Longitud en metros convertida a pies (unidad interna de Revit), o None."""
+    metros = a_float(valor)
+    return metros / _METROS_POR_PIE if metros is not None else None
+
+
+def a_fecha(valor):
+    """
+    Fecha ISO (AAAA-MM-DD) desde un numero de serie de Excel o un datetime.
+    Los textos se conservan tal cual; vacios, 0 y 'n/a' devuelven None.
+    """
+    if not valor:
+        return None
+    if isinstance(valor, (int, float)):
+        return (_FECHA_BASE + timedelta(days=float(valor))).strftime("%Y-%m-%d")
+    if hasattr(valor, "strftime"):
+        return valor.strftime("%Y-%m-%d")
+    texto = a_texto(valor)
+    if texto is None or texto.lower() == "n/a":
+        return None
+    return texto
+
+
+TIPOS_COLUMNA = {
+    "texto": a_texto,
+    "float": a_float,
+    "metros": a_pies,
+    "fecha": a_fecha,
+}
+
+
+def preparar_conversiones(columnas, tipos):
+    """
+    Traduce un esquema {columna: tipo} a la lista de conversiones de las columnas pedidas.
+
+    Args:
+        columnas (list): Columnas de la tabla
+        tipos (dict): {columna: "texto" | "float" | "metros" | "fecha"}
+
+    Returns:
+        list: [(columna, funcion de conversion)]
+    """
+    conversiones = []
+    for columna, tipo in (tipos or {}).items():
+        if tipo not in TIPOS_COLUMNA:
+            raise ValueError("Tipo de columna desconocido para '{}': {}".format(columna, tipo))
+        if columna in columnas:
+            conversiones.append((columna, TIPOS_COLUMNA[tipo]))
+    return conversiones
+
+
+def convertir_fila(fila, conversiones):
+    """
+    Convierte en el lugar las columnas tipadas de una fila.
+    Las columnas que no existen en la hoja (valor None) no se tocan.
+    """
+    for columna, convertir in conversiones:
+        valor = fila.get(columna)
+        if valor is not None:
+            fila[columna] = convertir(valor)
+    return fila
+
+
+class _ColumnaCodificada(object):
+    """
+    Columna de textos muy repetidos (fabricantes, unidades, 'n/a'): cada celda guarda
+    solo el numero de su valor en un array de 2 bytes.
+    """
+
+    __slots__ = ("valores", "codigos")
+
+    def __init__(self, valores, codigos):
+        self.valores = valores
+        self.codigos = codigos
+
+    def __getitem__(self, posicion):
+        return self.valores[self.codigos[posicion]]
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __iter__(self):
+        valores = self.valores
+        return (valores[codigo] for codigo in self.codigos)
+
+
+def _codificar(lista):
+    """
+    Codifica una columna si todos sus valores son textos (o vacios) y se repiten lo
+    suficiente; si no, la devuelve sin cambios.
+    """
+    valores = [None]
+    codigo_de = {None: 0}
+    codigos = array("H")
+    limite = min(_MAXIMO_CODIGOS, len(lista) // 2)
+    for valor in lista:
+        codigo = codigo_de.get(valor)
+        if codigo is None:
+            if not hasattr(valor, "strip") or len(valores) >= limite:
+                return lista
+            codigo = len(valores)
+            codigo_de[valor] = codigo
+            valores.append(valor)
+        codigos.append(codigo)
+    return _ColumnaCodificada(valores, codigos)
+
+
+class FilaMatriz(object):
+    """
+    Vista liviana de una fila de MatrixTable. Se lee igual que el dict {columna: valor}
+    que reemplaza (fila["X"], fila.get("X"), "X" in fila, items(), ...), pero no copia
+    los valores: solo guarda la tabla y la posicion de la fila.
+    """
+
+    __slots__ = ("_tabla", "_posicion")
+
+    def __init__(self, tabla, posicion):
+        self._tabla = tabla
+        self._posicion = posicion
+
+    def __getitem__(self, columna):
+        return self._tabla._datos[columna][self._posicion]
+
+    def get(self, columna, default=None):
+        datos = self._tabla._datos.get(columna)
+        return datos[self._posicion] if datos is not None else default
+
+    def __contains__(self, columna):
+        return columna in self._tabla._datos
+
+    def __iter__(self):
+        return iter(self._tabla._orden)
+
+    def __len__(self):
+        return len(self._tabla._orden)
+
+    def keys(self):
+        return list(self._tabla._orden)
+
+    def values(self):
+        return [self[c] for c in self._tabla._orden]
+
+    def items(self):
+        return [(c, self[c]) for c in self._tabla._orden]
+
+    def copy(self):
+        """Copia la fila en un dict independiente de la tabla."""
+        return dict(self.items())
+
+    def __eq__(self, otra):
+        if not hasattr(otra, "items"):
+            return NotImplemented
+        return dict(self.items()) == dict(otra.items())
+
+    def __ne__(self, otra):
+        igual = self.__eq__(otra)
+        return igual if igual is NotImplemented else not igual
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "FilaMatriz({0!r})".format(self.copy())
+
+
+class MatrixTable(object):
+    """
+    Conjunto de filas de una hoja guardadas por columnas, con indices declarados.
+    Se comporta como la lista de filas original (len, iteracion, indice) para no
+    romper a los llamadores existentes; cada fila se entrega como una FilaMatriz.
+    """
+
+    def __init__(self, columnas, filas, indices=None, tipos=None):
+        """
+        Inicializa la tabla, convierte las columnas tipadas y construye los indices pedidos.
+
+        Args:
+            columnas (list): Nombres de las columnas de la tabla
+            filas (iterable): Filas como dicts {columna: valor} o como tuplas en el
+                              orden de columnas
+            indices (list): Columnas sobre las que se construye un indice hash
+            tipos (dict): Esquema {columna: tipo} (ver TIPOS_COLUMNA)
+        """
+        self.columnas = list(columnas)
+        self._orden = []
+        for columna in self.columnas:
+            if columna not in self._orden:
+                self._orden.append(columna)
+        self._datos = dict((columna, []) for columna in self._orden)
+        self._cargar(filas, dict(preparar_conversiones(self._orden, tipos)))
+        self._indices = {}
+        self._bloqueo = threading.Lock()
+        for columna in indices or []:
+            self.asegurar_indice(columna)
+
+    def _cargar(self, filas, conversiones):
+        """
+        Reparte las filas en las listas de cada columna, convierte las columnas tipadas
+        y comparte los valores repetidos (una sola copia de cada texto o numero).
+        """
+        # Si una columna se repite en columnas, solo se conserva su primera aparicion
+        listas = []
+        for posicion, columna in enumerate(self.columnas):
+            primera = self.columnas.index(columna) == posicion
+            listas.append(self._datos[columna] if primera else [])
+        cantidad = len(listas)
+        for fila in filas:
+            if hasattr(fila, "get"):
+                fila = [fila.get(c) for c in self.columnas]
+            elif len(fila) < cantidad:
+                fila = tuple(fila) + (None,) * (cantidad - len(fila))
+            for lista, valor in zip(listas, fila):
+                lista.append(valor)
+        self._total = len(listas[0]) if listas else 0
+
+        textos = {}
+        numeros = {}
+        for columna in self._orden:
+            convertir = conversiones.get(columna)
+            lista = self._datos[columna]
+            for posicion, valor in enumerate(lista):
+                if valor is None:
+                    continue
+                if convertir is not None:
+                    valor = convertir(valor)
+                if isinstance(valor, float):
+                    valor = numeros.setdefault(valor, valor)
+                elif hasattr(valor, "strip"):
+                    valor = textos.setdefault(valor, valor)
+                lista[posicion] = valor
+            self._datos[columna] = _codificar(lista)
+
+    def __len__(self):
+        return self._total
+
+    def __iter__(self):
+        for posicion in range(self._total):
+            yield FilaMatriz(self, posicion)
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return [FilaMatriz(self, p) for p in range(*posicion.indices(self._total))]
+        if posicion < 0:
+            posicion += self._total
+        if not 0 <= posicion < self._total:
+            raise IndexError("MatrixTable index out of range")
+        return FilaMatriz(self, posicion)
+
+    def __repr__(self):
+        return "MatrixTable(columnas={0}, filas={1})".format(self.columnas, self._total)
+
+    def crear_indice(self, columna):
+        """
+        Construye (o reconstruye) el indice hash de una columna.
+        Si la clave se repite, el indice conserva la primera fila, igual que una
+        busqueda lineal.
+
+        Args:
+            columna (str): Nombre de la columna clave
+        """
+        indice = {}
+        for posicion, valor in enumerate(self._datos.get(columna) or []):
+            clave = normalizar_clave(valor)
+            if clave is not None and clave not in indice:
+                indice[clave] = posicion
+        self._indices[columna] = indice
+
+    def tiene_indice(self, columna):
+        """Indica si la columna ya tiene su indice hash construido."""
+        return columna in self._indices
+
+    def asegurar_indice(self, columna):
+        """
+        Construye el indice de la columna solo si todavia no existe. Se hace bajo el
+        bloqueo de la tabla para que dos hilos no lo construyan a la vez; si ya existe,
+        no cuesta nada (no se recorren las filas).
+
+        Args:
+            columna (str): Nombre de la columna clave
+        """
+        if columna in self._indices:
+            return
+        with self._bloqueo:
+            if columna not in self._indices:
+                self.crear_indice(columna)
+
+    def precargar(self, columna, valores):
+        """
+        Compatibilidad con SnapshotTable: en memoria todas las filas ya estan cargadas.
+        """
+        self.asegurar_indice(columna)
+
+    def buscar(self, columna, valor, default=None):
+        """
+        Busca la fila cuya columna clave coincide con el valor dado.
+
+        Args:
+            columna (str): Columna indexada
+            valor (object): Valor a buscar (se normaliza igual que las claves)
+            default (object): Valor devuelto si no hay coincidencia
+
+        Returns:
+            FilaMatriz: Fila encontrada o default
+        """
+        self.asegurar_indice(columna)
+        clave = normalizar_clave(valor)
+        if clave is None:
+            return default
+        posicion = self._indices[columna].get(clave)
+        return FilaMatriz(self, posicion) if posicion is not None else default
+
+    def contiene(self, columna, valor):
+        """Indica si existe una fila con ese valor en la columna clave."""
+        return self.buscar(columna, valor) is not None
+
+    def claves(self, columna):
+        """
+        Obtiene las claves normalizadas de una columna indexada.
+
+        Returns:
+            list: Claves presentes en el indice
+        """
+        self.asegurar_indice(columna)
+        return list(self._indices[columna].keys())
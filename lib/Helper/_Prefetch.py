@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Carga anticipada de la matriz COBie en segundo plano.
+Mientras el usuario selecciona elementos en Revit, la lectura e indexacion del Excel
+avanza en otro hilo (en IronPython cada threading.Thread es un hilo .NET y no hay GIL).
+La fase de escritura solo espera el resultado cuando realmente lo necesita.
+
+Importante: la funcion ejecutada en segundo plano no debe llamar a la API de Revit
+ni mostrar ventanas; solo leer el Excel.
+"""
+
+import threading
+import time
+
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
+
+
+class MatrixPrefetch(object):
+    """
+    Ejecuta una funcion de carga en un hilo de fondo y guarda su resultado.
+    """
+
+    def __init__(self, funcion, *args, **kwargs):
+        """
+        Inicia la carga en segundo plano.
+
+        Args:
+            funcion (callable): Funcion que lee la matriz y devuelve los datos
+            *args: Argumentos posicionales de la funcion
+            **kwargs: Argumentos nombrados de la funcion
+        """
+        self._funcion = funcion
+        self._args = args
+        self._kwargs = kwargs
+        self._resultado = None
+        self._error = None
+        self.segundos = None
+
+        self._hilo = threading.Thread(target=self._ejecutar, name="PQT7-MatrixPrefetch")
+        self._hilo.daemon = True
+        self._hilo.start()
+
+    def _ejecutar(self):
+        inicio = time.time()
+        try:
+            self._resultado = self._funcion(*self._args, **self._kwargs)
+        except Exception as e:
+            self._error = e
+        finally:
+            self.segundos = time.time() - inicio
+
+    def listo(self):
+        """Indica si la carga ya termino (con o sin error)."""
+        return not self._hilo.is_alive()
+
+    def result(self):
+        """
+        Espera a que termine la carga y devuelve su resultado.
+        Si la carga fallo, vuelve a lanzar la excepcion en el hilo principal.
+
+        Returns:
+            object: Valor devuelto por la funcion de carga
+        """
+        self._hilo.join()
+        if self._error is not None:
+            raise self._error
+        return self._resultado
+
+
+def hilos_disponibles():
+    """Cantidad de nucleos logicos de la estacion (4 si no se puede determinar)."""
+    try:
+        from System import Environment
+        return Environment.ProcessorCount
+    except ImportError:
+        import multiprocessing
+        try:
+            return multiprocessing.cpu_count()
+        except NotImplementedError:
+            return 4
+
+
+def ejecutar_en_paralelo(tareas, max_hilos=None):
+    """
+    Ejecuta tareas independientes en un grupo acotado de hilos y junta sus resultados.
+
+    Args:
+        tareas (dict): {nombre: (funcion, args, kwargs)}
+        max_hilos (int): Limite de hilos; por defecto, los nucleos disponibles
+
+    Returns:
+        tuple: ({nombre: resultado}, {nombre: segundos de la tarea})
+               Si alguna tarea falla, se relanza su excepcion al terminar todas.
+    """
+    limite = max_hilos or hilos_disponibles()
+    cola = Queue()
+    for nombre in tareas:
+        cola.put(nombre)
+
+    resultados = {}
+    tiempos = {}
+    errores = []
+
+    def trabajador():
+        while True:
+            try:
+                nombre = cola.get_nowait()
+            except Empty:
+                return
+            funcion, args, kwargs = tareas[nombre]
+            inicio = time.time()
+            try:
+                resultados[nombre] = funcion(*args, **kwargs)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                tiempos[nombre] = time.time() - inicio
+
+    hilos = []
+    for i in range(max(1, min(limite, len(tareas)))):
+        hilo = threading.Thread(target=trabajador, name="PQT7-Lectura-{}".format(i))
+        hilo.daemon = True
+        hilo.start()
+        hilos.append(hilo)
+    for hilo in hilos:
+        hilo.join()
+
+    if errores:
+        raise errores[0]
+    return resultados, tiempos
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Cache en memoria de las hojas proyectadas, compartida por todos los botones de una
+misma sesion de Revit.
+Cada boton de pyRevit corre en un ambito nuevo, asi que la cache se guarda en el
+AppDomain de Revit (fuera de cualquier motor de Python). Solo se guardan tipos basicos
+(dict, list, tuple, str, float) para que cualquier motor pueda leerlos.
+Las entradas se validan con la huella del archivo y se descartan por orden de uso
+(LRU) cuando el tamaño estimado supera LIMITE_BYTES.
+"""
+
+import threading
+
+from Helper import _MatrixCache
+
+CLAVE_APPDOMAIN = "PQT7.MatrixSessionCache"
+
+# Cambiar este numero descarta lo guardado por versiones anteriores del formato
+VERSION_SESION = 1
+
+LIMITE_BYTES = 256 * 1024 * 1024
+
+_BLOQUEO = threading.Lock()
+_ALMACEN_LOCAL = {}
+
+
+def _almacen():
+    """
+    Obtiene el diccionario compartido de la sesion. Fuera de Revit (sin .NET) se usa
+    un diccionario del modulo.
+    """
+    try:
+        from System import AppDomain
+    except ImportError:
+        almacen = _ALMACEN_LOCAL
+    else:
+        dominio = AppDomain.CurrentDomain
+        almacen = dominio.GetData(CLAVE_APPDOMAIN)
+        if almacen is None:
+            almacen = {}
+            dominio.SetData(CLAVE_APPDOMAIN, almacen)
+
+    if almacen.get("version") != VERSION_SESION:
+        almacen.clear()
+        almacen.update({"version": VERSION_SESION, "entradas": {}, "total": 0, "reloj": 0})
+    return almacen
+
+
+def _clave(ruta, hoja, firma):
+    return u"{}|{}|{}".format(_MatrixCache._carpeta_archivo(ruta), hoja, firma)
+
+
+def estimar_tamano(datos):
+    """
+    Estima los bytes que ocupa una proyeccion (faltantes, filas) en memoria.
+
+    Returns:
+        int: Tamaño aproximado en bytes
+    """
+    total = 64
+    for valor in _recorrer(datos):
+        if hasattr(valor, "strip"):
+            total += 40 + 2 * len(valor)
+        else:
+            total += 24
+    return total
+
+
+def _recorrer(valor):
+    if isinstance(valor, (list, tuple)):
+        for elemento in valor:
+            for hoja in _recorrer(elemento):
+                yield hoja
+    else:
+        yield valor
+
+
+def leer(ruta, hoja, firma):
+    """
+    Lee una proyeccion de la sesion si el archivo no cambio desde que se guardo.
+
+    Args:
+        ruta (str): Ruta del archivo Excel de origen
+        hoja (str): Nombre de la hoja
+        firma (str): Identificador de la proyeccion
+
+    Returns:
+        object: Datos guardados o None
+    """
+    huella = _MatrixCache.huella_archivo(ruta)
+    with _BLOQUEO:
+        almacen = _almacen()
+        clave = _clave(ruta, hoja, firma)
+        entrada = almacen["entradas"].get(clave)
+        if entrada is None:
+            return None
+        if huella is None or tuple(entrada[0]) != huella:
+            _descartar(almacen, clave)
+            return None
+        almacen["reloj"] += 1
+        entrada[2] = almacen["reloj"]
+        return entrada[3]
+
+
+def guardar(ruta, hoja, firma, datos):
+    """
+    Guarda una proyeccion en la sesion, descartando las menos usadas si hace falta.
+
+    Args:
+        ruta (str): Ruta del archivo Excel de origen
+        hoja (str): Nombre de la hoja
+        firma (str): Identificador de la proyeccion
+        datos (object): Datos formados solo por tipos basicos
+    """
+    huella = _MatrixCache.huella_archivo(ruta)
+    if huella is None:
+        return
+    tamano = estimar_tamano(datos)
+    if tamano > LIMITE_BYTES:
+        return
+
+    with _BLOQUEO:
+        almacen = _almacen()
+        clave = _clave(ruta, hoja, firma)
+        _descartar(almacen, clave)
+        while almacen["entradas"] and almacen["total"] + tamano > LIMITE_BYTES:
+            menos_usada = min(almacen["entradas"], key=lambda k: almacen["entradas"][k][2])
+            _descartar(almacen, menos_usada)
+        almacen["reloj"] += 1
+        almacen["entradas"][clave] = [list(huella), tamano, almacen["reloj"], datos]
+        almacen["total"] += tamano
+
+
+def _descartar(almacen, clave):
+    entrada = almacen["entradas"].pop(clave, None)
+    if entrada is not None:
+        almacen["total"] -= entrada[1]
+
+
+def invalidar(ruta=None):
+    """
+    Descarta las entradas de un archivo, o todas si ruta es None.
+    """
+    with _BLOQUEO:
+        almacen = _almacen()
+        prefijo = _MatrixCache._carpeta_archivo(ruta) + u"|" if ruta else None
+        for clave in list(almacen["entradas"]):
+            if prefijo is None or clave.startswith(prefijo):
+                _descartar(almacen, clave)
+
+
+def estadisticas():
+    """
+    Resumen del uso de la cache de sesion.
+
+    Returns:
+        dict: {"entradas": cantidad, "bytes": tamaño estimado, "limite": LIMITE_BYTES}
+    """
+    with _BLOQUEO:
+        almacen = _almacen()
+        return {"entradas": len(almacen["entradas"]), "bytes": almacen["total"], "limite": LIMITE_BYTES}
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Indice jerarquico de la tabla Uniclass (EF, Pr y Ss).
+Cada sistema se guarda como una tabla ordenada de numeros; como los numeros Uniclass
+crecen por segmentos ('Pr_65', 'Pr_65_52', 'Pr_65_52_63'), todos los descendientes de
+un numero quedan contiguos en la tabla y se ubican con dos busquedas binarias.
+"""
+
+from bisect import bisect_left
+
+from Helper import _MatrixCache
+from Helper._MatrixTable import normalizar_clave
+
+SISTEMAS = ("EF", "Pr", "Ss")
+
+COLUMNA_CODIGO = u"Código"
+
+COLUMNAS_UNICLASS = [COLUMNA_CODIGO]
+for _sistema in SISTEMAS:
+    COLUMNAS_UNICLASS.append("Classification.Uniclass.{}.Number".format(_sistema))
+    COLUMNAS_UNICLASS.append("Classification.Uniclass.{}.Description".format(_sistema))
+
+_SEPARADOR = "_"
+# Caracter siguiente a '_' en orden: limita el rango de descendientes de un numero
+_FIN_RANGO = chr(ord(_SEPARADOR) + 1)
+
+# Un indice por libro (ruta, hoja y huella del archivo) durante la sesion
+_INDICES = {}
+
+
+def normalizar_numero(numero):
+    """
+    Normaliza un numero Uniclass ('pr_65_52 ' -> 'Pr_65_52').
+
+    Args:
+        numero (object): Numero leido del Excel o de un parametro
+
+    Returns:
+        str: Numero normalizado o None si esta vacio
+    """
+    texto = normalizar_clave(numero)
+    if texto is None:
+        return None
+    partes = texto.replace(" ", "").split(_SEPARADOR)
+    for sistema in SISTEMAS:
+        if partes[0].lower() == sistema.lower():
+            partes[0] = sistema
+            break
+    return _SEPARADOR.join(partes)
+
+
+def sistema_de(numero):
+    """Obtiene el sistema ('EF', 'Pr', 'Ss') de un numero Uniclass normalizado."""
+    if not numero:
+        return None
+    prefijo = numero.split(_SEPARADOR)[0]
+    return prefijo if prefijo in SISTEMAS else None
+
+
+class UniclassIndex(object):
+    """
+    Tabla ordenada por sistema con busqueda exacta, por prefijo y de padres.
+    """
+
+    def __init__(self, filas):
+        """
+        Construye el indice a partir de las filas de la tabla Uniclass.
+
+        Args:
+            filas (iterable): Dicts con las columnas de COLUMNAS_UNICLASS
+        """
+        self._por_codigo = {}
+        self._descripciones = {}
+        self._ss_por_pr = {}
+        self._numeros = dict((s, []) for s in SISTEMAS)
+
+        for fila in filas:
+            numeros = {}
+            for sistema in SISTEMAS:
+                numero = normalizar_numero(fila.get("Classification.Uniclass.{}.Number".format(sistema)))
+                if numero is None:
+                    continue
+                numeros[sistema] = numero
+                if numero not in self._descripciones:
+                    descripcion = fila.get("Classification.Uniclass.{}.Description".format(sistema))
+                    self._descripciones[numero] = u"{}".format(descripcion).strip() if descripcion else u""
+                    self._numeros[sistema].append(numero)
+
+            if "Pr" in numeros and "Ss" in numeros:
+                self._ss_por_pr.setdefault(numeros["Pr"], numeros["Ss"])
+
+            codigo = normalizar_clave(fila.get(COLUMNA_CODIGO))
+            if codigo is not None and codigo not in self._por_codigo:
+                self._por_codigo[codigo] = fila
+
+        for sistema in SISTEMAS:
+            self._numeros[sistema].sort()
+
+    def __len__(self):
+        return len(self._descripciones)
+
+    def __contains__(self, numero):
+        return normalizar_numero(numero) in self._descripciones
+
+    def codigos(self):
+        """Obtiene los codigos de elemento (columna 'Código') presentes en la tabla."""
+        return list(self._por_codigo.keys())
+
+    def descripcion(self, numero, default=None):
+        """
+        Obtiene la descripcion de un numero Uniclass.
+
+        Returns:
+            str: Descripcion o default si el numero no existe
+        """
+        return self._descripciones.get(normalizar_numero(numero), default)
+
+    def por_codigo(self, codigo):
+        """
+        Obtiene la fila Uniclass asociada a un codigo de elemento (columna 'Código').
+
+        Returns:
+            dict: Fila con los numeros y descripciones EF/Pr/Ss, o None
+        """
+        return self._por_codigo.get(normalizar_clave(codigo))
+
+    def descendientes(self, prefijo, incluir=True):
+        """
+        Obtiene los numeros que cuelgan de un prefijo ('Pr_65' -> 'Pr_65_52', ...).
+
+        Args:
+            prefijo (str): Numero o prefijo Uniclass
+            incluir (bool): Si es True incluye el propio prefijo si existe
+
+        Returns:
+            list: Numeros ordenados
+        """
+        prefijo = normalizar_numero(prefijo)
+        tabla = self._numeros.get(sistema_de(prefijo))
+        if not tabla:
+            return []
+
+        inicio = bisect_left(tabla, prefijo + _SEPARADOR)
+        fin = bisect_left(tabla, prefijo + _FIN_RANGO)
+        resultado = tabla[inicio:fin]
+        if incluir and prefijo in self._descripciones:
+            resultado = [prefijo] + resultado
+        return resultado
+
+    def padre(self, numero):
+        """
+        Obtiene el ancestro mas cercano que existe en la tabla ('Pr_65_52_63' -> 'Pr_65_52').
+
+        Returns:
+            str: Numero del padre o None
+        """
+        partes = (normalizar_numero(numero) or "").split(_SEPARADOR)
+        while len(partes) > 1:
+            partes.pop()
+            candidato = _SEPARADOR.join(partes)
+            if candidato in self._descripciones:
+                return candidato
+        return None
+
+    def ss_de_pr(self, numero_pr):
+        """
+        Obtiene el sistema (Ss) asociado a un producto (Pr). Si el producto no tiene
+        una fila propia se usa el de su ancestro mas cercano.
+
+        Returns:
+            str: Numero Ss o None
+        """
+        actual = normalizar_numero(numero_pr)
+        while actual:
+            if actual in self._ss_por_pr:
+                return self._ss_por_pr[actual]
+            actual = self.padre(actual)
+        return None
+
+
+def cargar_indice(excel, hoja=None):
+    """
+    Obtiene el indice Uniclass de un libro. Se construye una sola vez por libro y hoja
+    mientras el archivo no cambie.
+
+    Args:
+        excel (Excel): Instancia de Helper._Excel.Excel con el archivo elegido
+        hoja (str): Hoja de la tabla Uniclass; si es None se busca por sus encabezados
+
+    Returns:
+        UniclassIndex: Indice construido o None si no se encontro la tabla
+    """
+    if not excel.select_file():
+        return None
+    if hoja is None:
+        hoja = excel.buscar_hoja(COLUMNAS_UNICLASS, 0)
+        if hoja is None:
+            return None
+
+    clave = (excel.ruta_archivo, hoja, _MatrixCache.huella_archivo(excel.ruta_archivo))
+    if clave not in _INDICES:
+        tabla = excel.read_table(hoja, COLUMNAS_UNICLASS, 0, 1)
+        if excel.columnas_faltantes:
+            return None
+        _INDICES[clave] = UniclassIndex(tabla)
+    return _INDICES[clave]
@@ -0,0 +1,572 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura directa de archivos xlsx.
+Una sesion Workbook lee el indice del archivo una sola vez y entrega cualquier numero
+de hojas. Cada hoja se parsea recien cuando se pide por primera vez y los textos
+compartidos y estilos se decodifican una unica vez por sesion.
+El zip solo se mantiene abierto mientras dura cada lectura, de modo que una sesion
+guardada en memoria entre botones no deja el archivo bloqueado.
+Varias hojas pueden leerse a la vez desde distintos hilos: cada lectura abre su propio
+manejador del zip y los datos compartidos se inicializan bajo un bloqueo.
+"""
+
+import posixpath
+import re
+import threading
+from contextlib import contextmanager
+import unicodedata
+import zipfile
+from datetime import datetime, timedelta
+
+try:
+    from xml.etree import cElementTree as ET
+except ImportError:
+    from xml.etree import ElementTree as ET
+
+_NS_RELACIONES = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+# Formatos de numero integrados de Excel que representan fechas u horas
+_FORMATOS_FECHA = set(range(14, 23)) | set(range(45, 48))
+
+_FECHA_BASE = datetime(1899, 12, 30)
+
+_ESPACIOS = re.compile(r"\s+")
+_GUION = re.compile(r"\s*-\s*")
+
+
+def _espacio_nombres(tag):
+    """Devuelve el prefijo '{ns}' de una etiqueta XML o cadena vacia."""
+    if tag.startswith("{"):
+        return tag[:tag.index("}") + 1]
+    return ""
+
+
+def indice_columna(referencia):
+    """
+    Convierte una referencia de celda ('AB12') en el indice de columna base 0.
+
+    Args:
+        referencia (str): Referencia de celda o de columna
+
+    Returns:
+        int: Indice de la columna (A = 0)
+    """
+    indice = 0
+    for caracter in referencia:
+        if caracter.isdigit():
+            break
+        indice = indice * 26 + (ord(caracter.upper()) - 64)
+    return indice - 1
+
+
+def _es_formato_fecha(codigo):
+    """Determina si un codigo de formato numerico personalizado representa una fecha."""
+    if not codigo:
+        return False
+    limpio = []
+    dentro_comillas = False
+    dentro_corchetes = False
+    for caracter in codigo:
+        if caracter == '"':
+            dentro_comillas = not dentro_comillas
+        elif caracter == "[" and not dentro_comillas:
+            dentro_corchetes = True
+        elif caracter == "]" and not dentro_comillas:
+            dentro_corchetes = False
+        elif not dentro_comillas and not dentro_corchetes:
+            limpio.append(caracter.lower())
+    texto = "".join(limpio)
+    if texto.strip() == "general":
+        return False
+    return any(c in texto for c in "dmyhs")
+
+
+def normalizar_encabezado(texto):
+    """
+    Normaliza un encabezado o nombre de hoja para compararlo sin depender de
+    mayusculas, tildes ni espacios repetidos o alrededor de guiones.
+    'ESTANDAR COBIE  - PL' y 'Estándar COBie -PL' producen el mismo resultado.
+
+    Args:
+        texto (object): Encabezado leido del Excel
+
+    Returns:
+        str: Texto normalizado
+    """
+    if texto is None:
+        return u""
+    if isinstance(texto, float) and texto.is_integer():
+        texto = int(texto)
+    texto = u"{}".format(texto)
+    texto = u"".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+    texto = _ESPACIOS.sub(u" ", texto).strip()
+    texto = _GUION.sub(u"-", texto)
+    return texto.lower()
+
+
+def resolver_encabezados(headers, columns_name):
+    """
+    Filtra los encabezados encontrados y retorna solo los que están en columns_name.
+    Se arma un diccionario inverso en una sola pasada; cada columna se busca primero
+    por coincidencia exacta y luego por su forma normalizada.
+
+    Args:
+        headers (dict): Diccionario {indice: nombre_columna}
+        columns_name (list): Lista de nombres de columnas requeridas
+
+    Returns:
+        dict: Diccionario {nombre_columna: indice}. Si alguna falta → None
+    """
+    exactos = {}
+    normalizados = {}
+    for i in sorted(headers):
+        h = headers[i]
+        exactos.setdefault(h, i)
+        normalizados.setdefault(normalizar_encabezado(h), i)
+
+    found = {}
+    for col in columns_name:
+        idx = exactos.get(col)
+        if idx is None:
+            idx = normalizados.get(normalizar_encabezado(col))
+        found[col] = idx
+    return found
+
+
+def buscar_hoja(nombres, hoja):
+    """
+    Ubica una hoja por su nombre exacto o, si no existe, por su nombre normalizado.
+
+    Args:
+        nombres (list): Nombres de las hojas disponibles
+        hoja (str): Nombre pedido
+
+    Returns:
+        str: Nombre real de la hoja o None si no se encuentra
+    """
+    if hoja in nombres:
+        return hoja
+    buscado = normalizar_encabezado(hoja)
+    for nombre in nombres:
+        if normalizar_encabezado(nombre) == buscado:
+            return nombre
+    return None
+
+
+class Workbook(object):
+    """
+    Sesion de lectura sobre un archivo xlsx.
+    Cachea el indice y las hojas ya leidas para no volver a parsearlas; el zip se abre
+    solo durante cada lectura.
+    """
+
+    def __init__(self, ruta):
+        """
+        Lee el indice de hojas del archivo xlsx.
+
+        Args:
+            ruta (str): Ruta del archivo xlsx
+        """
+        self.ruta = ruta
+        self._bloqueo = threading.RLock()
+        with self._lector() as archivo:
+            self._miembros = set(archivo.namelist())
+            self._hojas = self._leer_indice_hojas(archivo)
+        self._textos = None
+        self._estilos_fecha = None
+        self._filas_cache = {}
+        self._encabezados = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+    def cerrar(self):
+        """Libera las hojas cacheadas (el zip no queda abierto entre lecturas)."""
+        with self._bloqueo:
+            self._filas_cache = {}
+
+    def nombres_hojas(self):
+        """
+        Obtiene los nombres de las hojas en el orden del libro.
+
+        Returns:
+            list: Nombres de las hojas
+        """
+        return [nombre for nombre, _ in self._hojas]
+
+    def encabezados(self, hoja, start_row):
+        """
+        Obtiene el mapa de encabezados ya descubierto de una hoja.
+
+        Returns:
+            dict: {indice: nombre_columna} o None si aun no se leyo
+        """
+        return self._encabezados.get((hoja, start_row))
+
+    def leer_encabezados(self, hoja, start_row):
+        """
+        Obtiene el mapa de encabezados de una hoja leyendo solo hasta su fila de
+        encabezados (el resto de la hoja no se decodifica).
+
+        Args:
+            hoja (str): Nombre de la hoja
+            start_row (int): Indice de la fila de encabezados
+
+        Returns:
+            dict: {indice: nombre_columna} (vacio si la hoja o la fila no existen)
+        """
+        conocidos = self.encabezados(hoja, start_row)
+        if conocidos is not None:
+            return conocidos
+
+        textos = self._textos_compartidos()
+        encabezados = {}
+        filas = self._recorrer_filas(hoja)
+        try:
+            for indice, elem, ns in filas:
+                if indice < start_row:
+                    continue
+                if indice == start_row:
+                    for columna, celda in self._celdas(elem, ns):
+                        valor = self._valor_celda(celda, ns, textos)
+                        if valor not in ("", None):
+                            encabezados[columna] = valor
+                break
+        finally:
+            filas.close()
+
+        if encabezados:
+            self.registrar_encabezados(hoja, start_row, encabezados)
+        return encabezados
+
+    def registrar_encabezados(self, hoja, start_row, encabezados):
+        """
+        Registra un mapa de encabezados conocido (por ejemplo, leido de la cache en disco)
+        para que proyectar no vuelva a decodificar la fila de encabezados.
+        """
+        self._encabezados[(hoja, start_row)] = encabezados
+
+    def tiene_hoja(self, hoja):
+        """Indica si el libro contiene la hoja indicada."""
+        return self._ruta_hoja(hoja) is not None
+
+    def filas(self, hoja):
+        """
+        Obtiene todas las filas de una hoja como listas de valores.
+        La hoja se parsea solo la primera vez; las siguientes llamadas usan la cache.
+
+        Args:
+            hoja (str): Nombre de la hoja
+
+        Returns:
+            list: Filas de la hoja (lista vacia si la hoja no existe)
+        """
+        if hoja in self._filas_cache:
+            return self._filas_cache[hoja]
+
+        if not self.tiene_hoja(hoja):
+            return []
+
+        filas = list(self.iterar_filas(hoja))
+        ancho = max([len(f) for f in filas]) if filas else 0
+        for fila in filas:
+            if len(fila) < ancho:
+                fila.extend([""] * (ancho - len(fila)))
+
+        self._filas_cache[hoja] = filas
+        return filas
+
+    def iterar_filas(self, hoja, fechas=False):
+        """
+        Recorre las filas de una hoja leyendo el XML de forma incremental.
+        Las filas vacias intermedias se entregan como listas vacias para que el
+        indice de cada fila coincida con su numero en Excel.
+
+        Args:
+            hoja (str): Nombre de la hoja
+            fechas (bool): Si es True, convierte a datetime las celdas con formato de fecha
+
+        Yields:
+            list: Valores de cada fila
+        """
+        textos = self._textos_compartidos()
+        estilos_fecha = self._estilos_de_fecha() if fechas else None
+
+        siguiente = 0
+        for indice, elem, ns in self._recorrer_filas(hoja):
+            while siguiente < indice:
+                yield []
+                siguiente += 1
+
+            fila = []
+            for columna, celda in self._celdas(elem, ns):
+                if columna > len(fila):
+                    fila.extend([""] * (columna - len(fila)))
+                fila.append(self._valor_celda(celda, ns, textos, estilos_fecha))
+
+            yield fila
+            siguiente = indice + 1
+
+    def proyectar(self, hoja, start_row, columns_name, start_data):
+        """
+        Lee una hoja en streaming decodificando solo las columnas requeridas.
+        La fila de encabezados se decodifica completa para ubicar las columnas (salvo que
+        su mapa ya este registrado); en el resto de filas solo se decodifican las celdas
+        de esas columnas, de modo que la memoria depende de las columnas proyectadas y
+        no del tamaño de la hoja.
+
+        Args:
+            hoja (str): Nombre de la hoja
+            start_row (int): Indice de la fila de encabezados
+            columns_name (list): Lista de nombres de columnas requeridas
+            start_data (int): Indice de la fila desde donde empiezan los datos
+
+        Returns:
+            tuple: ({nombre_columna: indice o None}, [tupla de valores por fila]).
+                   Si la hoja o la fila de encabezados no existen devuelve (None, []).
+        """
+        columnas = list(columns_name)
+        textos = self._textos_compartidos()
+
+        indices = None
+        posiciones = {}
+        vacia = ()
+        filas = []
+        siguiente = start_data
+
+        def ubicar_columnas(encabezados):
+            indices = resolver_encabezados(encabezados, columnas)
+            for posicion, nombre in enumerate(columnas):
+                if indices[nombre] is not None:
+                    posiciones.setdefault(indices[nombre], []).append(posicion)
+            return indices, tuple("" if indices[c] is not None else None for c in columnas)
+
+        conocidos = self.encabezados(hoja, start_row)
+        if conocidos is not None:
+            indices, vacia = ubicar_columnas(conocidos)
+
+        for indice, elem, ns in self._recorrer_filas(hoja):
+            if indice < start_row:
+                continue
+
+            if indice == start_row:
+                if conocidos is None:
+                    encabezados = {}
+                    for columna, celda in self._celdas(elem, ns):
+                        valor = self._valor_celda(celda, ns, textos)
+                        if valor not in ("", None):
+                            encabezados[columna] = valor
+                    self.registrar_encabezados(hoja, start_row, encabezados)
+                    indices, vacia = ubicar_columnas(encabezados)
+                continue
+
+            if indices is None or indice < start_data:
+                continue
+
+            while siguiente < indice:
+                filas.append(vacia)
+                siguiente += 1
+
+            valores = list(vacia)
+            for columna, celda in self._celdas(elem, ns):
+                if columna in posiciones:
+                    valor = self._valor_celda(celda, ns, textos)
+                    for posicion in posiciones[columna]:
+                        valores[posicion] = valor
+            filas.append(tuple(valores))
+            siguiente = indice + 1
+
+        return indices, filas
+
+    def _recorrer_filas(self, hoja):
+        """
+        Recorre los elementos <row> de una hoja sin decodificar sus celdas.
+        Cada fila se libera del arbol en cuanto el consumidor termina con ella.
+
+        Yields:
+            tuple: (indice base 0 de la fila, elemento row, espacio de nombres)
+        """
+        ruta_hoja = self._ruta_hoja(hoja)
+        if ruta_hoja is None:
+            return
+
+        with self._lector() as archivo:
+            stream = archivo.open(ruta_hoja)
+            try:
+                ns = None
+                contenedor = None
+                siguiente = 0
+                for evento, elem in ET.iterparse(stream, events=("start", "end")):
+                    if ns is None:
+                        ns = _espacio_nombres(elem.tag)
+                        tag_fila = ns + "row"
+                        tag_datos = ns + "sheetData"
+
+                    if evento == "start":
+                        if elem.tag == tag_datos:
+                            contenedor = elem
+                        continue
+
+                    if elem.tag != tag_fila:
+                        continue
+
+                    numero = elem.get("r")
+                    indice = int(numero) - 1 if numero else siguiente
+                    yield indice, elem, ns
+                    siguiente = indice + 1
+                    if contenedor is not None:
+                        contenedor.clear()
+            finally:
+                stream.close()
+
+    def _celdas(self, fila, ns):
+        """Recorre las celdas de un elemento row devolviendo (indice de columna, celda)."""
+        columna = 0
+        for celda in fila.iter(ns + "c"):
+            referencia = celda.get("r")
+            if referencia:
+                columna = indice_columna(referencia)
+            yield columna, celda
+            columna += 1
+
+    def _valor_celda(self, celda, ns, textos, estilos_fecha=None):
+        """Decodifica el valor de una celda con el mismo criterio que xlrd."""
+        tipo = celda.get("t")
+        if tipo == "inlineStr":
+            nodo = celda.find(ns + "is")
+            return self._texto_rico(nodo, ns) if nodo is not None else ""
+
+        nodo_valor = celda.find(ns + "v")
+        if nodo_valor is None or nodo_valor.text is None:
+            return ""
+        texto = nodo_valor.text
+
+        if tipo == "s":
+            return textos[int(texto)]
+        if tipo in ("str", "e", "d"):
+            return texto
+        if tipo == "b":
+            return int(texto)
+
+        valor = float(texto)
+        if estilos_fecha and celda.get("s") in estilos_fecha:
+            return _FECHA_BASE + timedelta(days=valor)
+        return valor
+
+    def _texto_rico(self, nodo, ns):
+        """Une los fragmentos <t> de un texto (ignorando la guia fonetica)."""
+        partes = []
+        tag_t = ns + "t"
+        tag_r = ns + "r"
+        for hijo in nodo:
+            if hijo.tag == tag_t:
+                partes.append(hijo.text or "")
+            elif hijo.tag == tag_r:
+                for t in hijo.iter(tag_t):
+                    partes.append(t.text or "")
+        return "".join(partes)
+
+    def _textos_compartidos(self):
+        """Decodifica la tabla de textos compartidos una sola vez por sesion."""
+        if self._textos is not None:
+            return self._textos
+
+        with self._bloqueo:
+            if self._textos is not None:
+                return self._textos
+
+            textos = []
+            if "xl/sharedStrings.xml" in self._miembros:
+                with self._lector() as archivo:
+                    stream = archivo.open("xl/sharedStrings.xml")
+                    try:
+                        ns = None
+                        for _, elem in ET.iterparse(stream):
+                            if ns is None:
+                                ns = _espacio_nombres(elem.tag)
+                            if elem.tag == ns + "si":
+                                textos.append(self._texto_rico(elem, ns))
+                                elem.clear()
+                    finally:
+                        stream.close()
+            self._textos = textos
+        return self._textos
+
+    def _estilos_de_fecha(self):
+        """Obtiene los indices de estilo (atributo 's') que corresponden a fechas."""
+        if self._estilos_fecha is not None:
+            return self._estilos_fecha
+
+        with self._bloqueo:
+            if self._estilos_fecha is not None:
+                return self._estilos_fecha
+
+            estilos = set()
+            if "xl/styles.xml" in self._miembros:
+                with self._lector() as archivo:
+                    raiz = ET.fromstring(archivo.read("xl/styles.xml"))
+                ns = _espacio_nombres(raiz.tag)
+
+                formatos_fecha = set(_FORMATOS_FECHA)
+                for formato in raiz.iter(ns + "numFmt"):
+                    if _es_formato_fecha(formato.get("formatCode")):
+                        formatos_fecha.add(int(formato.get("numFmtId")))
+
+                celdas = raiz.find(ns + "cellXfs")
+                if celdas is not None:
+                    for indice, xf in enumerate(celdas.findall(ns + "xf")):
+                        if int(xf.get("numFmtId", 0)) in formatos_fecha:
+                            estilos.add(str(indice))
+            self._estilos_fecha = estilos
+        return self._estilos_fecha
+
+    @contextmanager
+    def _lector(self):
+        """
+        Abre el zip para una lectura y lo cierra al terminarla, para no dejar el archivo
+        bloqueado. Cada lectura usa su propio ZipFile: zipfile no garantiza que un mismo
+        ZipFile sea seguro entre hilos en todas las implementaciones (IronPython).
+        """
+        archivo = zipfile.ZipFile(self.ruta)
+        try:
+            yield archivo
+        finally:
+            archivo.close()
+
+    def _leer_indice_hojas(self, archivo):
+        """Lee workbook.xml y sus relaciones para ubicar el XML de cada hoja."""
+        raiz = ET.fromstring(archivo.read("xl/workbook.xml"))
+        ns = _espacio_nombres(raiz.tag)
+
+        destinos = {}
+        rels = ET.fromstring(archivo.read("xl/_rels/workbook.xml.rels"))
+        for rel in rels:
+            destino = rel.get("Target", "")
+            if destino.startswith("/"):
+                destino = destino[1:]
+            else:
+                destino = posixpath.normpath(posixpath.join("xl", destino))
+            destinos[rel.get("Id")] = destino
+
+        hojas = []
+        for hoja in raiz.iter(ns + "sheet"):
+            rel_id = hoja.get(_NS_RELACIONES + "id")
+            if rel_id is None:
+                # Archivos en formato OOXML estricto usan otro espacio de nombres
+                for clave, valor in hoja.attrib.items():
+                    if clave.endswith("}id"):
+                        rel_id = valor
+                        break
+            hojas.append((hoja.get("name"), destinos.get(rel_id)))
+        return hojas
+
+    def _ruta_hoja(self, hoja):
+        """Devuelve la ruta interna del XML de una hoja o None si no existe."""
+        nombre = buscar_hoja(self.nombres_hojas(), hoja)
+        for n, ruta in self._hojas:
+            if n == nombre:
+                return ruta
+        return None
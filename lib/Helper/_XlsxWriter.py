@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Escritura de archivos xlsx en streaming.
+Cada fila se escribe directamente al XML de la hoja en un archivo temporal, sin armar
+el libro en memoria; al cerrar, las hojas se copian al zip final. Los textos se
+guardan como cadenas en linea (inlineStr), asi no hace falta una tabla de textos
+compartidos. El archivo resultante se lee con Helper._Workbook como cualquier otro.
+"""
+
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+# Caracteres de control que XML 1.0 no admite
+_INVALIDOS_XML = re.compile(u"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    u'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    u'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    u'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    u'<Default Extension="xml" ContentType="application/xml"/>'
+    u'<Override PartName="/xl/workbook.xml" '
+    u'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    u'{hojas}</Types>'
+)
+_CONTENT_TYPE_HOJA = (
+    u'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    u'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_RELS = (
+    u'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    u'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    u'<Relationship Id="rId1" '
+    u'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    u'Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    u'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    u'<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    u'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    u'<sheets>{hojas}</sheets></workbook>'
+)
+_WORKBOOK_HOJA = u'<sheet name="{nombre}" sheetId="{n}" r:id="rId{n}"/>'
+_WORKBOOK_RELS = (
+    u'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    u'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    u'{hojas}</Relationships>'
+)
+_WORKBOOK_RELS_HOJA = (
+    u'<Relationship Id="rId{n}" '
+    u'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    u'Target="worksheets/sheet{n}.xml"/>'
+)
+_INICIO_HOJA = (
+    u'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    u'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_FIN_HOJA = u'</sheetData></worksheet>'
+
+try:
+    _TEXTO = unicode
+    _ENTEROS = (int, long)
+except NameError:
+    _TEXTO = str
+    _ENTEROS = (int,)
+
+
+def letra_columna(indice):
+    """
+    Convierte un indice de columna base 0 en su letra ('A', ..., 'Z', 'AA', ...).
+    Es la inversa de Helper._Workbook.indice_columna.
+    """
+    letras = u""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celda(referencia, valor):
+    """Genera el XML de una celda, o cadena vacia si el valor esta vacio."""
+    if valor is None:
+        return u""
+    if isinstance(valor, bool):
+        return u'<c r="{}" t="b"><v>{}</v></c>'.format(referencia, int(valor))
+    if isinstance(valor, float):
+        return u'<c r="{}"><v>{}</v></c>'.format(referencia, repr(valor))
+    if isinstance(valor, _ENTEROS):
+        return u'<c r="{}"><v>{}</v></c>'.format(referencia, valor)
+    if not isinstance(valor, _TEXTO):
+        if isinstance(valor, bytes):
+            valor = valor.decode("utf-8", "replace")
+        else:
+            valor = _TEXTO(valor)
+    if not valor:
+        return u""
+    valor = _INVALIDOS_XML.sub(u"", valor)
+    return u'<c r="{}" t="inlineStr"><is><t xml:space="preserve">{}</t></is></c>'.format(
+        referencia, escape(valor))
+
+
+class ArchivoEnUsoError(IOError):
+    """El xlsx de destino no se pudo reemplazar, por ejemplo porque esta abierto en Excel."""
+    pass
+
+
+class XlsxWriter(object):
+    """
+    Libro xlsx que se escribe fila por fila.
+
+    Uso:
+        with XlsxWriter(ruta) as libro:
+            libro.nueva_hoja("ESTANDAR COBIE -AR")
+            libro.escribir_fila(["CODIGO", "COBie.Type.Name"])
+    """
+
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta (str): Ruta del xlsx a generar; se reemplaza al cerrar
+        """
+        self.ruta = ruta
+        self._carpeta = tempfile.mkdtemp(prefix="pqt7_xlsx_")
+        self._hojas = []        # [(nombre, ruta del XML temporal)]
+        self._archivo = None
+        self._fila = 0
+        self._letras = []       # letras de columna ya calculadas
+        self.filas_escritas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.descartar()
+        return False
+
+    def nueva_hoja(self, nombre):
+        """
+        Empieza una hoja nueva; las filas siguientes se escriben en ella.
+
+        Args:
+            nombre (str): Nombre de la hoja (Excel admite hasta 31 caracteres)
+        """
+        self._terminar_hoja()
+        ruta_hoja = os.path.join(self._carpeta, "sheet{}.xml".format(len(self._hojas) + 1))
+        self._hojas.append((nombre[:31], ruta_hoja))
+        self._archivo = io.open(ruta_hoja, "w", encoding="utf-8")
+        self._archivo.write(_INICIO_HOJA)
+        self._fila = 0
+
+    def escribir_fila(self, valores):
+        """
+        Escribe una fila en la hoja actual. Los None y textos vacios quedan como celdas vacias.
+
+        Args:
+            valores (iterable): Valores de la fila (texto, numero o None)
+        """
+        if self._archivo is None:
+            self.nueva_hoja(u"Hoja1")
+        valores = list(valores)
+        while len(self._letras) < len(valores):
+            self._letras.append(letra_columna(len(self._letras)))
+        self._fila += 1
+        fila = _TEXTO(self._fila)
+        celdas = u"".join(_celda(letra + fila, valor) for letra, valor in zip(self._letras, valores))
+        self._archivo.write(u'<row r="{}">{}</row>'.format(self._fila, celdas))
+        self.filas_escritas += 1
+
+    def saltar_filas(self, cantidad):
+        """Deja filas vacias en la hoja actual (por ejemplo, antes de los encabezados)."""
+        self._fila += cantidad
+
+    def _terminar_hoja(self):
+        if self._archivo is not None:
+            self._archivo.write(_FIN_HOJA)
+            self._archivo.close()
+            self._archivo = None
+
+    def cerrar(self):
+        """Arma el xlsx final a partir de las hojas escritas y borra los temporales."""
+        if not self._hojas:
+            self.nueva_hoja(u"Hoja1")
+        self._terminar_hoja()
+
+        numeros = range(1, len(self._hojas) + 1)
+        temporal = self.ruta + ".tmp"
+        try:
+            with zipfile.ZipFile(temporal, "w", zipfile.ZIP_DEFLATED) as libro:
+                libro.writestr("[Content_Types].xml", _CONTENT_TYPES.format(
+                    hojas=u"".join(_CONTENT_TYPE_HOJA.format(n=n) for n in numeros)).encode("utf-8"))
+                libro.writestr("_rels/.rels", _RELS.encode("utf-8"))
+                libro.writestr("xl/workbook.xml", _WORKBOOK.format(hojas=u"".join(
+                    _WORKBOOK_HOJA.format(nombre=escape(nombre, {'"': "&quot;"}), n=n)
+                    for n, (nombre, _) in zip(numeros, self._hojas))).encode("utf-8"))
+                libro.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(
+                    hojas=u"".join(_WORKBOOK_RELS_HOJA.format(n=n) for n in numeros)).encode("utf-8"))
+                for n, (_, ruta_hoja) in zip(numeros, self._hojas):
+                    libro.write(ruta_hoja, "xl/worksheets/sheet{}.xml".format(n))
+            try:
+                if os.path.exists(self.ruta):
+                    os.remove(self.ruta)
+                os.rename(temporal, self.ruta)
+            except (IOError, OSError) as e:
+                raise ArchivoEnUsoError(u"No se pudo reemplazar '{}'; cierre el archivo si esta abierto "
+                                        u"en Excel y vuelva a intentarlo ({})".format(self.ruta, e))
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            shutil.rmtree(self._carpeta, ignore_errors=True)
+
+    def descartar(self):
+        """Descarta lo escrito sin generar el xlsx."""
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        shutil.rmtree(self._carpeta, ignore_errors=True)
@@ -0,0 +1,777 @@
+# -*- coding: utf-8 -*-
+"""
+Sustituto en Python puro de la parte de Autodesk.Revit.DB que usa la extension.
+Permite ejecutar y medir la logica de lib/ fuera de Revit (por ejemplo en Linux) con
+modelos sinteticos generados por offline/modelo.py. No intenta reproducir toda la API:
+solo el comportamiento que la extension necesita, incluidas las reglas que afectan al
+rendimiento (los parametros solo se escriben dentro de una transaccion, LookupParameter
+recorre los parametros del elemento y get_Parameter(guid) es un acceso directo).
+"""
+
+import uuid
+
+from Autodesk.Revit.Exceptions import (
+    ArgumentException, InvalidOperationException, ModificationOutsideTransactionException)
+
+try:
+    _TEXTO = (str, unicode)
+    _ENTEROS = (int, long)
+except NameError:
+    _TEXTO = (str,)
+    _ENTEROS = (int,)
+
+
+# ==== Enumeraciones ====
+
+class ValorEnumeracion(object):
+    """Valor de una enumeracion .NET: se compara por identidad y conoce su nombre."""
+
+    __slots__ = ("enumeracion", "nombre", "valor")
+
+    def __init__(self, enumeracion, nombre, valor):
+        self.enumeracion = enumeracion
+        self.nombre = nombre
+        self.valor = valor
+
+    def __int__(self):
+        return self.valor
+
+    def __repr__(self):
+        return "{}.{}".format(self.enumeracion, self.nombre)
+
+    __str__ = __repr__
+
+
+class Enumeracion(object):
+    """
+    Enumeracion .NET. Si es abierta, cualquier nombre pedido se crea al vuelo
+    (BuiltInParameter y BuiltInCategory tienen miles de valores).
+    """
+
+    def __init__(self, nombre, valores=(), abierta=False):
+        self._nombre = nombre
+        self._abierta = abierta
+        self._valores = []
+        for valor in valores:
+            self._agregar(valor)
+
+    def _agregar(self, nombre):
+        valor = ValorEnumeracion(self._nombre, nombre, len(self._valores))
+        self._valores.append(valor)
+        object.__setattr__(self, nombre, valor)
+        return valor
+
+    def __getattr__(self, nombre):
+        if nombre.startswith("_") or not self._abierta:
+            raise AttributeError("{} no tiene el valor '{}'".format(self._nombre, nombre))
+        return self._agregar(nombre)
+
+    def GetValues(self, *args):
+        return list(self._valores)
+
+    def __repr__(self):
+        return self._nombre
+
+
+StorageType = Enumeracion("StorageType", ["None", "Integer", "Double", "String", "ElementId"])
+BuiltInParameter = Enumeracion("BuiltInParameter", [
+    "INVALID", "SYMBOL_NAME_PARAM", "ALL_MODEL_TYPE_NAME", "ALL_MODEL_FAMILY_NAME", "ELEM_TYPE_PARAM",
+    "LEVEL_IS_BUILDING_STORY", "LEVEL_ELEV", "BASEPOINT_ELEVATION_PARAM", "ROOM_NAME", "ROOM_NUMBER",
+    "ROOM_AREA", "ELEM_PARTITION_PARAM", "EDITED_BY",
+], abierta=True)
+BuiltInCategory = Enumeracion("BuiltInCategory", [
+    "INVALID", "OST_GenericModel", "OST_Furniture", "OST_Doors", "OST_Windows", "OST_PlumbingFixtures",
+    "OST_LightingFixtures", "OST_ElectricalEquipment", "OST_MechanicalEquipment", "OST_Rooms",
+    "OST_MEPSpaces", "OST_Levels", "OST_ProjectInformation", "OST_ProjectBasePoint",
+    "OST_DuctSystem", "OST_PipingSystem",
+], abierta=True)
+TransactionStatus = Enumeracion("TransactionStatus", ["Uninitialized", "Started", "RolledBack", "Committed", "Pending", "Error"])
+CheckoutStatus = Enumeracion("CheckoutStatus", ["OwnedByCurrentUser", "OwnedByOtherUser", "NotOwned"])
+ModelUpdatesStatus = Enumeracion("ModelUpdatesStatus", ["CurrentWithCentral", "UpdatedInCentral", "DeletedInCentral", "NotYetInCentral"])
+
+
+# ==== Identificadores y geometria ====
+
+class ElementId(object):
+    __slots__ = ("IntegerValue",)
+
+    def __init__(self, valor):
+        self.IntegerValue = int(valor)
+
+    @property
+    def Value(self):
+        return self.IntegerValue
+
+    def __eq__(self, otro):
+        return isinstance(otro, ElementId) and otro.IntegerValue == self.IntegerValue
+
+    def __ne__(self, otro):
+        return not self.__eq__(otro)
+
+    def __hash__(self):
+        return hash(self.IntegerValue)
+
+    def __repr__(self):
+        return "ElementId({})".format(self.IntegerValue)
+
+    __str__ = lambda self: str(self.IntegerValue)
+
+
+ElementId.InvalidElementId = ElementId(-1)
+
+
+class Guid(object):
+    """System.Guid reducido: envuelve uuid.UUID."""
+
+    @staticmethod
+    def NewGuid():
+        return uuid.uuid4()
+
+    @staticmethod
+    def Parse(texto):
+        return uuid.UUID(texto)
+
+
+class XYZ(object):
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.X, self.Y, self.Z = float(x), float(y), float(z)
+
+    def __add__(self, otro):
+        return XYZ(self.X + otro.X, self.Y + otro.Y, self.Z + otro.Z)
+
+    def __sub__(self, otro):
+        return XYZ(self.X - otro.X, self.Y - otro.Y, self.Z - otro.Z)
+
+    def __mul__(self, factor):
+        return XYZ(self.X * factor, self.Y * factor, self.Z * factor)
+
+    def DistanceTo(self, otro):
+        return ((self.X - otro.X) ** 2 + (self.Y - otro.Y) ** 2 + (self.Z - otro.Z) ** 2) ** 0.5
+
+    def IsAlmostEqualTo(self, otro, tolerancia=1e-9):
+        return self.DistanceTo(otro) <= tolerancia
+
+    def __repr__(self):
+        return "XYZ({}, {}, {})".format(self.X, self.Y, self.Z)
+
+
+XYZ.Zero = XYZ()
+
+
+class BoundingBoxXYZ(object):
+    def __init__(self, minimo=None, maximo=None):
+        self.Min = minimo or XYZ()
+        self.Max = maximo or XYZ()
+
+
+class Transform(object):
+    def __init__(self, origen=None):
+        self.Origin = origen or XYZ()
+
+    def OfPoint(self, punto):
+        return punto + self.Origin
+
+
+Transform.Identity = Transform()
+
+
+# ==== Unidades ====
+
+class UnitTypeId(object):
+    Feet = "Feet"
+    Meters = "Meters"
+    Centimeters = "Centimeters"
+    Millimeters = "Millimeters"
+    SquareMeters = "SquareMeters"
+    CubicMeters = "CubicMeters"
+
+
+_FACTORES_UNIDAD = {
+    UnitTypeId.Feet: 1.0,
+    UnitTypeId.Meters: 0.3048,
+    UnitTypeId.Centimeters: 30.48,
+    UnitTypeId.Millimeters: 304.8,
+    UnitTypeId.SquareMeters: 0.3048 ** 2,
+    UnitTypeId.CubicMeters: 0.3048 ** 3,
+}
+
+
+class UnitUtils(object):
+    @staticmethod
+    def ConvertFromInternalUnits(valor, unidad):
+        return valor * _FACTORES_UNIDAD[unidad]
+
+    @staticmethod
+    def ConvertToInternalUnits(valor, unidad):
+        return valor / _FACTORES_UNIDAD[unidad]
+
+
+# ==== Parametros ====
+
+class Definition(object):
+    def __init__(self, nombre):
+        self.Name = nombre
+
+
+class Parameter(object):
+    """
+    Parametro de un elemento. Set solo funciona dentro de una transaccion y guarda el
+    valor anterior para poder deshacerlo.
+    """
+
+    _VACIOS = {
+        StorageType.String: None,
+        StorageType.Double: 0.0,
+        StorageType.Integer: 0,
+        StorageType.ElementId: ElementId.InvalidElementId,
+    }
+
+    def __init__(self, elemento, nombre, storage_type, valor=None, guid=None, solo_lectura=False, integrado=None):
+        self.Element = elemento
+        self.Definition = Definition(nombre)
+        self.StorageType = storage_type
+        self.GUID = guid
+        self.IsShared = guid is not None
+        self.IsReadOnly = solo_lectura
+        self.BuiltInParameter = integrado
+        self._valor = valor
+
+    @property
+    def HasValue(self):
+        return self._valor is not None
+
+    def AsString(self):
+        if self.StorageType == StorageType.String:
+            return self._valor
+        return None
+
+    def AsValueString(self):
+        return None if self._valor is None else u"{}".format(self._valor)
+
+    def AsDouble(self):
+        return float(self._valor) if self.StorageType == StorageType.Double and self._valor is not None else 0.0
+
+    def AsInteger(self):
+        return int(self._valor) if self.StorageType == StorageType.Integer and self._valor is not None else 0
+
+    def AsElementId(self):
+        if self.StorageType == StorageType.ElementId and self._valor is not None:
+            return self._valor
+        return ElementId.InvalidElementId
+
+    def Set(self, valor):
+        if self.IsReadOnly:
+            raise InvalidOperationException("El parametro '{}' es de solo lectura".format(self.Definition.Name))
+        documento = self.Element.Document
+        if documento is None or documento._transaccion is None:
+            raise ModificationOutsideTransactionException("Modificacion fuera de una transaccion")
+        valor = self._validar(valor)
+        documento._registrar(self, self._valor)
+        self._valor = valor
+        return True
+
+    def _validar(self, valor):
+        if self.StorageType == StorageType.String and isinstance(valor, _TEXTO):
+            return valor
+        if self.StorageType == StorageType.Double and isinstance(valor, (float,) + _ENTEROS) and not isinstance(valor, bool):
+            return float(valor)
+        if self.StorageType == StorageType.Integer and isinstance(valor, _ENTEROS):
+            return int(valor)
+        if self.StorageType == StorageType.ElementId and isinstance(valor, ElementId):
+            return valor
+        raise ArgumentException("Valor {!r} no valido para un parametro {}".format(valor, self.StorageType))
+
+    def __repr__(self):
+        return "Parameter({!r}={!r})".format(self.Definition.Name, self._valor)
+
+
+# ==== Elementos ====
+
+class Category(object):
+    def __init__(self, integrada, nombre):
+        self.BuiltInCategory = integrada
+        self.Name = nombre
+        self.Id = ElementId(-1000 - integrada.valor)
+
+
+class Element(object):
+    def __init__(self, nombre=""):
+        self.Id = ElementId.InvalidElementId
+        self.Document = None
+        self.Category = None
+        self._nombre = nombre
+        self._parametros = []       # en orden, como Element.Parameters
+        self._por_guid = {}
+        self._integrados = {}
+        self._id_tipo = ElementId.InvalidElementId
+        self.WorksetId = ElementId(0)
+        self.IsValidObject = True
+
+    # ---- Construccion (solo para los generadores) ----
+    def agregar_parametro(self, nombre, storage_type, valor=None, guid=None, solo_lectura=False, integrado=None):
+        param = Parameter(self, nombre, storage_type, valor, guid, solo_lectura, integrado)
+        self._parametros.append(param)
+        if guid is not None:
+            self._por_guid[guid] = param
+        if integrado is not None:
+            self._integrados[integrado] = param
+        return param
+
+    # ---- API ----
+    @property
+    def Name(self):
+        return self._nombre
+
+    @Name.setter
+    def Name(self, valor):
+        self._nombre = valor
+
+    @property
+    def Parameters(self):
+        return list(self._parametros)
+
+    def LookupParameter(self, nombre):
+        # Igual que en Revit: busqueda lineal por nombre entre los parametros del elemento
+        for param in self._parametros:
+            if param.Definition.Name == nombre:
+                return param
+        return None
+
+    def get_Parameter(self, clave):
+        if isinstance(clave, ValorEnumeracion):
+            return self._integrados.get(clave)
+        if isinstance(clave, Definition):
+            return self.LookupParameter(clave.Name)
+        return self._por_guid.get(clave)
+
+    def GetTypeId(self):
+        return self._id_tipo
+
+    def GetParameters(self, nombre):
+        return [p for p in self._parametros if p.Definition.Name == nombre]
+
+    def __repr__(self):
+        return "{}({}, {!r})".format(type(self).__name__, self.Id.IntegerValue, self._nombre)
+
+
+class ElementType(Element):
+    def __init__(self, nombre="", familia=""):
+        Element.__init__(self, nombre)
+        self.FamilyName = familia
+
+
+class FamilySymbol(ElementType):
+    pass
+
+
+class FamilyInstance(Element):
+    def __init__(self, nombre=""):
+        Element.__init__(self, nombre)
+        self._subcomponentes = []
+        self.SuperComponent = None
+
+    @property
+    def Symbol(self):
+        return self.Document.GetElement(self._id_tipo) if self.Document else None
+
+    def GetSubComponentIds(self):
+        return list(self._subcomponentes)
+
+
+class Level(Element):
+    def __init__(self, nombre="", elevacion=0.0):
+        Element.__init__(self, nombre)
+        self.Elevation = elevacion
+
+
+class SharedParameterElement(Element):
+    def __init__(self, nombre, guid):
+        Element.__init__(self, nombre)
+        self.GuidValue = guid
+
+    def GetDefinition(self):
+        return Definition(self.Name)
+
+
+class RevitLinkInstance(Element):
+    def GetLinkDocument(self):
+        return None
+
+
+class SpatialElementBoundaryOptions(object):
+    pass
+
+
+# ==== Documento ====
+
+class _Categorias(object):
+    def __init__(self):
+        self._categorias = {}
+
+    def get_Item(self, integrada):
+        if integrada not in self._categorias:
+            self._categorias[integrada] = Category(integrada, integrada.nombre.replace("OST_", ""))
+        return self._categorias[integrada]
+
+
+class _Ajustes(object):
+    def __init__(self):
+        self.Categories = _Categorias()
+
+
+class Document(object):
+    """
+    Documento en memoria. Los elementos se agregan con agregar(); los cambios de
+    parametros se registran en la transaccion abierta para poder deshacerlos.
+    """
+
+    def __init__(self, titulo="Modelo.rvt", workshared=False, usuario="usuario"):
+        self.Title = titulo
+        self.PathName = titulo
+        self.IsWorkshared = workshared
+        self.Settings = _Ajustes()
+        self.usuario = usuario
+        self._elementos = {}
+        self._siguiente_id = 1
+        self._transaccion = None
+        self._grupos = []
+        self.IsValidObject = True
+        # Estadisticas utiles para las mediciones
+        self.escrituras = 0
+        self.modificados = set()
+
+    # ---- Construccion ----
+    def agregar(self, elemento, categoria=None):
+        elemento.Id = ElementId(self._siguiente_id)
+        self._siguiente_id += 1
+        elemento.Document = self
+        if categoria is not None:
+            elemento.Category = self.Settings.Categories.get_Item(categoria)
+        self._elementos[elemento.Id.IntegerValue] = elemento
+        return elemento
+
+    # ---- API ----
+    def GetElement(self, clave):
+        if isinstance(clave, ElementId):
+            clave = clave.IntegerValue
+        elif hasattr(clave, "ElementId"):
+            clave = clave.ElementId.IntegerValue
+        return self._elementos.get(clave)
+
+    @property
+    def IsModifiable(self):
+        return self._transaccion is not None
+
+    def GetHashCode(self):
+        return id(self)
+
+    def Equals(self, otro):
+        return self is otro
+
+    def Delete(self, element_id):
+        # Igual que en Revit: el objeto borrado queda invalido (IsValidObject = False)
+        elemento = self._elementos.pop(element_id.IntegerValue, None)
+        if elemento is not None:
+            elemento.IsValidObject = False
+        return [element_id] if elemento is not None else []
+
+    def Close(self, *args):
+        self.IsValidObject = False
+        for elemento in self._elementos.values():
+            elemento.IsValidObject = False
+        return True
+
+    def elementos(self):
+        return self._elementos.values()
+
+    def GetWorksharingCentralModelPath(self):
+        if not self.IsWorkshared:
+            raise InvalidOperationException("El documento no es colaborativo")
+        return ModelPath(u"\\\\servidor\\central\\" + self.Title)
+
+    # ---- Transacciones ----
+    def _registrar(self, param, anterior):
+        self._transaccion._cambios.append((param, anterior))
+        self.escrituras += 1
+        self.modificados.add(param.Element.Id.IntegerValue)
+
+
+class ModelPath(object):
+    def __init__(self, ruta):
+        self._ruta = ruta
+
+
+class ModelPathUtils(object):
+    @staticmethod
+    def ConvertModelPathToUserVisiblePath(ruta):
+        return ruta._ruta
+
+
+class Reference(object):
+    def __init__(self, elemento):
+        self.ElementId = elemento.Id
+
+
+class Transaction(object):
+    def __init__(self, doc, nombre=""):
+        self._doc = doc
+        self.Name = nombre
+        self._cambios = []
+        self._estado = TransactionStatus.Uninitialized
+
+    def Start(self, *args):
+        if self._doc._transaccion is not None:
+            raise InvalidOperationException("Ya hay una transaccion abierta")
+        self._doc._transaccion = self
+        self._estado = TransactionStatus.Started
+        return self._estado
+
+    def Commit(self):
+        self._cerrar()
+        if self._doc._grupos:
+            self._doc._grupos[-1]._cambios.extend(self._cambios)
+        self._estado = TransactionStatus.Committed
+        return self._estado
+
+    def RollBack(self):
+        self._cerrar()
+        _deshacer(self._cambios)
+        self._estado = TransactionStatus.RolledBack
+        return self._estado
+
+    def GetStatus(self):
+        return self._estado
+
+    def HasStarted(self):
+        return self._estado == TransactionStatus.Started
+
+    def _cerrar(self):
+        if self._doc._transaccion is not self:
+            raise InvalidOperationException("La transaccion no esta abierta")
+        self._doc._transaccion = None
+
+    def __enter__(self):
+        self.Start()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if self._estado == TransactionStatus.Started:
+            self.Commit() if tipo is None else self.RollBack()
+        return False
+
+
+class TransactionGroup(object):
+    def __init__(self, doc, nombre=""):
+        self._doc = doc
+        self.Name = nombre
+        self._cambios = []
+        self._estado = TransactionStatus.Uninitialized
+
+    def Start(self, *args):
+        self._doc._grupos.append(self)
+        self._estado = TransactionStatus.Started
+        return self._estado
+
+    def Assimilate(self):
+        return self._cerrar(TransactionStatus.Committed)
+
+    def Commit(self):
+        return self._cerrar(TransactionStatus.Committed)
+
+    def RollBack(self):
+        _deshacer(self._cambios)
+        self._cambios = []
+        return self._cerrar(TransactionStatus.RolledBack)
+
+    def GetStatus(self):
+        return self._estado
+
+    def HasStarted(self):
+        return self._estado == TransactionStatus.Started
+
+    def _cerrar(self, estado):
+        if not self._doc._grupos or self._doc._grupos[-1] is not self:
+            raise InvalidOperationException("El grupo de transacciones no esta abierto")
+        self._doc._grupos.pop()
+        if estado == TransactionStatus.Committed and self._doc._grupos:
+            self._doc._grupos[-1]._cambios.extend(self._cambios)
+        self._estado = estado
+        return estado
+
+
+def _deshacer(cambios):
+    for param, anterior in reversed(cambios):
+        param._valor = anterior
+
+
+# ==== Filtros y colectores ====
+
+class ElementCategoryFilter(object):
+    def __init__(self, categoria, invertido=False):
+        self._categoria = categoria
+        self._invertido = invertido
+
+    def PassesElement(self, elemento):
+        pasa = elemento.Category is not None and elemento.Category.BuiltInCategory == self._categoria
+        return pasa != self._invertido
+
+
+class FilterRule(object):
+    """Regla sobre un parametro compartido, identificado por el id de su SharedParameterElement."""
+
+    def __init__(self, id_parametro, evaluar):
+        self._id_parametro = id_parametro
+        self._evaluar = evaluar
+
+    def _cumple(self, elemento):
+        definicion = elemento.Document.GetElement(self._id_parametro) if elemento.Document else None
+        if not isinstance(definicion, SharedParameterElement):
+            return False
+        param = elemento.get_Parameter(definicion.GuidValue)
+        return param is not None and self._evaluar(param)
+
+
+def _valor_de(param):
+    if param.StorageType == StorageType.Integer:
+        return param.AsInteger()
+    if param.StorageType == StorageType.Double:
+        return param.AsDouble()
+    if param.StorageType == StorageType.ElementId:
+        return param.AsElementId()
+    return param.AsString() or ""
+
+
+class ParameterFilterRuleFactory(object):
+    @staticmethod
+    def CreateEqualsRule(id_parametro, valor, *args):
+        return FilterRule(id_parametro, lambda p: p.HasValue and _valor_de(p) == valor)
+
+    @staticmethod
+    def CreateNotEqualsRule(id_parametro, valor, *args):
+        return FilterRule(id_parametro, lambda p: _valor_de(p) != valor)
+
+    @staticmethod
+    def CreateHasValueParameterRule(id_parametro):
+        return FilterRule(id_parametro, lambda p: p.HasValue)
+
+    @staticmethod
+    def CreateHasNoValueParameterRule(id_parametro):
+        return FilterRule(id_parametro, lambda p: not p.HasValue)
+
+
+class ElementParameterFilter(object):
+    def __init__(self, reglas, invertido=False):
+        self._reglas = list(reglas) if not isinstance(reglas, FilterRule) else [reglas]
+        self._invertido = invertido
+
+    def PassesElement(self, elemento):
+        pasa = all(regla._cumple(elemento) for regla in self._reglas)
+        return pasa != self._invertido
+
+
+class FilteredElementCollector(object):
+    """
+    Colector perezoso: los filtros se acumulan y se aplican al recorrer los elementos
+    del documento (o los ids recibidos) en orden de id.
+    """
+
+    def __init__(self, doc, ids=None):
+        self._doc = doc
+        self._ids = list(ids) if ids is not None and not isinstance(ids, ElementId) else None
+        if self._ids is not None and not self._ids:
+            raise ArgumentException("The input element ids collection is empty.")
+        self._filtros = []
+
+    def _filtrar(self, filtro):
+        self._filtros.append(filtro)
+        return self
+
+    def OfClass(self, clase):
+        return self._filtrar(lambda e: isinstance(e, clase))
+
+    def OfCategory(self, categoria):
+        return self._filtrar(lambda e: e.Category is not None and e.Category.BuiltInCategory == categoria)
+
+    def WhereElementIsNotElementType(self):
+        return self._filtrar(lambda e: not isinstance(e, ElementType))
+
+    def WhereElementIsElementType(self):
+        return self._filtrar(lambda e: isinstance(e, ElementType))
+
+    def WherePasses(self, filtro):
+        return self._filtrar(filtro.PassesElement)
+
+    def __iter__(self):
+        # Revit no permite recorrer un colector sin ningun filtro aplicado
+        if not self._filtros:
+            raise InvalidOperationException("The collector does not have a filter applied.")
+        if self._ids is not None:
+            candidatos = (self._doc.GetElement(i) for i in self._ids)
+        else:
+            candidatos = (self._doc._elementos[k] for k in sorted(self._doc._elementos))
+        for elemento in candidatos:
+            if elemento is not None and all(f(elemento) for f in self._filtros):
+                yield elemento
+
+    def ToElements(self):
+        return list(self)
+
+    def ToElementIds(self):
+        return [e.Id for e in self]
+
+    def FirstElement(self):
+        for elemento in self:
+            return elemento
+        return None
+
+    def FirstElementId(self):
+        elemento = self.FirstElement()
+        return elemento.Id if elemento is not None else ElementId.InvalidElementId
+
+    def GetElementCount(self):
+        return sum(1 for _ in self)
+
+
+# ==== Trabajo compartido ====
+
+class WorksharingTooltipInfo(object):
+    def __init__(self, creador="", propietario="", ultimo=""):
+        self.Creator = creador
+        self.Owner = propietario
+        self.LastChangedBy = ultimo
+
+
+class WorksharingUtils(object):
+    """El propietario de cada elemento se guarda en el atributo 'propietario' del elemento."""
+
+    @staticmethod
+    def GetCheckoutStatus(doc, id_elemento):
+        propietario = getattr(doc.GetElement(id_elemento), "propietario", None)
+        if not propietario:
+            return CheckoutStatus.NotOwned
+        if propietario == doc.usuario:
+            return CheckoutStatus.OwnedByCurrentUser
+        return CheckoutStatus.OwnedByOtherUser
+
+    @staticmethod
+    def GetWorksharingTooltipInfo(doc, id_elemento):
+        return WorksharingTooltipInfo(propietario=getattr(doc.GetElement(id_elemento), "propietario", None) or "")
+
+    @staticmethod
+    def GetModelUpdatesStatus(doc, id_elemento):
+        return getattr(doc.GetElement(id_elemento), "estado_central", ModelUpdatesStatus.CurrentWithCentral)
+
+    @staticmethod
+    def CheckoutElements(doc, ids):
+        tomados = []
+        for id_elemento in ids:
+            elemento = doc.GetElement(id_elemento)
+            if elemento is None:
+                continue
+            propietario = getattr(elemento, "propietario", None)
+            if propietario in (None, "", doc.usuario):
+                elemento.propietario = doc.usuario
+                tomados.append(id_elemento)
+        return tomados
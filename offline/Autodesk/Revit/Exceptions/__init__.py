@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Excepciones de la API de Revit usadas por la extension."""
+
+
+class RevitException(Exception):
+    pass
+
+
+class OperationCanceledException(RevitException):
+    pass
+
+
+class InvalidOperationException(RevitException):
+    pass
+
+
+class ModificationOutsideTransactionException(InvalidOperationException):
+    pass
+
+
+class ArgumentException(RevitException):
+    pass
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from Autodesk.Revit.DB import Enumeracion
+
+ObjectType = Enumeracion("ObjectType", ["Nothing", "Element", "PointOnElement", "Edge", "Face", "LinkedElement"])
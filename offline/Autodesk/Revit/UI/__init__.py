@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Parte de Autodesk.Revit.UI usada por la extension: dialogos y el documento de interfaz."""
+
+from Autodesk.Revit.DB import Enumeracion
+
+
+TaskDialogResult = Enumeracion("TaskDialogResult", ["None", "Ok", "Cancel", "Retry", "Yes", "No", "Close"])
+TaskDialogCommonButtons = Enumeracion("TaskDialogCommonButtons", ["None", "Ok", "Yes", "No", "Cancel", "Retry", "Close"])
+
+
+class TaskDialog(object):
+    # Respuesta que devuelve Show cuando se piden botones (se puede cambiar en las pruebas)
+    respuesta = TaskDialogResult.Yes
+
+    @staticmethod
+    def Show(titulo, mensaje, botones=None, *args):
+        print(u"[TaskDialog] {}: {}".format(titulo, mensaje))
+        return TaskDialog.respuesta if botones is not None else TaskDialogResult.Close
+
+
+class Selection(object):
+    """Seleccion del usuario: devuelve los elementos fijados con fijar()."""
+
+    def __init__(self, doc):
+        self._doc = doc
+        self._ids = []
+
+    def fijar(self, elementos):
+        self._ids = [e.Id for e in elementos]
+
+    def GetElementIds(self):
+        return list(self._ids)
+
+    def PickElementsByRectangle(self, *args):
+        return [self._doc.GetElement(i) for i in self._ids]
+
+    def PickObjects(self, *args):
+        return list(self._ids)
+
+
+class UIDocument(object):
+    def __init__(self, doc):
+        self.Document = doc
+        self.Selection = Selection(doc)
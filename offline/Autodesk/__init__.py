@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Sustituto en Python puro del espacio de nombres Autodesk (solo para pruebas fuera de Revit)."""
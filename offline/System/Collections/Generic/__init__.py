@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""System.Collections.Generic.List: List[T]() crea una lista con Add y Count."""
+
+
+class _Lista(list):
+    def Add(self, valor):
+        self.append(valor)
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class _Generica(object):
+    def __getitem__(self, tipo):
+        return _Lista
+
+
+List = _Generica()
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Parte minima del espacio de nombres System de .NET usada por la extension."""
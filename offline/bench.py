@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Mide la logica central de los botones COBie sobre modelos sinteticos, fuera de Revit.
+
+Uso:
+    python offline/bench.py                  # 10k elementos
+    python offline/bench.py 10000 100000 500000 --repeticiones 3
+
+Cada boton depende de ventanas y de la seleccion del usuario, asi que aqui se ejecuta
+solo su nucleo por elemento, el mismo que usa el boton (lib/Extensions/_COBie.py), con
+la lectura de la matriz y el lote de escrituras confirmado por bloques. Los sustitutos
+de la API de Revit y de pyRevit estan en offline/Autodesk y offline/pyrevit.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[0:0] = [os.path.join(_RAIZ, "offline"), os.path.join(_RAIZ, "lib")]
+
+# La cache en disco de las matrices se guarda en una carpeta temporal propia
+_TEMPORAL = tempfile.mkdtemp(prefix="pqt7_bench_")
+os.environ["APPDATA"] = _TEMPORAL
+
+from Autodesk.Revit.DB import FamilyInstance, FilteredElementCollector  # noqa: E402
+from pyrevit import revit  # noqa: E402
+
+import modelo  # noqa: E402
+from Extensions._COBie import (  # noqa: E402
+    COLUMNAS_MATRIZ_COMPONENT, COLUMNAS_MATRIZ_TYPE, COLUMNAS_SPACE, ENCABEZADOS_EXPORT, TIPOS_MATRIZ_COMPONENT,
+    TIPOS_MATRIZ_TYPE, COBieComponentTransfer, COBieExport, COBieTypeTransfer, agrupar_por_tipo,
+    parametros_estaticos_type)
+from Extensions._RevitAPI import (  # noqa: E402
+    ParameterWriteBatch, cache_elementos, elementos_cobie, elementos_por_codigo, expandir_subcomponentes,
+    resolver_parametros)
+from Extensions._Transacciones import ChunkedTransaction  # noqa: E402
+from Helper import _Excel  # noqa: E402
+from Helper._XlsxWriter import XlsxWriter  # noqa: E402
+from Models._Specialty import Specialty  # noqa: E402
+
+# Datos del colegio y de la especialidad que el boton lee de la base de datos
+ESPECIALIDAD = Specialty("ARQUITECTURA", "AR", "Accesible", "RNE", "Sostenible", "Caracteristica")
+CREATED_BY = "bench@pqt7"
+WARRANTY = "Garantia del fabricante"
+
+
+# ==== Nucleos de los botones ====
+
+def leer_matriz(ruta):
+    excel = _Excel.Excel()
+    excel.ruta_archivo = ruta
+    tabla_type = excel.read_table(modelo.HOJA_MATRIZ, COLUMNAS_MATRIZ_TYPE, 2, 3,
+                                  indices=["CODIGO"], tipos=TIPOS_MATRIZ_TYPE)
+    tabla_component = excel.read_table(modelo.HOJA_MATRIZ, COLUMNAS_MATRIZ_COMPONENT, 2, 3, indices=["CODIGO"],
+                                       tipos=TIPOS_MATRIZ_COMPONENT)
+    tabla_space = excel.read_table(modelo.HOJA_SPACE, COLUMNAS_SPACE, 2, 3, indices=["COBie.Space.Name"])
+    return tabla_type, tabla_component, tabla_space
+
+
+def nucleo_type(doc, seleccion, tabla):
+    """Como el boton COBie Type: agrupa la seleccion por tipo, prepara cada tipo y escribe por bloques."""
+    resolver = resolver_parametros(doc)
+    lote = ParameterWriteBatch()
+    transferencia = COBieTypeTransfer(resolver, tabla, lote, parametros_estaticos_type(CREATED_BY, WARRANTY, ESPECIALIDAD),
+                                      informar=False)
+    preparados = []
+    for datos in agrupar_por_tipo(doc, seleccion, resolver, cache_elementos(doc)).values():
+        elemento_data = transferencia.preparar(datos["element_type"], datos["codigo"], len(datos["instancias"]))
+        if elemento_data is not None:
+            preparados.append(elemento_data)
+
+    transaccion = ChunkedTransaction(doc, "Transferencia COBie Type Masiva", tamano_bloque=200, informar=False)
+    transaccion.procesar(preparados, transferencia.procesar, al_confirmar=lote.aplicar,
+                         clave=lambda elemento_data: elemento_data["element_type"].Id.IntegerValue)
+    return lote
+
+
+def nucleo_component(doc, seleccion, tabla, espacios):
+    """Como el boton COBie Component en modo sobrescribir: subcomponentes, COBie = 1 y escritura por bloques."""
+    resolver = resolver_parametros(doc)
+    elementos = list(expandir_subcomponentes(doc, seleccion))
+    ids_cobie = set(e.Id.IntegerValue for e in elementos_cobie(doc, elementos, resolver=resolver))
+    elementos = [e for e in elementos if e.Id.IntegerValue in ids_cobie]
+
+    lote = ParameterWriteBatch()
+    transferencia = COBieComponentTransfer(resolver, cache_elementos(doc), lote, tabla, espacios,
+                                           created_by=CREATED_BY, warranty_start_date="2025-01-01")
+    control = transferencia.leer_control(doc, elementos)
+    transaccion = ChunkedTransaction(doc, "Transfiere datos a Parametros COBieComponent", informar=False)
+    transaccion.procesar(list(zip(elementos, control)), transferencia.procesar, al_confirmar=lote.aplicar,
+                         clave=lambda par: par[0].Id.IntegerValue)
+    return lote
+
+
+def nucleo_export(doc, ruta):
+    """Como el boton COBie Export: una pasada por el modelo escribiendo cada ejemplar COBie como fila."""
+    with XlsxWriter(ruta) as libro:
+        libro.nueva_hoja(modelo.HOJA_MATRIZ)
+        libro.escribir_fila(["Exportacion COBie"])
+        libro.saltar_filas(1)
+        libro.escribir_fila(ENCABEZADOS_EXPORT)
+        return COBieExport(doc).exportar(libro, elementos_cobie(doc))
+
+
+# ==== Medicion ====
+
+def medir(resultados, tamano, nombre, funcion, repeticiones=1, preparar=None):
+    """Ejecuta la funcion las veces pedidas y guarda el mejor tiempo."""
+    mejor, resultado = None, None
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.time()
+        resultado = funcion()
+        segundos = time.time() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    resultados.append((tamano, nombre, mejor))
+    print("  {:<34} {:>9.3f} s".format(nombre, mejor))
+    return resultado
+
+
+def ejecutar(tamano, repeticiones, carpeta):
+    print("\n== {} elementos ==".format(tamano))
+    resultados = []
+    inicio = time.time()
+    doc = modelo.generar_modelo(tamano)
+    codigos = sum(1 for _ in FilteredElementCollector(doc).WhereElementIsElementType())
+    ruta_matriz = modelo.generar_matriz(os.path.join(carpeta, "matriz_{}.xlsx".format(tamano)), codigos)
+    print("  {:<34} {:>9.3f} s".format("(generar modelo y matriz)", time.time() - inicio))
+    revit.activar(doc)
+
+    medir(resultados, tamano, "matriz: sin cache", lambda: leer_matriz(ruta_matriz), repeticiones,
+          preparar=lambda: _Excel.invalidar(ruta_matriz))
+    medir(resultados, tamano, "matriz: cache en disco", lambda: leer_matriz(ruta_matriz), repeticiones,
+          preparar=lambda: _Excel.invalidar(ruta_matriz, disco=False))
+    tabla_type, tabla_component, tabla_space = medir(
+        resultados, tamano, "matriz: cache de sesion", lambda: leer_matriz(ruta_matriz), repeticiones,
+        preparar=_Excel._TABLAS.clear)
+
+    seleccion = FilteredElementCollector(doc).OfClass(FamilyInstance).ToElements()
+    lote = medir(resultados, tamano, "type: nucleo", lambda: nucleo_type(doc, seleccion, tabla_type), repeticiones)
+    print("    valores escritos: {}".format(sum(lote.cambiados().values())))
+    lote = medir(resultados, tamano, "component: nucleo",
+                 lambda: nucleo_component(doc, seleccion, tabla_component, tabla_space), repeticiones)
+    print("    valores escritos: {}".format(sum(lote.cambiados().values())))
+    filas = medir(resultados, tamano, "export: nucleo",
+                  lambda: nucleo_export(doc, os.path.join(carpeta, "export_{}.xlsx".format(tamano))), repeticiones)
+    print("    filas exportadas: {}".format(filas))
+    codigos_buscados = set(modelo.codigo(i) for i in range(0, codigos, 10))
+    encontrados = medir(resultados, tamano, "elementos_por_codigo",
+                        lambda: elementos_por_codigo(doc, codigos_buscados), repeticiones)
+    print("    elementos encontrados: {}".format(len(encontrados)))
+    return resultados
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("tamanos", nargs="*", type=int, default=[10000],
+                        help="Cantidad de elementos de cada modelo (10k a 500k)")
+    parser.add_argument("--repeticiones", type=int, default=1, help="Se informa el mejor tiempo")
+    opciones = parser.parse_args(argumentos)
+
+    carpeta = tempfile.mkdtemp(prefix="pqt7_bench_xlsx_")
+    resultados = []
+    try:
+        for tamano in opciones.tamanos:
+            resultados.extend(ejecutar(tamano, opciones.repeticiones, carpeta))
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        shutil.rmtree(_TEMPORAL, ignore_errors=True)
+
+    print("\n{:>9}  {:<34} {:>9}".format("elementos", "medicion", "segundos"))
+    for tamano, nombre, segundos in resultados:
+        print("{:>9}  {:<34} {:>9.3f}".format(tamano, nombre, segundos))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Generadores de modelos y matrices sinteticos para medir la extension fuera de Revit.
+Los modelos usan los mismos parametros compartidos que los botones COBie (con GUID
+estable por nombre) y una matriz xlsx con el formato de las hojas 'ESTANDAR COBIE'.
+Con la misma semilla se obtiene siempre el mismo modelo.
+"""
+
+import random
+import uuid
+
+from Autodesk.Revit.DB import (
+    BuiltInCategory, BuiltInParameter, Document, FamilyInstance, FamilySymbol, Level,
+    SharedParameterElement, StorageType, Element)
+
+from Helper._XlsxWriter import XlsxWriter
+
+HOJA_MATRIZ = "ESTANDAR COBIE  -AR"
+HOJA_SPACE = "ESTANDAR COBie SPACE "
+
+# ==== Parametros compartidos del modelo ====
+PARAMETROS_TIPO_TEXTO = [
+    "COBie.Type.Name", "COBie.Type.Category", "COBie.Type.Description", "COBie.Type.AssetType",
+    "COBie.Type.Manufacturer", "COBie.Type.ModelNumber", "COBie.Type.WarrantyGuarantorParts",
+    "COBie.Type.WarrantyDurationParts", "COBie.Type.WarrantyGuarantorLabor", "COBie.Type.WarrantyDurationLabor",
+    "COBie.Type.WarrantyDurationUnit", "COBie.Type.WarrantyDescription", "COBie.Type.ExpectedLife",
+    "COBie.Type.DurationUnit", "COBie.Type.ModelReference", "COBie.Type.Shape", "COBie.Type.Size",
+    "COBie.Type.Color", "COBie.Type.Finish", "COBie.Type.Grade", "COBie.Type.Material",
+    "COBie.Type.Constituents", "COBie.Type.Features", "COBie.Type.AccessibilityPerformance",
+    "COBie.Type.CodePerformance", "COBie.Type.SustainabilityPerformance", "COBie.Type.CreatedBy",
+    "COBie.Type.CreatedOn", "S&P_MATERIAL DE ELEMENTO", "Classification.Uniclass.Pr.Number",
+    "Classification.Uniclass.Pr.Description",
+]
+PARAMETROS_TIPO_DOBLE = [
+    "COBie.Type.NominalLength", "COBie.Type.NominalWidth", "COBie.Type.NominalHeight",
+    "COBie.Type.ReplacementCost",
+]
+PARAMETROS_INSTANCIA_TEXTO = [
+    "S&P_NIVEL DE ELEMENTO", "S&P_ZONIFICACION", "S&P_CODIGO DE ELEMENTO", "COBie.Component.Space",
+    "COBie.Component.InstallationDate", "COBie.Component.Description", "COBie.Component.SerialNumber",
+    "COBie.Component.Name", "COBie.CreatedOn", "COBie.CreatedBy", "COBie.Component.WarrantyStartDate",
+    "COBie.Component.TagNumber", "COBie.Component.BarCode", "COBie.Component.AssetIdentifier",
+]
+
+# Columnas de la hoja de la matriz (encabezados en la fila 3)
+COLUMNAS_MATRIZ = [
+    "CODIGO", "COBie.Type.Manufacturer", "COBie.Type.ModelNumber", "COBie.Type.WarrantyGuarantorParts",
+    "COBie.Type.WarrantyDurationParts", "COBie.Type.WarrantyDurationLabor", "COBie.Type.ReplacementCost",
+    "COBie.Type.ExpectedLife", "COBie.Type.NominalLength", "COBie.Type.NominalWidth",
+    "COBie.Type.NominalHeight", "COBie.Type.Color", "COBie.Type.Finish", "COBie.Type.Constituents",
+    "COBie.Type.Description", "COBie.Component.InstallationDate", "COBie.Component.Description",
+]
+
+NIVELES = ["NIVEL 1", "NIVEL 2", "NIVEL 3", "TECHO"]
+CATEGORIAS = [BuiltInCategory.OST_GenericModel, BuiltInCategory.OST_Furniture, BuiltInCategory.OST_Doors,
+              BuiltInCategory.OST_PlumbingFixtures, BuiltInCategory.OST_LightingFixtures]
+
+
+def guid_de(nombre):
+    """GUID estable para un parametro compartido (igual en todos los modelos generados)."""
+    return uuid.uuid5(uuid.NAMESPACE_URL, "pqt7/" + nombre)
+
+
+def codigo(indice):
+    return "AR-{:05d}".format(indice)
+
+
+def espacio(indice):
+    return "AMBIENTE {:03d}".format(indice)
+
+
+def _agregar_relleno(elemento, cantidad):
+    # Parametros que no usa la extension: hacen que LookupParameter recorra una lista realista
+    for i in range(cantidad):
+        elemento.agregar_parametro("Parametro {:02d}".format(i), StorageType.String, "x")
+
+
+def generar_modelo(elementos=10000, tipos=None, semilla=1, codigos=None, proporcion_cobie=0.8,
+                   proporcion_subcomponentes=0.05, relleno=40, workshared=False):
+    """
+    Genera un documento con niveles, tipos y ejemplares con los parametros COBie.
+
+    Args:
+        elementos (int): Cantidad de ejemplares
+        tipos (int): Cantidad de tipos (por defecto, un tipo cada 50 ejemplares)
+        semilla (int): Semilla del generador aleatorio
+        codigos (int): Cantidad de codigos distintos de la matriz (por defecto, uno por tipo)
+        proporcion_cobie (float): Fraccion de ejemplares con COBie = 1
+        proporcion_subcomponentes (float): Fraccion de ejemplares con un subcomponente anidado
+        relleno (int): Parametros adicionales por elemento
+        workshared (bool): Si el modelo es de trabajo compartido
+
+    Returns:
+        Document: Documento generado
+    """
+    azar = random.Random(semilla)
+    tipos = tipos or max(1, elementos // 50)
+    codigos = codigos or tipos
+    doc = Document("Modelo sintetico {}.rvt".format(elementos), workshared=workshared)
+
+    for nombre in PARAMETROS_TIPO_TEXTO + PARAMETROS_TIPO_DOBLE + PARAMETROS_INSTANCIA_TEXTO + ["COBie", "COBie.Type"]:
+        doc.agregar(SharedParameterElement(nombre, guid_de(nombre)))
+
+    info = doc.agregar(Element("Informacion de proyecto"), BuiltInCategory.OST_ProjectInformation)
+    info.agregar_parametro("S&P_ESPECIALIDAD", StorageType.String, "ARQUITECTURA")
+
+    niveles = []
+    for i, nombre in enumerate(NIVELES):
+        nivel = doc.agregar(Level(nombre, i * 12.0), BuiltInCategory.OST_Levels)
+        nivel.agregar_parametro("Name", StorageType.String, nombre, integrado=BuiltInParameter.SYMBOL_NAME_PARAM)
+        niveles.append(nivel)
+
+    lista_tipos = []
+    for i in range(tipos):
+        categoria = CATEGORIAS[i % len(CATEGORIAS)]
+        tipo = doc.agregar(FamilySymbol("Tipo {} ({}x{})".format(i, 60 + i % 40, 120), "Familia {}".format(i // 5)), categoria)
+        tipo.agregar_parametro("Type Name", StorageType.String, tipo.Name, integrado=BuiltInParameter.SYMBOL_NAME_PARAM)
+        tipo.agregar_parametro("COBie.Type", StorageType.Integer, 1 if azar.random() < 0.9 else 0, guid=guid_de("COBie.Type"))
+        for nombre in PARAMETROS_TIPO_TEXTO:
+            tipo.agregar_parametro(nombre, StorageType.String, None, guid=guid_de(nombre))
+        for nombre in PARAMETROS_TIPO_DOBLE:
+            tipo.agregar_parametro(nombre, StorageType.Double, 0.0, guid=guid_de(nombre))
+        tipo.get_Parameter(guid_de("Classification.Uniclass.Pr.Number"))._valor = "Pr_{:02d}_{:02d}".format(i % 90, i % 60)
+        tipo.get_Parameter(guid_de("Classification.Uniclass.Pr.Description"))._valor = "Producto {}".format(i)
+        tipo.get_Parameter(guid_de("S&P_MATERIAL DE ELEMENTO"))._valor = "Material {}".format(i % 12)
+        _agregar_relleno(tipo, relleno)
+        tipo.codigo = codigo(i % codigos)
+        lista_tipos.append(tipo)
+
+    creados = 0
+    while creados < elementos:
+        tipo = azar.choice(lista_tipos)
+        padre = _ejemplar(doc, azar, tipo, niveles, relleno, proporcion_cobie)
+        creados += 1
+        if creados < elementos and azar.random() < proporcion_subcomponentes:
+            hijo = _ejemplar(doc, azar, azar.choice(lista_tipos), niveles, relleno, proporcion_cobie)
+            hijo.SuperComponent = padre
+            padre._subcomponentes.append(hijo.Id)
+            creados += 1
+    return doc
+
+
+def _ejemplar(doc, azar, tipo, niveles, relleno, proporcion_cobie):
+    elemento = doc.agregar(FamilyInstance(tipo.Name), tipo.Category.BuiltInCategory)
+    elemento._id_tipo = tipo.Id
+    nivel = azar.choice(niveles)
+    elemento.agregar_parametro("COBie", StorageType.Integer, 1 if azar.random() < proporcion_cobie else 0, guid=guid_de("COBie"))
+    valores = {
+        "S&P_NIVEL DE ELEMENTO": nivel.Name,
+        "S&P_ZONIFICACION": "sitio {:03d}".format(azar.randint(1, 20)),
+        "S&P_CODIGO DE ELEMENTO": tipo.codigo if azar.random() < 0.95 else None,
+        "COBie.Component.Space": espacio(azar.randint(1, 200)),
+    }
+    for nombre in PARAMETROS_INSTANCIA_TEXTO:
+        elemento.agregar_parametro(nombre, StorageType.String, valores.get(nombre), guid=guid_de(nombre))
+    elemento.agregar_parametro("Level", StorageType.ElementId, nivel.Id)
+    _agregar_relleno(elemento, relleno)
+    return elemento
+
+
+def generar_matriz(ruta, codigos, espacios=200, semilla=1):
+    """
+    Escribe una matriz COBie sintetica con una fila por codigo y la hoja SPACE.
+
+    Args:
+        ruta (str): Ruta del xlsx a crear
+        codigos (int): Cantidad de codigos (AR-00000, AR-00001, ...)
+        espacios (int): Cantidad de ambientes de la hoja SPACE
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        str: Ruta del archivo creado
+    """
+    azar = random.Random(semilla)
+    with XlsxWriter(ruta) as libro:
+        libro.nueva_hoja(HOJA_MATRIZ)
+        libro.escribir_fila(["MATRIZ COBIE - ARQUITECTURA"])
+        libro.saltar_filas(1)
+        libro.escribir_fila(COLUMNAS_MATRIZ)
+        for i in range(codigos):
+            libro.escribir_fila([
+                codigo(i), "Fabricante {}".format(i % 30), "MOD-{}".format(i), "Proveedor {}".format(i % 7),
+                str(azar.choice([1, 2, 5])), str(azar.choice([1, 2])), round(azar.uniform(10, 5000), 2),
+                str(azar.choice([10, 20, 30])), round(azar.uniform(0.3, 3), 3), round(azar.uniform(0.3, 3), 3),
+                round(azar.uniform(0.3, 3), 3), "Color {}".format(i % 9), "Acabado {}".format(i % 5),
+                "n/a", "Descripcion del elemento {}".format(i), 45000 + i % 400, "Componente {}".format(i),
+            ])
+
+        libro.nueva_hoja(HOJA_SPACE)
+        libro.escribir_fila(["AMBIENTES"])
+        libro.saltar_filas(1)
+        libro.escribir_fila(["COBie.Space.Name", "COBie.Space.RoomTag"])
+        for i in range(1, espacios + 1):
+            libro.escribir_fila([espacio(i), "{:03d}".format(i)])
+    return ruta
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+Sustituto minimo de pyRevit para ejecutar la logica de la extension fuera de Revit.
+Solo cubre revit, forms, script e interop.xl en la medida en que la extension los usa.
+"""
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Dialogos de pyrevit.forms sin interfaz. Las respuestas se toman de los atributos del
+modulo (por ejemplo, forms.respuesta_alerta o forms.archivo_elegido) para que las
+pruebas puedan decidir por el usuario.
+"""
+
+respuesta_alerta = True
+archivo_elegido = None
+archivo_guardado = None
+opcion_elegida = None
+mensajes = []
+
+
+def alert(msg, title=None, sub_msg=None, yes=False, no=False, ok=True, exitscript=False, **kwargs):
+    mensajes.append(msg)
+    print(u"[alert] {}".format(msg))
+    if exitscript:
+        raise SystemExit(0)
+    return respuesta_alerta if (yes or no) else True
+
+
+def pick_file(*args, **kwargs):
+    return archivo_elegido
+
+
+def save_file(*args, **kwargs):
+    return archivo_guardado
+
+
+class CommandSwitchWindow(object):
+    @staticmethod
+    def show(opciones, *args, **kwargs):
+        if opcion_elegida is not None:
+            return opcion_elegida
+        return opciones[0] if opciones else None
+
+
+class SelectFromList(object):
+    @staticmethod
+    def show(opciones, *args, **kwargs):
+        # Sin interfaz se eligen todas las opciones
+        return list(opciones) if kwargs.get("multiselect") else (list(opciones) or [None])[0]
+
+
+class ProgressBar(object):
+    def __init__(self, *args, **kwargs):
+        self.cancelled = False
+        self.title = kwargs.get("title", "")
+
+    def update_progress(self, actual, total):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
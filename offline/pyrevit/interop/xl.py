@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+pyrevit.interop.xl.load sobre el lector xlsx de la extension (Helper._Workbook), con
+el mismo formato de salida: {hoja: {"headers": [...], "rows": [...]}}.
+"""
+
+from Helper._Workbook import Workbook
+
+
+def load(xlfile, sheets=None, columns=None, datatype=None, headers=True):
+    resultado = {}
+    with Workbook(xlfile) as libro:
+        for hoja in sheets or libro.nombres_hojas():
+            filas = libro.filas(hoja)
+            if not filas:
+                resultado[hoja] = {"headers": [], "rows": []}
+                continue
+            if headers:
+                encabezados, datos = list(columns or filas[0]), filas[1:]
+            else:
+                encabezados, datos = list(columns or []), filas
+            if encabezados:
+                datos = [dict(zip(encabezados, fila)) for fila in datos]
+            resultado[hoja] = {"headers": encabezados, "rows": datos}
+    return resultado
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Documento activo y transacciones con la misma forma que pyrevit.revit."""
+
+from Autodesk.Revit import DB
+from Autodesk.Revit.UI import UIDocument
+
+doc = None
+uidoc = None
+
+
+def activar(documento):
+    """Fija el documento activo (equivale a abrir el modelo en Revit)."""
+    global doc, uidoc
+    doc = documento
+    uidoc = UIDocument(documento)
+    return uidoc
+
+
+class Transaction(object):
+    """Administrador de contexto: confirma al salir o deshace si hubo una excepcion."""
+
+    def __init__(self, nombre="pyRevit Transaction", doc=None, **kwargs):
+        self._transaccion = DB.Transaction(doc or globals()["doc"], nombre)
+
+    def __enter__(self):
+        self._transaccion.Start()
+        return self._transaccion
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self._transaccion.Commit()
+        else:
+            self._transaccion.RollBack()
+        return False
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Salida y registro de pyrevit.script hacia la consola."""
+
+import logging
+
+
+def exit():
+    raise SystemExit(0)
+
+
+class _Salida(object):
+    def __init__(self):
+        self.silencio = False
+
+    def _imprimir(self, texto):
+        if not self.silencio:
+            print(texto)
+
+    def print_md(self, texto):
+        self._imprimir(texto)
+
+    def print_table(self, table_data, columns=None, title="", **kwargs):
+        if title:
+            self._imprimir(title)
+        if columns:
+            self._imprimir(" | ".join(u"{}".format(c) for c in columns))
+        for fila in table_data:
+            self._imprimir(" | ".join(u"{}".format(v) for v in fila))
+
+    def linkify(self, ids, title=None):
+        if not isinstance(ids, (list, tuple)):
+            ids = [ids]
+        return title or ", ".join(str(i) for i in ids)
+
+    def close_others(self, *args, **kwargs):
+        pass
+
+    def set_title(self, titulo):
+        pass
+
+
+_SALIDA = _Salida()
+
+
+def get_output():
+    return _SALIDA
+
+
+def get_logger():
+    return logging.getLogger("pyrevit")
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Las pruebas se ejecutan fuera de Revit con los sustitutos de offline/ (API de Revit,
+System y pyRevit) y con lib/ en la ruta, igual que offline/bench.py.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[0:0] = [os.path.join(_RAIZ, "offline"), os.path.join(_RAIZ, "lib")]
+
+# La cache en disco se calcula al importar Helper._MatrixCache: nunca se usa la del usuario
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="pqt7_pruebas_")
+
+
+@pytest.fixture
+def cache_temporal(tmp_path, monkeypatch):
+    """Carpeta de cache y de estados propia de cada prueba."""
+    from Helper import _MatrixCache
+    carpeta = str(tmp_path / "cache")
+    monkeypatch.setattr(_MatrixCache, "CARPETA_CACHE", carpeta)
+    return carpeta
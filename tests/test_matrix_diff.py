@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import os
+
+from Autodesk.Revit.DB import Document
+from Helper import _MatrixCache
+from Helper._MatrixDiff import CARPETA_APLICADAS, carpeta_aplicadas, comparar, guardar_aplicada, instantanea, leer_aplicada
+from Helper._MatrixTable import MatrixTable
+
+COLUMNAS = ["CODIGO", "COBie.Type.Manufacturer", "COBie.Type.Color"]
+
+
+def foto(filas, columnas=COLUMNAS):
+    return instantanea(MatrixTable(columnas, filas), "CODIGO", columnas)
+
+
+def test_instantanea_excluye_la_clave_y_conserva_la_primera_fila():
+    datos = foto([(" AR-1 ", "ACME", "Rojo"), ("AR-1", "OTRO", "Azul"), (None, "X", "Y")])
+    assert datos == {"columnas": ["COBie.Type.Manufacturer", "COBie.Type.Color"],
+                     "filas": {"AR-1": ("ACME", "Rojo")}}
+
+
+def test_comparar_detecta_agregados_eliminados_y_columnas_modificadas():
+    anterior = foto([("AR-1", "ACME", "Rojo"), ("AR-2", "ACME", "Azul"), ("AR-3", "ACME", "Verde")])
+    actual = foto([("AR-1", "ACME", "Rojo"), ("AR-2", "OTRO", "Azul"), ("AR-4", "ACME", "Negro")])
+    diferencias = comparar(anterior, actual)
+    assert diferencias.agregados == ["AR-4"]
+    assert diferencias.eliminados == ["AR-3"]
+    assert diferencias.modificados == {"AR-2": ["COBie.Type.Manufacturer"]}
+    assert diferencias.codigos() == set(["AR-2", "AR-4"])
+
+
+def test_columnas_cambiadas_por_codigo():
+    anterior = foto([("AR-1", "ACME", "Rojo"), ("AR-2", "ACME", "Azul")])
+    actual = foto([("AR-1", "ACME", "Rojo"), ("AR-2", "ACME", "Gris"), ("AR-3", "ACME", "Azul")])
+    diferencias = comparar(anterior, actual)
+    assert diferencias.columnas_cambiadas(" AR-2 ") == ["COBie.Type.Color"]
+    assert diferencias.columnas_cambiadas("AR-3") == ["COBie.Type.Manufacturer", "COBie.Type.Color"]
+    assert diferencias.columnas_cambiadas("AR-1") == []
+
+
+def test_columna_nueva_cuenta_como_cambiada_en_todos_los_codigos():
+    anterior = foto([("AR-1", "ACME")], ["CODIGO", "COBie.Type.Manufacturer"])
+    actual = foto([("AR-1", "ACME", "Rojo")])
+    assert comparar(anterior, actual).modificados == {"AR-1": ["COBie.Type.Color"]}
+
+
+def test_sin_cambios():
+    datos = foto([("AR-1", "ACME", "Rojo")])
+    diferencias = comparar(datos, datos)
+    assert not diferencias.codigos()
+    assert "Codigos modificados: 0" in diferencias.resumen()
+
+
+def test_matriz_aplicada_se_guarda_junto_al_modelo(tmp_path, cache_temporal, monkeypatch):
+    doc = Document(str(tmp_path / "Modelo.rvt"))
+    datos = foto([("AR-1", "ACME", "Rojo")])
+    assert carpeta_aplicadas(doc) == str(tmp_path / CARPETA_APLICADAS)
+    assert guardar_aplicada(doc, "type", "Hoja", datos)
+    assert os.listdir(str(tmp_path / CARPETA_APLICADAS))
+    # Otro equipo (otra cache local) lee la misma instantanea
+    monkeypatch.setattr(_MatrixCache, "CARPETA_CACHE", str(tmp_path / "otro_equipo"))
+    assert leer_aplicada(Document(str(tmp_path / "Modelo.rvt")), "type", "Hoja") == datos
+    assert leer_aplicada(doc, "component", "Hoja") is None
+
+
+def test_modelo_sin_carpeta_guarda_la_matriz_aplicada_en_el_equipo(cache_temporal):
+    doc = Document("Sin guardar")
+    datos = foto([("AR-1", "ACME", "Rojo")])
+    assert carpeta_aplicadas(doc) is None
+    assert guardar_aplicada(doc, "type", "Hoja", datos)
+    assert leer_aplicada(doc, "type", "Hoja") == datos
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from Helper._MatrixTable import FilaMatriz, MatrixTable, normalizar_clave
+
+COLUMNAS = ["CODIGO", "COBie.Type.Manufacturer", "COBie.Type.NominalLength",
+            "COBie.Type.ReplacementCost", "COBie.Component.InstallationDate"]
+
+TIPOS = {
+    "COBie.Type.Manufacturer": "texto",
+    "COBie.Type.NominalLength": "metros",
+    "COBie.Type.ReplacementCost": "float",
+    "COBie.Component.InstallationDate": "fecha",
+}
+
+
+def tabla(filas, indices=("CODIGO",)):
+    return MatrixTable(COLUMNAS, filas, indices=list(indices), tipos=TIPOS)
+
+
+def test_convierte_columnas_tipadas_una_vez():
+    t = tabla([("AR-001", "  ACME  ", "3.048", "1500", 45000.0)])
+    fila = t[0]
+    assert fila["COBie.Type.Manufacturer"] == "ACME"
+    assert fila["COBie.Type.NominalLength"] == pytest.approx(10.0)
+    assert fila["COBie.Type.ReplacementCost"] == 1500.0
+    assert fila["COBie.Component.InstallationDate"] == "2023-03-15"
+
+
+def test_valores_vacios_o_no_numericos_quedan_en_none():
+    t = tabla([("AR-001", "", "abc", "n/a", "n/a")])
+    fila = t[0]
+    assert fila["COBie.Type.Manufacturer"] is None
+    assert fila["COBie.Type.NominalLength"] is None
+    assert fila["COBie.Type.ReplacementCost"] is None
+    assert fila["COBie.Component.InstallationDate"] is None
+
+
+def test_tipo_desconocido_se_rechaza():
+    with pytest.raises(ValueError):
+        MatrixTable(COLUMNAS, [], tipos={"CODIGO": "entero"})
+
+
+def test_acepta_filas_como_dicts_y_tuplas_cortas():
+    t = tabla([{"CODIGO": "AR-001", "COBie.Type.ReplacementCost": 2}, ("AR-002",)])
+    assert len(t) == 2
+    assert t[0]["COBie.Type.ReplacementCost"] == 2.0
+    assert t[1]["COBie.Type.Manufacturer"] is None
+    assert t[-1]["CODIGO"] == "AR-002"
+    with pytest.raises(IndexError):
+        t[2]
+
+
+def test_buscar_normaliza_la_clave():
+    t = tabla([(" AR-001 ", "ACME"), (12.0, "OTRO")])
+    assert t.buscar("CODIGO", "AR-001")["COBie.Type.Manufacturer"] == "ACME"
+    assert t.buscar("CODIGO", 12)["COBie.Type.Manufacturer"] == "OTRO"
+    assert t.buscar("CODIGO", "12")["COBie.Type.Manufacturer"] == "OTRO"
+    assert t.buscar("CODIGO", "AR-999") is None
+    assert t.buscar("CODIGO", "AR-999", default="x") == "x"
+    assert t.buscar("CODIGO", None) is None
+
+
+def test_buscar_conserva_la_primera_fila_de_una_clave_repetida():
+    t = tabla([("AR-001", "PRIMERO"), ("AR-001", "SEGUNDO")])
+    assert t.buscar("CODIGO", "AR-001")["COBie.Type.Manufacturer"] == "PRIMERO"
+
+
+def test_contiene_y_claves():
+    t = tabla([("AR-001",), ("AR-002",), (None,)])
+    assert t.contiene("CODIGO", "AR-002")
+    assert not t.contiene("CODIGO", "AR-003")
+    assert sorted(t.claves("CODIGO")) == ["AR-001", "AR-002"]
+
+
+def test_indice_de_columna_no_declarada_se_crea_al_buscar():
+    t = tabla([("AR-001", "ACME")], indices=())
+    assert t.buscar("COBie.Type.Manufacturer", "ACME")["CODIGO"] == "AR-001"
+
+
+def test_fila_se_lee_como_dict():
+    t = tabla([("AR-001", "ACME")])
+    fila = t[0]
+    assert isinstance(fila, FilaMatriz)
+    assert "CODIGO" in fila and "OTRA" not in fila
+    assert fila.get("OTRA", "x") == "x"
+    assert fila.keys() == COLUMNAS
+    assert fila == dict(zip(COLUMNAS, ["AR-001", "ACME", None, None, None]))
+    assert fila.copy()["CODIGO"] == "AR-001"
+
+
+def test_columnas_muy_repetidas_se_codifican_sin_cambiar_los_valores():
+    filas = [("AR-{:03d}".format(i), "ACME" if i % 2 else "OTRO") for i in range(100)]
+    t = tabla(filas)
+    assert [f["COBie.Type.Manufacturer"] for f in t] == [f[1] for f in filas]
+    assert t.buscar("CODIGO", "AR-051")["COBie.Type.Manufacturer"] == "ACME"
+
+
+def test_normalizar_clave():
+    assert normalizar_clave(None) is None
+    assert normalizar_clave("   ") is None
+    assert normalizar_clave(7.0) == "7"
+    assert normalizar_clave(" AR-1 ") == "AR-1"
+
+
+def test_asegurar_indice_no_reconstruye_un_indice_existente():
+    t = tabla([("AR-001", "ACME")])
+    indice = t._indices["CODIGO"]
+    assert t.tiene_indice("CODIGO") and not t.tiene_indice("COBie.Type.Manufacturer")
+    t.asegurar_indice("CODIGO")
+    assert t._indices["CODIGO"] is indice
+    t.asegurar_indice("COBie.Type.Manufacturer")
+    assert t.tiene_indice("COBie.Type.Manufacturer")
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import modelo
+from Autodesk.Revit.DB import ElementId, FamilyInstance, FilteredElementCollector, SharedParameterElement, Transaction
+from Extensions._RevitAPI import (
+    ParameterWriteBatch, cache_elementos, get_param_value, invalidar_resolver, leer_parametros, resolver_parametros)
+
+NOMBRES = ["COBie", "S&P_NIVEL DE ELEMENTO", "S&P_CODIGO DE ELEMENTO", "No existe"]
+
+
+@pytest.fixture
+def doc():
+    return modelo.generar_modelo(60, relleno=5)
+
+
+def ejemplares(doc):
+    return list(FilteredElementCollector(doc).OfClass(FamilyInstance).ToElements())
+
+
+def test_leer_parametros_coincide_con_la_lectura_por_nombre(doc):
+    elementos = ejemplares(doc)
+    tabla = leer_parametros(doc, elementos, NOMBRES)
+    assert len(tabla) == len(elementos)
+    for elemento, fila in zip(elementos, tabla):
+        assert fila["ElementId"] == elemento.Id.IntegerValue
+        for nombre in NOMBRES:
+            assert fila[nombre] == get_param_value(elemento.LookupParameter(nombre))
+
+
+def test_leer_parametros_indexa_por_element_id_y_acepta_ids_inexistentes(doc):
+    elemento = ejemplares(doc)[0]
+    tabla = leer_parametros(doc, [elemento.Id, ElementId(999999)], NOMBRES)
+    assert tabla.buscar("ElementId", elemento.Id.IntegerValue)["COBie"] == elemento.LookupParameter("COBie").AsInteger()
+    assert tabla.buscar("ElementId", 999999)["COBie"] is None
+
+
+def test_lote_solo_escribe_los_valores_que_cambian(doc):
+    resolver = resolver_parametros(doc)
+    elementos = ejemplares(doc)[:4]
+    lote = ParameterWriteBatch()
+    for elemento in elementos:
+        param = resolver.parametro(elemento, "S&P_NIVEL DE ELEMENTO")
+        nuevo = "NIVEL X" if elemento is elementos[0] else param.AsString()
+        assert lote.agregar(elemento, param, nuevo)
+    transaccion = Transaction(doc, "Prueba")
+    transaccion.Start()
+    lote.aplicar()
+    transaccion.Commit()
+    assert lote.total("cambiados") == 1
+    assert lote.total("sin_cambios") == 3
+    assert lote.elementos_modificados == set([elementos[0].Id.IntegerValue])
+    assert elementos[0].LookupParameter("S&P_NIVEL DE ELEMENTO").AsString() == "NIVEL X"
+
+
+def test_resolver_se_reutiliza_mientras_el_documento_no_cambia(doc):
+    resolver = resolver_parametros(doc)
+    assert resolver_parametros(doc) is resolver
+    invalidar_resolver(doc)
+    assert resolver_parametros(doc) is not resolver
+
+
+def test_resolver_se_reconstruye_con_parametros_nuevos_u_otro_documento(doc):
+    resolver = resolver_parametros(doc)
+    doc.agregar(SharedParameterElement("Nuevo", "guid-nuevo"))
+    nuevo = resolver_parametros(doc)
+    assert nuevo is not resolver and "Nuevo" in nuevo.guids
+    # Otro documento con la misma ruta (reabierto) no hereda el resolver del cerrado
+    doc.Close(False)
+    otro = modelo.generar_modelo(60, relleno=5)
+    assert resolver_parametros(otro) is not nuevo
+
+
+def test_cache_de_elementos_no_devuelve_elementos_borrados(doc):
+    cache = cache_elementos(doc)
+    assert cache_elementos(doc) is not cache
+    tipo = cache.tipo(ejemplares(doc)[0])
+    assert cache.elemento(tipo.Id) is tipo and cache.aciertos == 1
+    doc.Delete(tipo.Id)
+    assert not tipo.IsValidObject
+    assert cache.elemento(tipo.Id) is None and len(cache) == 0
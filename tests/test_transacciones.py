@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+
+import pytest
+
+from Autodesk.Revit.DB import Document, Element, StorageType
+from Extensions._Transacciones import ChunkedTransaction
+
+
+@pytest.fixture
+def doc():
+    documento = Document("Resumen.rvt")
+    for i in range(10):
+        elemento = documento.agregar(Element("E{}".format(i)))
+        elemento.agregar_parametro("Marca", StorageType.String)
+    return documento
+
+
+@pytest.fixture
+def matriz(tmp_path):
+    ruta = str(tmp_path / "matriz.xlsx")
+    with io.open(ruta, "wb") as f:
+        f.write(b"v1")
+    return ruta
+
+
+def elementos(doc):
+    return sorted(doc._elementos.values(), key=lambda e: e.Id.IntegerValue)
+
+
+def marcar(elemento):
+    elemento.LookupParameter("Marca").Set(u"ok")
+
+
+def marcados(doc):
+    return [e.Id.IntegerValue for e in elementos(doc) if e.LookupParameter("Marca").HasValue]
+
+
+def transaccion(doc, matriz, **opciones):
+    return ChunkedTransaction(doc, "Prueba", tamano_bloque=3, reanudar="prueba", matriz=matriz,
+                              informar=False, **opciones)
+
+
+def ejecutar_cancelando(doc, matriz, bloques=1):
+    """Procesa hasta confirmar los bloques pedidos y cancela antes del siguiente."""
+    t = transaccion(doc, matriz, cancelado=lambda: len(t.bloques) >= bloques)
+    assert not t.procesar(elementos(doc), marcar)
+    return t
+
+
+def test_procesa_todo_por_bloques(doc, matriz, cache_temporal):
+    avances = []
+    t = transaccion(doc, matriz, progreso=lambda hechos, total: avances.append((hechos, total)))
+    assert t.procesar(elementos(doc), marcar)
+    assert t.completo and not t.cancelado
+    assert [cantidad for cantidad, _ in t.bloques] == [3, 3, 3, 1]
+    assert avances == [(3, 10), (6, 10), (9, 10), (10, 10)]
+    assert len(marcados(doc)) == 10
+    # Al terminar no queda nada que reanudar
+    assert transaccion(doc, matriz).progreso_anterior(elementos(doc)) == 0
+
+
+def test_cancelar_conserva_los_bloques_confirmados(doc, matriz, cache_temporal):
+    t = ejecutar_cancelando(doc, matriz, bloques=2)
+    assert t.cancelado and not t.completo
+    assert t.procesados == 6
+    assert len(marcados(doc)) == 6
+    assert "cancelado" in t.resumen()
+
+
+def test_reanudar_omite_los_elementos_ya_confirmados(doc, matriz, cache_temporal):
+    ejecutar_cancelando(doc, matriz)
+    procesados = []
+    t = transaccion(doc, matriz)
+    assert t.progreso_anterior(elementos(doc)) == 3
+    assert t.procesar(elementos(doc), procesados.append)
+    assert t.omitidos == 3 and t.procesados == 7
+    assert [e.Id.IntegerValue for e in procesados] == [e.Id.IntegerValue for e in elementos(doc)[3:]]
+
+
+def test_otro_alcance_no_reanuda(doc, matriz, cache_temporal):
+    ejecutar_cancelando(doc, matriz)
+    otro_alcance = elementos(doc)[:8]
+    t = transaccion(doc, matriz)
+    assert t.progreso_anterior(otro_alcance) == 0
+    t.procesar(otro_alcance, lambda e: None)
+    assert t.omitidos == 0 and t.procesados == 8
+
+
+def test_matriz_modificada_no_reanuda(doc, matriz, cache_temporal):
+    ejecutar_cancelando(doc, matriz)
+    with io.open(matriz, "wb") as f:
+        f.write(b"version 2")
+    os.utime(matriz, (1, 1))
+    assert transaccion(doc, matriz).progreso_anterior(elementos(doc)) == 0
+
+
+def test_otra_clave_de_proceso_no_reanuda(doc, matriz, cache_temporal):
+    ejecutar_cancelando(doc, matriz)
+    t = ChunkedTransaction(doc, "Prueba", tamano_bloque=3, reanudar="otra", matriz=matriz, informar=False)
+    assert t.progreso_anterior(elementos(doc)) == 0
+
+
+def test_descartar_progreso_vuelve_a_procesar_todo(doc, matriz, cache_temporal):
+    ejecutar_cancelando(doc, matriz)
+    t = transaccion(doc, matriz)
+    assert t.progreso_anterior(elementos(doc)) == 3
+    t.descartar_progreso()
+    assert t.progreso_anterior(elementos(doc)) == 0
+    t.procesar(elementos(doc), lambda e: None)
+    assert t.omitidos == 0 and t.procesados == 10
+    assert transaccion(doc, matriz).progreso_anterior(elementos(doc)) == 0
+
+
+def test_bloque_con_error_se_revierte_y_el_resto_queda_confirmado(doc, matriz, cache_temporal):
+    def fallar_en_el_quinto(elemento):
+        if elemento.Id.IntegerValue == elementos(doc)[4].Id.IntegerValue:
+            raise RuntimeError("fallo")
+        marcar(elemento)
+
+    t = transaccion(doc, matriz)
+    with pytest.raises(RuntimeError):
+        t.procesar(elementos(doc), fallar_en_el_quinto)
+    assert marcados(doc) == [e.Id.IntegerValue for e in elementos(doc)[:3]]
+    assert transaccion(doc, matriz).progreso_anterior(elementos(doc)) == 3
+
+
+def test_al_confirmar_se_llama_en_cada_bloque(doc, matriz, cache_temporal):
+    llamadas = []
+    t = transaccion(doc, matriz)
+    t.procesar(elementos(doc), lambda e: None, al_confirmar=lambda: llamadas.append(doc.IsModifiable))
+    assert llamadas == [True] * 4
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from Helper._UniclassIndex import COLUMNA_CODIGO, UniclassIndex, normalizar_numero
+
+
+def fila(codigo=None, pr=None, pr_desc=None, ss=None, ss_desc=None):
+    return {
+        COLUMNA_CODIGO: codigo,
+        "Classification.Uniclass.Pr.Number": pr,
+        "Classification.Uniclass.Pr.Description": pr_desc,
+        "Classification.Uniclass.Ss.Number": ss,
+        "Classification.Uniclass.Ss.Description": ss_desc,
+    }
+
+
+INDICE = UniclassIndex([
+    fila("AR-1", "Pr_65", "Productos de tuberia", "Ss_55", "Sistemas de tuberia"),
+    fila("AR-2", "pr_65_52 ", "Tuberias", "Ss_55_70", "Sistemas de agua"),
+    fila("AR-3", "Pr_65_52_63", "Tuberias de PVC"),
+    fila("AR-4", "Pr_65_520", "Otro grupo"),
+    fila("AR-5", "Pr_70", "Otro producto", "Ss_60", "Otro sistema"),
+])
+
+
+def test_normalizar_numero():
+    assert normalizar_numero(" pr_65_52 ") == "Pr_65_52"
+    assert normalizar_numero("SS_55") == "Ss_55"
+    assert normalizar_numero("") is None
+
+
+def test_descripcion_y_pertenencia():
+    assert INDICE.descripcion("PR_65_52") == u"Tuberias"
+    assert INDICE.descripcion("Pr_99", "x") == "x"
+    assert "pr_65_52_63" in INDICE
+    assert INDICE.por_codigo(" AR-3 ")[COLUMNA_CODIGO] == "AR-3"
+
+
+def test_descendientes_por_prefijo_sin_mezclar_hermanos():
+    assert INDICE.descendientes("Pr_65_52") == ["Pr_65_52", "Pr_65_52_63"]
+    assert INDICE.descendientes("Pr_65_52", incluir=False) == ["Pr_65_52_63"]
+    assert INDICE.descendientes("pr_65") == ["Pr_65", "Pr_65_52", "Pr_65_520", "Pr_65_52_63"]
+    assert INDICE.descendientes("Xx_1") == []
+
+
+def test_padre_es_el_ancestro_existente_mas_cercano():
+    assert INDICE.padre("Pr_65_52_63") == "Pr_65_52"
+    assert INDICE.padre("Pr_65_52_63_10") == "Pr_65_52_63"
+    assert INDICE.padre("Pr_65_99") == "Pr_65"
+    assert INDICE.padre("Pr_65") is None
+
+
+def test_ss_de_pr_usa_el_ancestro_si_el_producto_no_tiene_sistema():
+    assert INDICE.ss_de_pr("Pr_65_52") == "Ss_55_70"
+    assert INDICE.ss_de_pr("Pr_65_52_63") == "Ss_55_70"
+    assert INDICE.ss_de_pr("Pr_65_520") == "Ss_55"
+    assert INDICE.ss_de_pr("Pr_80") is None
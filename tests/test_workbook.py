@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from Helper._Workbook import Workbook, buscar_hoja, normalizar_encabezado, resolver_encabezados
+from Helper._XlsxWriter import ArchivoEnUsoError, XlsxWriter, letra_columna
+
+
+@pytest.fixture
+def matriz(tmp_path):
+    """Libro con el formato de la matriz: titulo, fila vacia, encabezados en la fila 3."""
+    ruta = str(tmp_path / "matriz.xlsx")
+    with XlsxWriter(ruta) as libro:
+        libro.nueva_hoja(u"ESTANDAR COBIE  - PL")
+        libro.escribir_fila([u"Matriz COBie"])
+        libro.saltar_filas(1)
+        libro.escribir_fila([u"CODIGO", u"Estándar  Descripción", u"COBie.Type.NominalLength", u"Otra"])
+        libro.escribir_fila([u"PL-001", u"Inodoro", 0.5, u"x"])
+        libro.saltar_filas(1)
+        libro.escribir_fila([u"PL-002", None, 1.25, u"y"])
+        libro.nueva_hoja(u"ESTANDAR COBie SPACE ")
+        libro.escribir_fila([u"COBie.Space.Name", u"COBie.Space.RoomTag"])
+        libro.escribir_fila([u"AMBIENTE 001", u"101"])
+    return ruta
+
+
+def test_normalizar_encabezado():
+    assert normalizar_encabezado(u"ESTANDAR COBIE  - PL") == normalizar_encabezado(u"Estándar COBie -PL")
+    assert normalizar_encabezado(u"  Código ") == u"codigo"
+    assert normalizar_encabezado(3.0) == u"3"
+    assert normalizar_encabezado(None) == u""
+
+
+def test_resolver_encabezados_exacto_primero_y_luego_normalizado():
+    headers = {0: u"CODIGO", 1: u"codigo", 2: u"Descripción  Larga"}
+    encontrados = resolver_encabezados(headers, [u"codigo", u"DESCRIPCION LARGA", u"Falta"])
+    assert encontrados == {u"codigo": 1, u"DESCRIPCION LARGA": 2, u"Falta": None}
+
+
+def test_buscar_hoja():
+    nombres = [u"ESTANDAR COBIE  - PL", u"Uniclass"]
+    assert buscar_hoja(nombres, u"Uniclass") == u"Uniclass"
+    assert buscar_hoja(nombres, u"Estándar COBie -PL") == u"ESTANDAR COBIE  - PL"
+    assert buscar_hoja(nombres, u"Otra") is None
+
+
+def test_letra_columna():
+    assert [letra_columna(i) for i in (0, 25, 26, 701, 702)] == ["A", "Z", "AA", "ZZ", "AAA"]
+
+
+def test_ida_y_vuelta_xlsxwriter_workbook(matriz):
+    with Workbook(matriz) as libro:
+        assert libro.nombres_hojas() == [u"ESTANDAR COBIE  - PL", u"ESTANDAR COBie SPACE "]
+        filas = libro.filas(u"ESTANDAR COBIE  - PL")
+    assert filas[0][0] == u"Matriz COBie"
+    assert filas[2] == [u"CODIGO", u"Estándar  Descripción", u"COBie.Type.NominalLength", u"Otra"]
+    assert filas[3] == [u"PL-001", u"Inodoro", 0.5, u"x"]
+    assert all(v == "" for v in filas[4])
+    assert filas[5][0] == u"PL-002" and filas[5][1] == "" and filas[5][2] == 1.25
+
+
+def test_proyectar_solo_las_columnas_pedidas(matriz):
+    libro = Workbook(matriz)
+    indices, filas = libro.proyectar(u"ESTANDAR COBIE  - PL", 2,
+                                     [u"CODIGO", u"estandar descripcion", u"COBie.Type.NominalLength", u"Falta"], 3)
+    assert indices == {u"CODIGO": 0, u"estandar descripcion": 1, u"COBie.Type.NominalLength": 2, u"Falta": None}
+    # La fila vacia intermedia se conserva para que las posiciones coincidan con Excel
+    assert filas == [(u"PL-001", u"Inodoro", 0.5, None), (u"", u"", u"", None), (u"PL-002", u"", 1.25, None)]
+    # El mapa de encabezados queda registrado para las siguientes proyecciones
+    assert libro.encabezados(u"ESTANDAR COBIE  - PL", 2)[1] == u"Estándar  Descripción"
+    assert libro.proyectar(u"ESTANDAR COBIE  - PL", 2, [u"Otra"], 3)[1][0] == (u"x",)
+
+
+def test_proyectar_hoja_inexistente(matriz):
+    assert Workbook(matriz).proyectar(u"No existe", 2, [u"CODIGO"], 3) == (None, [])
+
+
+def test_el_xlsx_no_queda_abierto_entre_lecturas(matriz, tmp_path):
+    libro = Workbook(matriz)
+    libro.filas(u"ESTANDAR COBie SPACE ")
+    destino = str(tmp_path / "movida.xlsx")
+    os.rename(matriz, destino)
+    assert os.path.exists(destino)
+
+
+def test_xlsxwriter_descarta_si_falla(tmp_path):
+    ruta = str(tmp_path / "fallido.xlsx")
+    with pytest.raises(RuntimeError):
+        with XlsxWriter(ruta) as libro:
+            libro.escribir_fila([u"a"])
+            raise RuntimeError("fallo")
+    assert not os.path.exists(ruta)
+
+
+def test_xlsxwriter_avisa_si_el_destino_esta_en_uso(matriz, tmp_path, monkeypatch):
+    remove = os.remove
+
+    def bloqueado(ruta):
+        # Como en Windows con el libro abierto en Excel: solo el destino no se puede borrar
+        if ruta == matriz:
+            raise OSError(13, "Permission denied", ruta)
+        remove(ruta)
+
+    monkeypatch.setattr(os, "remove", bloqueado)
+    with pytest.raises(ArchivoEnUsoError):
+        with XlsxWriter(matriz) as libro:
+            libro.escribir_fila([u"a"])
+    monkeypatch.undo()
+    # El libro original queda intacto y no quedan temporales junto a el
+    assert Workbook(matriz).nombres_hojas()[0] == u"ESTANDAR COBIE  - PL"
+    assert sorted(os.listdir(str(tmp_path))) == ["matriz.xlsx"]